@@ -0,0 +1,297 @@
+"""HTTP JSON API over the search, rank, transcript and summary pipeline.
+
+A plain ASGI application on top of async_utils, sharing the app's SQLite caches
+(shared search results, stored ratings and summaries). Run it with:
+
+    python api_server.py --port 8000        # or: uvicorn api_server:app
+
+Endpoints:
+    GET  /health
+    GET  /search?q=<query>
+    POST /rank                               {"query": "...", "video_ids": ["..."]}
+    GET  /videos/<id>/transcript
+    GET  /videos/<id>/summary?style=Concise&language=English[&stream=1]
+
+JSON responses carry an ETag and answer a matching If-None-Match with 304.
+``stream=1`` (or ``Accept: text/event-stream``) streams the summary as
+server-sent events. Set API_SERVICE_KEY to require an X-API-Key header.
+"""
+import argparse
+import asyncio
+import hashlib
+import hmac
+import json
+import re
+from collections import OrderedDict
+from urllib.parse import parse_qs
+from config import (
+    get_secret, SEARCH_CACHE_MAX_AGE_HOURS, API_MAX_CONCURRENT_REQUESTS, API_QUEUE_TIMEOUT_SECONDS,
+    API_TRANSCRIPT_CACHE_SIZE, API_MAX_RANK_VIDEOS
+)
+from database import DatabaseManager, init_db
+from llm_gateway import resolve_route
+from summary_styles import DEFAULT_STYLES, get_style_prompt
+import async_utils
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str, headers: dict = None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.headers = headers or {}
+
+class StreamingBody:
+    """A handler result sent chunk by chunk instead of as one JSON document"""
+    def __init__(self, chunks, content_type: str):
+        self.chunks = chunks
+        self.content_type = content_type
+
+_request_slots = None  # created on the server's event loop
+_transcripts = OrderedDict()  # video_id -> transcript, least recently used first
+
+def _get_request_slots():
+    global _request_slots
+    if _request_slots is None:
+        _request_slots = asyncio.Semaphore(API_MAX_CONCURRENT_REQUESTS)
+    return _request_slots
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Whether an If-None-Match header (a comma-separated ETag list or '*') matches an ETag
+    
+    Uses the weak comparison If-None-Match calls for, so W/"x" matches "x".
+    """
+    tags = [tag.strip() for tag in if_none_match.split(',') if tag.strip()]
+    return any(tag == '*' or tag.removeprefix('W/') == etag for tag in tags)
+
+async def get_cached_transcript(video_id: str):
+    """Get a transcript from the in-process LRU cache or fetch it"""
+    if video_id in _transcripts:
+        _transcripts.move_to_end(video_id)
+        return _transcripts[video_id]
+    transcript = await async_utils.get_video_transcript(video_id)
+    if transcript:
+        _transcripts[video_id] = transcript
+        if len(_transcripts) > API_TRANSCRIPT_CACHE_SIZE:
+            _transcripts.popitem(last=False)
+    return transcript
+
+def _get_summary_style(query: dict) -> tuple:
+    """Return (style name, prompt template, route) for the requested default style"""
+    style = query.get('style', 'Concise')
+    if style not in DEFAULT_STYLES:
+        raise HTTPError(400, f"Unknown style '{style}', expected one of: {', '.join(DEFAULT_STYLES)}")
+    return style, get_style_prompt(style), resolve_route('summary', style)
+
+async def handle_health(request):
+    return {'status': 'ok'}
+
+async def handle_search(request):
+    query = request['query'].get('q', '').strip()
+    if not query:
+        raise HTTPError(400, "Missing query parameter 'q'")
+    
+    db = DatabaseManager()
+    videos = db.get_shared_search_results(query, SEARCH_CACHE_MAX_AGE_HOURS)
+    cached = bool(videos)
+    if not cached:
+        videos = await async_utils.search_videos(query)
+        if videos:
+            # Shared with the Streamlit app's search cache
+            db.save_search_results(None, query, videos)
+    if videos:
+        db.record_search_hit(None, query)
+    return {'query': query, 'cached': cached, 'videos': videos}
+
+async def handle_rank(request):
+    try:
+        payload = json.loads(request['body'] or b'{}')
+    except json.JSONDecodeError:
+        raise HTTPError(400, "Request body must be JSON")
+    video_ids = payload.get('video_ids')
+    if not isinstance(video_ids, list) or not video_ids:
+        raise HTTPError(400, "Expected a non-empty 'video_ids' list")
+    if len(video_ids) > API_MAX_RANK_VIDEOS:
+        raise HTTPError(400, f"At most {API_MAX_RANK_VIDEOS} videos can be ranked per request")
+    
+    query = payload.get('query', '')
+    videos = await async_utils.get_videos_metadata([str(video_id) for video_id in video_ids])
+    for video in videos:
+        video['search_query'] = query
+    return {'query': query, 'videos': await async_utils.rank_videos(videos)}
+
+async def handle_transcript(request, video_id):
+    transcript = await get_cached_transcript(video_id)
+    if not transcript:
+        raise HTTPError(404, f"No transcript available for {video_id}")
+    return {'video_id': video_id, 'transcript': transcript}
+
+async def handle_summary(request, video_id):
+    style, prompt_template, route = _get_summary_style(request['query'])
+    language = request['query'].get('language', 'English')
+    
+    wants_stream = request['query'].get('stream') in ('1', 'true') \
+        or 'text/event-stream' in request['headers'].get('accept', '')
+    if wants_stream:
+        return StreamingBody(_summary_events(video_id, prompt_template, route, language), 'text/event-stream')
+    
+    # Default styles are public, so summaries are shared with the app's users
+    summary, from_store = await async_utils.get_or_generate_summary(video_id, prompt_template, route, language)
+    if summary is None:
+        raise HTTPError(502, f"Could not summarize {video_id}")
+    return {'video_id': video_id, 'style': style, 'language': language, 'stored': from_store, 'summary': summary}
+
+async def _summary_events(video_id, prompt_template, route, language):
+    """Server-sent events: one 'data' event per text delta, then 'done' or 'error'"""
+    try:
+        async for delta in async_utils.stream_summary(video_id, prompt_template, route, language):
+            yield f"data: {json.dumps(delta)}\n\n".encode()
+        yield b"event: done\ndata: {}\n\n"
+    except Exception as e:
+        print(f"Error streaming summary: {str(e)}")
+        yield f"event: error\ndata: {json.dumps(str(e))}\n\n".encode()
+
+ROUTES = [
+    ('GET', re.compile(r'^/health$'), handle_health),
+    ('GET', re.compile(r'^/search$'), handle_search),
+    ('POST', re.compile(r'^/rank$'), handle_rank),
+    ('GET', re.compile(r'^/videos/([\w-]{6,20})/transcript$'), handle_transcript),
+    ('GET', re.compile(r'^/videos/([\w-]{6,20})/summary$'), handle_summary),
+]
+
+async def _read_body(receive) -> bytes:
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return body
+
+async def _send_response(send, status: int, body: bytes = b'', headers: dict = None):
+    header_list = [(name.lower().encode(), str(value).encode()) for name, value in (headers or {}).items()]
+    await send({'type': 'http.response.start', 'status': status, 'headers': header_list})
+    await send({'type': 'http.response.body', 'body': body})
+
+async def _send_json(send, request, status: int, payload, headers: dict = None):
+    body = json.dumps(payload, separators=(',', ':')).encode()
+    headers = {'content-type': 'application/json', **(headers or {})}
+    if status == 200:
+        etag = make_etag(body)
+        # Clients revalidate every time; unchanged results cost a 304 with no body
+        headers.update({'etag': etag, 'cache-control': 'no-cache'})
+        if etag_matches(request['headers'].get('if-none-match', ''), etag):
+            await _send_response(send, 304, headers={'etag': etag, 'cache-control': 'no-cache'})
+            return
+    headers['content-length'] = len(body)
+    await _send_response(send, status, body, headers)
+
+async def _send_stream(send, result: StreamingBody):
+    await send({'type': 'http.response.start', 'status': 200, 'headers': [
+        (b'content-type', result.content_type.encode()),
+        (b'cache-control', b'no-cache'),
+    ]})
+    async for chunk in result.chunks:
+        await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b''})
+
+async def _end_body(send):
+    """Close a response body that was cut short; the client may already be gone"""
+    try:
+        await send({'type': 'http.response.body', 'body': b''})
+    except Exception as e:
+        print(f"Error closing response: {str(e)}")
+
+def _check_api_key(request):
+    expected = get_secret('API_SERVICE_KEY')
+    # Compared as bytes: compare_digest rejects str arguments with non-ASCII characters
+    if expected and not hmac.compare_digest(request['headers'].get('x-api-key', '').encode(), expected.encode()):
+        raise HTTPError(401, "Missing or invalid X-API-Key")
+
+async def _dispatch(request):
+    for method, pattern, handler in ROUTES:
+        match = pattern.match(request['path'])
+        if match:
+            if request['method'] != method:
+                raise HTTPError(405, "Method not allowed", {'allow': method})
+            return await handler(request, *match.groups())
+    raise HTTPError(404, "Not found")
+
+async def _handle_lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            init_db()
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    """ASGI entry point"""
+    if scope['type'] == 'lifespan':
+        await _handle_lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+    
+    # Once the response has started, errors can only end the body, not send a new status
+    response_started = False
+    
+    async def send_tracked(message):
+        nonlocal response_started
+        if message['type'] == 'http.response.start':
+            response_started = True
+        await send(message)
+    
+    request = {
+        'method': scope['method'],
+        'path': scope['path'],
+        'query': {name: values[-1] for name, values in parse_qs(scope['query_string'].decode()).items()},
+        'headers': {name.decode().lower(): value.decode() for name, value in scope['headers']},
+        'body': await _read_body(receive),
+    }
+    
+    try:
+        _check_api_key(request)
+        if request['path'] == '/health':
+            result = await _dispatch(request)
+        else:
+            # Requests beyond the concurrency limit wait briefly, then get a 503
+            slots = _get_request_slots()
+            try:
+                await asyncio.wait_for(slots.acquire(), API_QUEUE_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                raise HTTPError(503, "Server busy, retry later", {'retry-after': 1})
+            try:
+                result = await _dispatch(request)
+                if isinstance(result, StreamingBody):
+                    await _send_stream(send_tracked, result)
+                    return
+            finally:
+                slots.release()
+    except Exception as e:
+        if response_started:
+            print(f"Error streaming {request['method']} {request['path']}: {str(e)}")
+            await _end_body(send)
+        elif isinstance(e, HTTPError):
+            await _send_json(send, request, e.status, {'error': e.message}, e.headers)
+        else:
+            print(f"Error handling {request['method']} {request['path']}: {str(e)}")
+            await _send_json(send, request, 500, {'error': 'Internal server error'})
+        return
+    
+    await _send_json(send, request, 200, result)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the search/rank/summarize pipeline as an HTTP JSON API")
+    parser.add_argument('--host', default='127.0.0.1', help="Interface to listen on")
+    parser.add_argument('--port', type=int, default=8000, help="Port to listen on")
+    args = parser.parse_args(argv)
+    
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,17 @@
 import streamlit as st
-import pandas as pd
 from datetime import datetime
-from utils import search_videos, get_video_transcript, generate_summary, get_video_metadata
+from utils import fetch_search_candidates, rank_videos, get_video_transcript, generate_summary_with_style, refresh_video_statistics, SUMMARY_ERROR_MESSAGE
 import json
-from summary_styles import DEFAULT_STYLES, get_style_prompt, get_style_description
-from openai import OpenAI
-from config import OPENAI_API_KEY
+from summary_styles import DEFAULT_STYLES, get_style_prompt, get_style_description, get_prompt_hash
+from llm_gateway import resolve_route, choose_model, get_route_stats
+from config import MODEL_ROUTES, SEARCH_CACHE_MAX_AGE_HOURS, PREFETCH_WAIT_SECONDS
 from languages import SUPPORTED_LANGUAGES, UI_TEXT
 from database import DatabaseManager, init_db
-from auth import show_login_page, show_signup_page, check_auth, logout as auth_logout
+from auth import show_login_page, show_signup_page, check_auth, sync_session_cookie, logout as auth_logout
+from session_persistence import restore_session, persist_session
+from rating_schema import get_parse_stats
+from summary_prefetch import start_prefetch, cancel_prefetch, record_summary_view, get_prefetch_stats, wait_for_prefetch
+from video_records import compact_videos, get_shared_results, share_results
 import base64
 
 def handle_search_input():
@@ -357,12 +360,14 @@ def create_search_section():
                 st.session_state.reset_count = st.session_state.get('reset_count', 0) + 1
                 st.session_state.search_query = ''
                 st.session_state.current_videos = None
-                st.session_state.last_search_results = None
                 st.session_state.last_search_query = ''
                 st.session_state.search_history = []
                 st.session_state.summaries = {}
+                st.session_state.summaries_loaded = set()
                 st.session_state.shown_transcripts = {}
                 st.session_state.active_tab = {}
+                st.session_state.playing_videos = {}
+                st.session_state.result_page = 0
                 st.session_state.current_sort = 'Relevance'
                 st.session_state.rating_filter = ["S", "A", "B", "C", "D"]
                 st.session_state.search_count = 0
@@ -418,7 +423,9 @@ def get_available_patterns(user_id=None):
         {
             'name': name,
             'description': style.get('description', ''),
-            'prompt_template': style.get('prompt', '')
+            'prompt_template': style.get('prompt', ''),
+            'is_public': True,
+            'route': resolve_route('summary', name)
         }
         for name, style in DEFAULT_STYLES.items()
     ]
@@ -426,13 +433,14 @@ def get_available_patterns(user_id=None):
     # Get user patterns from database if user_id is provided
     db_patterns = []
     if user_id:
-        db = DatabaseManager()
-        patterns = db.get_user_patterns(user_id)
+        patterns = load_user_patterns(user_id)
         db_patterns = [
             {
                 'name': p[2],
                 'description': p[3],
-                'prompt_template': p[4]
+                'prompt_template': p[4],
+                'is_public': bool(p[5]),
+                'route': 'custom_pattern'
             }
             for p in patterns
         ]
@@ -440,6 +448,17 @@ def get_available_patterns(user_id=None):
     # Combine both sets of patterns
     return default_patterns + db_patterns
 
+# Number of video cards rendered per results page
+RESULTS_PER_PAGE = 6
+
+RATING_COLORS = {
+    'S': '#FFD700',
+    'A': '#C0C0C0',
+    'B': '#CD7F32',
+    'C': '#808080',
+    'D': '#A52A2A'
+}
+
 def display_video_grid(videos, rating_filter):
     """Display videos in a grid with sorting and filtering"""
     # Get search state at the start
@@ -455,30 +474,252 @@ def display_video_grid(videos, rating_filter):
     sort_by = st.session_state.get('current_sort', 'Relevance')
     sorted_videos = sort_videos(filtered_videos.copy(), sort_by)  # Make a copy to avoid modifying original
     
-    # Display videos
-    num_videos = len(sorted_videos)
-    num_rows = (num_videos + 1) // 2
+    # Only render the current page so rerun cost doesn't grow with result count
+    num_pages = (len(sorted_videos) + RESULTS_PER_PAGE - 1) // RESULTS_PER_PAGE
+    page = min(st.session_state.get('result_page', 0), num_pages - 1)
+    st.session_state.result_page = page
+    page_videos = sorted_videos[page * RESULTS_PER_PAGE:(page + 1) * RESULTS_PER_PAGE]
+    
+    # Patterns are loaded once per grid render, not once per card
+    all_patterns = get_available_patterns(st.session_state.user['user_id'])
+    
+    # Stored summaries for this page are pulled into the session in one query
+    load_stored_summaries([v['id'] for v in page_videos])
     
     # Create grid layout
-    for row in range(num_rows):
+    num_videos = len(page_videos)
+    for row in range(0, num_videos, 2):
         cols = st.columns(2)
-        for col in range(2):
-            video_idx = row * 2 + col
-            if video_idx < num_videos:  # Only process if we have a video
-                with cols[col]:
-                    video = sorted_videos[video_idx]
+        for col, video in zip(cols, page_videos[row:row + 2]):
+            with col:
+                display_video_card(video, all_patterns, is_searching)
+    
+    if num_pages > 1:
+        prev_col, page_col, next_col = st.columns([1, 2, 1])
+        with prev_col:
+            if st.button("⬅ Previous", key="results_prev_page", disabled=page == 0, use_container_width=True):
+                st.session_state.result_page = page - 1
+                st.rerun()
+        with page_col:
+            st.markdown(
+                f"<div style='text-align: center; color: #666;'>Page {page + 1} of {num_pages}</div>",
+                unsafe_allow_html=True
+            )
+        with next_col:
+            if st.button("Next ➡", key="results_next_page", disabled=page >= num_pages - 1, use_container_width=True):
+                st.session_state.result_page = page + 1
+                st.rerun()
+
+@st.fragment
+def display_video_card(video, all_patterns, is_searching):
+    """Display a single video card
+    
+    Runs as a fragment, so clicking a button inside one card only re-executes
+    that card instead of the whole script.
+    """
+    # Video card container
+    st.markdown("""
+        <div style="
+            background: white;
+            border-radius: 10px;
+            padding: 1.5rem;
+            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
+            margin-bottom: 2rem;
+        ">
+    """, unsafe_allow_html=True)
+    
+    # Rating badge
+    st.markdown(f"""
+        <div style="
+            background-color: {RATING_COLORS[video['rating_tier']]};
+            color: white;
+            padding: 4px 8px;
+            border-radius: 4px;
+            display: inline-block;
+            margin-bottom: 1rem;
+        ">
+            {video['rating_tier']} Tier (Score: {video['content_score']})
+        </div>
+    """, unsafe_allow_html=True)
+    
+    # Rest of your video card content...
+    with st.expander("Rating Explanation"):
+        st.write(video['rating_explanation'])
+    
+    # Show a thumbnail until the user asks to play; the iframe is only embedded on click
+    if st.session_state.playing_videos.get(video['id']):
+        st.video(f"https://youtu.be/{video['id']}")
+    else:
+        st.markdown(f"""
+            <img src="https://i.ytimg.com/vi/{video['id']}/mqdefault.jpg"
+                 style="width: 100%; border-radius: 8px;" />
+        """, unsafe_allow_html=True)
+        if st.button("▶ Play", key=f"play_{video['id']}", use_container_width=True):
+            st.session_state.playing_videos[video['id']] = True
+            st.rerun(scope="fragment")
+    
+    st.markdown(f"""
+        <div style="margin: 1rem 0;">
+            <div style="font-size: 1.1rem; font-weight: 600; margin-bottom: 0.5rem;">
+                {video['title']}
+            </div>
+            <div style="display: flex; gap: 1rem; color: #666;">
+                <span>👁️ {video['views']:,}</span>
+                <span>👍 {video['likes']:,}</span>
+                <span>📅 {video['date'][:10]}</span>
+            </div>
+        </div>
+    """, unsafe_allow_html=True)
+    
+    # Tabs for transcript and summary
+    if video['has_transcript']:
+        tab_id = f"tabs_{video['id']}"
+        if tab_id not in st.session_state.active_tab:
+            st.session_state.active_tab[tab_id] = "Video"
+        
+        tabs = st.tabs(["Video", "Transcript"])
+        
+        with tabs[0]:
+            pass  # Video is already shown above
+        
+        with tabs[1]:
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                transcript_key = f"transcript_{video['id']}"
+                if st.button("View Transcript", 
+                           key=f"btn_transcript_{video['id']}"):
+                    st.session_state.shown_transcripts[transcript_key] = True
+                
+                if st.session_state.shown_transcripts.get(transcript_key, False):
+                    transcript = load_transcript(video['id'])
                     
-                    # Rating colors
-                    rating_colors = {
-                        'S': '#FFD700',
-                        'A': '#C0C0C0',
-                        'B': '#CD7F32',
-                        'C': '#808080',
-                        'D': '#A52A2A'
-                    }
+                    st.text_area("Transcript", transcript, height=200)
+                    
+                    st.download_button(
+                        label="Download Transcript",
+                        data=transcript,
+                        file_name=f"transcript_{video['id']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                        mime="text/plain"
+                    )
+            
+            with col2:
+                pattern_names = [p['name'] for p in all_patterns]
+                
+                if pattern_names:  # Only show if there are patterns
+                    selected_style = st.selectbox(
+                        label="Select summary style",
+                        options=pattern_names,
+                        key=f"style_{video['id']}",
+                        disabled=is_searching
+                    )
                     
-                    # Video card container
-                    st.markdown("""
+                    selected_pattern = next(p for p in all_patterns if p['name'] == selected_style)
+                    prompt_hash = get_prompt_hash(selected_pattern['prompt_template'])
+                    # Summaries are keyed by the model that writes them: the route's primary,
+                    # or its fallback while the primary is over its SLO
+                    model = choose_model(selected_pattern['route'])
+                    language = st.session_state.get('language', "English")
+                    summary_key = f"summary_{video['id']}_{prompt_hash}_{language}_{model}"
+                    
+                    # Summarize button - disabled during search
+                    if st.button(
+                        "Summarize", 
+                        key=f"summarize_{video['id']}", 
+                        disabled=is_searching,
+                        use_container_width=True
+                    ) and summary_key not in st.session_state.summaries:
+                        db = DatabaseManager()
+                        user_id = st.session_state.user['user_id']
+                        
+                        # Join a prefetch already generating this summary, then reuse a stored
+                        # summary, before paying for a new one
+                        with st.spinner("Generating summary..."):
+                            summary = wait_for_prefetch(
+                                video['id'], prompt_hash, language, model, timeout=PREFETCH_WAIT_SECONDS
+                            )
+                        if summary is None:
+                            summary = db.get_summary(user_id, video['id'], prompt_hash, language, model)
+                        if summary is None:
+                            with st.spinner("Generating summary..."):
+                                transcript = load_transcript(video['id'])
+                                summary = generate_summary_with_style(
+                                    transcript,
+                                    selected_pattern['prompt_template'],
+                                    route=selected_pattern['route'],
+                                    model=model
+                                )
+                            if summary != SUMMARY_ERROR_MESSAGE:
+                                db.save_summary(
+                                    user_id, video['id'], prompt_hash, language, model, summary,
+                                    is_public=selected_pattern['is_public']
+                                )
+                        
+                        # Errors are shown but not cached, so the next click retries
+                        if summary == SUMMARY_ERROR_MESSAGE:
+                            st.error(summary)
+                        else:
+                            st.session_state.summaries[summary_key] = summary
+                    
+                    # Display summary if it exists
+                    if summary_key in st.session_state.summaries:
+                        summary = st.session_state.summaries[summary_key]
+                        record_summary_view(video['id'], prompt_hash, language, model)
+                        st.markdown('<div class="summary-container">', unsafe_allow_html=True)
+                        st.info(summary)
+                        st.markdown('</div>', unsafe_allow_html=True)
+                        
+                        st.download_button(
+                            label="Download Summary",
+                            data=summary,
+                            file_name=f"summary_{video['id']}_{selected_style}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
+                            mime="text/plain",
+                            key=f"download_summary_{video['id']}"
+                        )
+    
+    st.markdown("</div>", unsafe_allow_html=True)
+
+def display_result_previews(placeholder, ranked_videos, pending_videos):
+    """Render lightweight result cards while a search is still being rated
+    
+    Rated videos are shown in tier order with their badge; videos still waiting
+    for a rating are shown as metadata-only placeholder cards. No widgets are
+    created here, so the placeholder can be redrawn after every rated video.
+    """
+    with placeholder.container():
+        preview_videos = list(ranked_videos) + list(pending_videos)
+        for row in range(0, len(preview_videos), 2):
+            cols = st.columns(2)
+            for col, video in zip(cols, preview_videos[row:row + 2]):
+                with col:
+                    if 'rating_tier' in video:
+                        badge = f"""
+                            <div style="
+                                background-color: {RATING_COLORS[video['rating_tier']]};
+                                color: white;
+                                padding: 4px 8px;
+                                border-radius: 4px;
+                                display: inline-block;
+                                margin-bottom: 1rem;
+                            ">
+                                {video['rating_tier']} Tier (Score: {video['content_score']})
+                            </div>
+                        """
+                    else:
+                        badge = """
+                            <div style="
+                                background-color: #e9ecef;
+                                color: #666;
+                                padding: 4px 8px;
+                                border-radius: 4px;
+                                display: inline-block;
+                                margin-bottom: 1rem;
+                            ">
+                                ⏳ Rating...
+                            </div>
+                        """
+                    
+                    st.markdown(f"""
                         <div style="
                             background: white;
                             border-radius: 10px;
@@ -486,116 +727,21 @@ def display_video_grid(videos, rating_filter):
                             box-shadow: 0 2px 8px rgba(0,0,0,0.1);
                             margin-bottom: 2rem;
                         ">
-                    """, unsafe_allow_html=True)
-                    
-                    # Rating badge
-                    st.markdown(f"""
-                        <div style="
-                            background-color: {rating_colors[video['rating_tier']]};
-                            color: white;
-                            padding: 4px 8px;
-                            border-radius: 4px;
-                            display: inline-block;
-                            margin-bottom: 1rem;
-                        ">
-                            {video['rating_tier']} Tier (Score: {video['content_score']})
-                        </div>
-                    """, unsafe_allow_html=True)
-                    
-                    # Rest of your video card content...
-                    with st.expander("Rating Explanation"):
-                        st.write(video['rating_explanation'])
-                    
-                    st.video(f"https://youtu.be/{video['id']}")
-                    
-                    st.markdown(f"""
-                        <div style="margin: 1rem 0;">
-                            <div style="font-size: 1.1rem; font-weight: 600; margin-bottom: 0.5rem;">
-                                {video['title']}
-                            </div>
-                            <div style="display: flex; gap: 1rem; color: #666;">
-                                <span>👁️ {video['views']:,}</span>
-                                <span>👍 {video['likes']:,}</span>
-                                <span>📅 {video['date'][:10]}</span>
+                            {badge}
+                            <img src="https://i.ytimg.com/vi/{video['id']}/mqdefault.jpg"
+                                 style="width: 100%; border-radius: 8px;" />
+                            <div style="margin: 1rem 0;">
+                                <div style="font-size: 1.1rem; font-weight: 600; margin-bottom: 0.5rem;">
+                                    {video['title']}
+                                </div>
+                                <div style="display: flex; gap: 1rem; color: #666;">
+                                    <span>👁️ {video['views']:,}</span>
+                                    <span>👍 {video['likes']:,}</span>
+                                    <span>📅 {video['date'][:10]}</span>
+                                </div>
                             </div>
                         </div>
                     """, unsafe_allow_html=True)
-                    
-                    # Tabs for transcript and summary
-                    if video['has_transcript']:
-                        tab_id = f"tabs_{video['id']}"
-                        if tab_id not in st.session_state.active_tab:
-                            st.session_state.active_tab[tab_id] = "Video"
-                        
-                        tabs = st.tabs(["Video", "Transcript"])
-                        
-                        with tabs[0]:
-                            pass  # Video is already shown above
-                        
-                        with tabs[1]:
-                            col1, col2 = st.columns(2)
-                            
-                            with col1:
-                                transcript_key = f"transcript_{video['id']}"
-                                if st.button("View Transcript", 
-                                           key=f"btn_transcript_{video['id']}"):
-                                    st.session_state.shown_transcripts[transcript_key] = True
-                                
-                                if st.session_state.shown_transcripts.get(transcript_key, False):
-                                    transcript = get_video_transcript(video['id'])
-                                    
-                                    st.text_area("Transcript", transcript, height=200)
-                                    
-                                    st.download_button(
-                                        label="Download Transcript",
-                                        data=transcript,
-                                        file_name=f"transcript_{video['id']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                                        mime="text/plain"
-                                    )
-                            
-                            with col2:
-                                # Get all available patterns
-                                all_patterns = get_available_patterns(st.session_state.user['user_id'])
-                                pattern_names = [p['name'] for p in all_patterns]
-                                
-                                if pattern_names:  # Only show if there are patterns
-                                    selected_style = st.selectbox(
-                                        label="Select summary style",
-                                        options=pattern_names,
-                                        key=f"style_{video['id']}",
-                                        disabled=is_searching
-                                    )
-                                    
-                                    # Summarize button - disabled during search
-                                    if st.button(
-                                        "Summarize", 
-                                        key=f"summarize_{video['id']}", 
-                                        disabled=is_searching,
-                                        use_container_width=True
-                                    ):
-                                        with st.spinner("Generating summary..."):
-                                            transcript = get_video_transcript(video['id'])
-                                            selected_pattern = next(p for p in all_patterns if p['name'] == selected_style)
-                                            summary = generate_summary_with_style(transcript, selected_pattern['prompt_template'])
-                                            st.session_state.summaries[f"summary_{video['id']}"] = summary
-                                            st.rerun()
-                                
-                                # Display summary if it exists
-                                if f"summary_{video['id']}" in st.session_state.summaries:
-                                    summary = st.session_state.summaries[f"summary_{video['id']}"]
-                                    st.markdown('<div class="summary-container">', unsafe_allow_html=True)
-                                    st.info(summary)
-                                    st.markdown('</div>', unsafe_allow_html=True)
-                                    
-                                    st.download_button(
-                                        label="Download Summary",
-                                        data=summary,
-                                        file_name=f"summary_{video['id']}_{selected_style}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                                        mime="text/plain",
-                                        key=f"download_summary_{video['id']}"
-                                    )
-                    
-                    st.markdown("</div>", unsafe_allow_html=True)
 
 def logout():
     """Clear all session state and redirect to login page"""
@@ -607,50 +753,103 @@ def cache_search_results(search_query, videos):
     """Cache search results with query as key"""
     return videos
 
+@st.cache_data(ttl=3600)  # Cache for 1 hour
+def load_transcript(video_id):
+    """Cache transcripts so card reruns don't refetch them"""
+    return get_video_transcript(video_id)
+
+@st.cache_data(ttl=300)  # Cache for 5 minutes
+def load_user_patterns(user_id):
+    """Cache pattern rows visible to a user; cleared when patterns change"""
+    db = DatabaseManager()
+    return db.get_user_patterns(user_id)
+
+def load_stored_summaries(video_ids):
+    """Pull stored summaries for videos not yet looked up this session into the session cache"""
+    language = st.session_state.get('language', "English")
+    # Looked up per language, so switching language loads that language's summaries
+    new_ids = [video_id for video_id in video_ids if (video_id, language) not in st.session_state.summaries_loaded]
+    if not new_ids:
+        return
+    
+    db = DatabaseManager()
+    stored = db.get_summaries_for_videos(
+        st.session_state.user['user_id'],
+        new_ids,
+        language,
+        # Fallback models too, since summaries written during a fallback are stored under them
+        sorted({model for route in MODEL_ROUTES.values() for model in (route['model'], route.get('fallback')) if model})
+    )
+    for (video_id, prompt_hash, model), summary in stored.items():
+        st.session_state.summaries.setdefault(f"summary_{video_id}_{prompt_hash}_{language}_{model}", summary)
+    st.session_state.summaries_loaded.update((video_id, language) for video_id in new_ids)
+
+def load_shared_results(query):
+    """Get a query's cached results as records shared by all sessions, or None"""
+    videos = get_shared_results(query)
+    if videos is None:
+        stored = DatabaseManager().get_shared_search_results(query, SEARCH_CACHE_MAX_AGE_HOURS)
+        videos = share_results(query, stored) if stored else None
+    return videos
+
+def refresh_statistics(videos, search_query):
+    """Keep views and likes current without re-rating: one API unit per 50 stale videos
+    
+    Failures only leave the older counts in place; they never stop the results from rendering.
+    """
+    try:
+        refresh_video_statistics(videos, search_query)
+    except Exception as e:
+        print(f"Error refreshing video statistics: {str(e)}")
+
 def init_session_state():
-    """Initialize session state with persistence"""
-    # Get existing state
-    existing_state = dict(st.session_state)
-    
-    # If authenticated, restore complete state from database
-    if existing_state.get('authenticated') and existing_state.get('user'):
-        db = DatabaseManager()
-        saved_state = db.get_search_state(existing_state['user']['user_id'])
-        if saved_state:
-            existing_state.update(saved_state)
-    
-    # Define defaults while preserving existing values
-    defaults = {
-        'initialized': True,
-        'authenticated': existing_state.get('authenticated', False),
-        'user': existing_state.get('user'),
-        'auth_data': existing_state.get('auth_data'),
-        'search_history': existing_state.get('search_history', []),
-        'current_videos': existing_state.get('current_videos'),
-        'last_search_results': existing_state.get('last_search_results'),
-        'last_search_query': existing_state.get('last_search_query', ''),
-        'summaries': existing_state.get('summaries', {}),
-        'shown_transcripts': existing_state.get('shown_transcripts', {}),
-        'active_tab': existing_state.get('active_tab', {}),
-        'language': existing_state.get('language', "English"),
-        'is_searching': False,
-        'search_count': existing_state.get('search_count', 0),
-        'reset_count': existing_state.get('reset_count', 0),
-        'search_query': existing_state.get('search_query', ''),
-        'current_sort': existing_state.get('current_sort', 'Relevance'),
-        'rating_filter': existing_state.get('rating_filter', ["S", "A", "B", "C", "D"]),
-        'enter_pressed': False,
-        'pattern_form_state': existing_state.get('pattern_form_state', {
-            'show_form': False,
-            'name': '',
-            'description': '',
-            'prompt': '',
-            'is_public': False
-        })
-    }
-    
-    # Update session state
-    st.session_state.update(defaults)
+    """Initialize session state with persistence
+    
+    Defaults are set once per browser session, and the saved search state is
+    restored from the database once per login rather than on every rerun.
+    """
+    if not st.session_state.get('initialized'):
+        # Define defaults while preserving existing values
+        existing_state = dict(st.session_state)
+        defaults = {
+            'initialized': True,
+            'authenticated': existing_state.get('authenticated', False),
+            'user': existing_state.get('user'),
+            'auth_data': existing_state.get('auth_data'),
+            'search_history': existing_state.get('search_history', []),
+            'current_videos': existing_state.get('current_videos'),
+            'last_search_query': existing_state.get('last_search_query', ''),
+            'summaries': existing_state.get('summaries', {}),
+            'summaries_loaded': existing_state.get('summaries_loaded', set()),
+            'shown_transcripts': existing_state.get('shown_transcripts', {}),
+            'active_tab': existing_state.get('active_tab', {}),
+            'playing_videos': existing_state.get('playing_videos', {}),
+            'result_page': existing_state.get('result_page', 0),
+            'language': existing_state.get('language', "English"),
+            'search_count': existing_state.get('search_count', 0),
+            'reset_count': existing_state.get('reset_count', 0),
+            'search_query': existing_state.get('search_query', ''),
+            'current_sort': existing_state.get('current_sort', 'Relevance'),
+            'rating_filter': existing_state.get('rating_filter', ["S", "A", "B", "C", "D"]),
+            'pattern_form_state': existing_state.get('pattern_form_state', {
+                'show_form': False,
+                'name': '',
+                'description': '',
+                'prompt': '',
+                'is_public': False
+            })
+        }
+        st.session_state.update(defaults)
+    
+    # Transient flags are reset on every run
+    st.session_state.is_searching = False
+    st.session_state.enter_pressed = False
+    
+    # If authenticated, restore saved state from database once per login
+    if st.session_state.get('authenticated') and st.session_state.get('user') \
+            and not st.session_state.get('state_restored'):
+        restore_session(st.session_state.user['user_id'])
+        st.session_state.state_restored = True
 
 def add_sidebar_features():
     # Get search state at the start
@@ -664,6 +863,49 @@ def add_sidebar_features():
         
         st.divider()
         
+        # LLM usage per route - admin only
+        if st.session_state.user['is_admin']:
+            with st.expander("📊 LLM Usage"):
+                route_stats = get_route_stats()
+                if route_stats:
+                    for route, stats in route_stats.items():
+                        st.markdown(
+                            f"**{route}**: {stats['calls']} calls, "
+                            f"{stats['mean_seconds']:.1f}s avg, "
+                            f"{stats['fallback_calls']} fallback, "
+                            f"{stats['cache_hit_rate']:.0%} cached, "
+                            f"${stats['cost_usd']:.4f}"
+                        )
+                else:
+                    st.write("No LLM calls yet")
+                
+                from dedup import get_dedup_stats  # numpy is only needed once videos are ranked
+                dedup_stats = get_dedup_stats()
+                if dedup_stats['checked']:
+                    st.markdown(
+                        f"**Near-duplicates**: {dedup_stats['duplicates']} of "
+                        f"{dedup_stats['checked']} videos reused another copy's rating"
+                    )
+                
+                prefetch_stats = get_prefetch_stats()
+                if prefetch_stats['queued']:
+                    st.markdown(
+                        f"**Summary prefetch**: {prefetch_stats['generated']} generated, "
+                        f"{prefetch_stats['used']} viewed ({prefetch_stats['hit_rate']:.0%} hit rate), "
+                        f"{prefetch_stats['joined']} joined while generating, "
+                        f"{prefetch_stats['over_budget']} over budget"
+                    )
+                
+                parse_stats = get_parse_stats()
+                if parse_stats['completions']:
+                    st.markdown(
+                        f"**Rating parse failures**: {parse_stats['parse_failures']} of "
+                        f"{parse_stats['completions']} ({parse_stats['failure_rate']:.1%}), "
+                        f"{parse_stats['repairs'] - parse_stats['repair_failures']} repaired"
+                    )
+            
+            st.divider()
+        
         # Patterns section
         st.markdown("## Patterns")
         
@@ -691,6 +933,7 @@ def add_sidebar_features():
                                 prompt_template=pattern_prompt,
                                 is_public=is_public
                             )
+                            load_user_patterns.clear()
                             st.success(f"Pattern '{pattern_name}' added successfully!")
                             st.session_state.show_pattern_form = False
                         except Exception as e:
@@ -711,8 +954,7 @@ def add_sidebar_features():
         
         # User Patterns section - disabled during search
         st.markdown("#### Your Patterns:")
-        db = DatabaseManager()
-        patterns = db.get_user_patterns(st.session_state.user['user_id'])
+        patterns = load_user_patterns(st.session_state.user['user_id'])
         
         if patterns:
             selected_pattern = st.selectbox(
@@ -728,30 +970,14 @@ def add_sidebar_features():
                 if st.button("🗑 Delete Pattern", 
                             key=f"delete_{pattern[0]}", 
                             disabled=is_searching):
+                    db = DatabaseManager()
                     db.delete_pattern(pattern[0])
+                    load_user_patterns.clear()
                     st.success("Pattern deleted!")
 
-def generate_summary_with_style(transcript: str, prompt_template: str) -> str:
-    """Generate summary using provided prompt template."""
-    client = OpenAI(api_key=OPENAI_API_KEY)
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4",  # Using GPT-4 for styled summaries
-            messages=[
-                {"role": "system", "content": prompt_template},
-                {"role": "user", "content": transcript}
-            ],
-            temperature=0.7
-        )
-        summary = response.choices[0].message.content
-        return summary
-    except Exception as e:
-        print(f"Error generating summary: {e}")
-        current_lang = st.session_state.get('language', 'en')
-        error_msg = "Error generating summary. Please try again later."
-        return error_msg
-
 def show_patterns_section():
+    import pandas as pd  # Only needed for CSV export
+    
     st.subheader("Patterns")
     
     db = DatabaseManager()
@@ -781,6 +1007,7 @@ def show_patterns_section():
                             prompt_template=pattern_prompt,
                             is_public=is_public
                         )
+                        load_user_patterns.clear()
                         st.session_state.show_pattern_form = False
                         st.rerun()
                     except Exception as e:
@@ -849,6 +1076,7 @@ def show_patterns_section():
             if pattern[1] == user_id or is_admin:  # user_id or admin
                 if st.button("🗑️ Delete", key=f"delete_{pattern[0]}"):
                     db.delete_pattern(pattern[0])
+                    load_user_patterns.clear()
                     st.rerun()
 
 def get_user_avatar(username: str) -> str:
@@ -880,6 +1108,7 @@ def main():
     
     # User is authenticated, show main app
     setup_page_config()
+    sync_session_cookie()
     add_sidebar_features()  # This will now see the updated is_searching state
     
     # Get database instance
@@ -897,37 +1126,66 @@ def main():
             st.warning("⚠️ Please do not refresh the page while search is in progress.", icon="⚠️")
             status = st.status("🔍 Searching videos...", expanded=True)
             
-            # Perform search
-            videos = search_videos(
-                st.session_state.new_search_query,
-                progress_callback=lambda msg: status.update(
-                    label=f"🔍 {msg}" if msg else "Processing...",
-                    expanded=True
+            # Stop prefetching summaries for the previous search
+            cancel_prefetch(user_id)
+            
+            # Reuse fresh results for this query (from any user or the cache warmer),
+            # held once in memory for all sessions of this process
+            videos = load_shared_results(st.session_state.new_search_query)
+            from_cache = bool(videos)
+            if from_cache:
+                status.update(label="🔍 Loaded cached results", expanded=True)
+            else:
+                # Fetch metadata first so placeholder cards can be shown immediately
+                candidates = fetch_search_candidates(
+                    st.session_state.new_search_query,
+                    progress_callback=lambda msg: status.update(
+                        label=f"🔍 {msg}" if msg else "Processing...",
+                        expanded=True
+                    )
                 )
-            )
+                
+                # Stream rated videos into the page as each one finishes
+                results_placeholder = st.empty()
+                display_result_previews(results_placeholder, [], candidates)
+                status.update(label="🔍 Ranking videos...", expanded=True)
+                
+                def show_progress(ranked_videos, pending_videos):
+                    status.update(
+                        label=f"🔍 Rated {len(candidates) - len(pending_videos)} of {len(candidates)} videos...",
+                        expanded=True
+                    )
+                    display_result_previews(results_placeholder, ranked_videos, pending_videos)
+                
+                videos = rank_videos(candidates, on_progress=show_progress)
+            
+            # Speculatively summarize the top results in the background
+            start_prefetch(user_id, videos, st.session_state.get('language', "English"))
             
             if videos:
-                # Save complete state to database
-                db.save_search_state(user_id, {
-                    'query': st.session_state.new_search_query,
-                    'results': videos,
-                    'last_search_query': st.session_state.new_search_query,
-                    'current_sort': st.session_state.current_sort,
-                    'rating_filter': st.session_state.rating_filter,
-                    'search_history': st.session_state.search_history
-                })
+                # Every search counts towards the query's popularity, cached or not
+                db.record_search_hit(user_id, st.session_state.new_search_query)
+                
+                # Save fresh results once; cached ones are left with their original timestamp
+                # so they still expire. Session fields are persisted as deltas below
+                if not from_cache:
+                    db.save_search_results(user_id, st.session_state.new_search_query, videos)
+                    videos = share_results(st.session_state.new_search_query, videos)
                 
                 # Update session state
                 st.session_state.update({
                     'current_videos': videos,
                     'last_search_query': st.session_state.new_search_query,
-                    'last_search_results': videos,
                     'start_new_search': False,
-                    'new_search_query': None
+                    'new_search_query': None,
+                    'result_page': 0,
+                    'playing_videos': {}
                 })
                 
-                if st.session_state.new_search_query not in st.session_state.search_history:
-                    st.session_state.search_history.append(st.session_state.new_search_query)
+                if st.session_state.last_search_query not in st.session_state.search_history:
+                    st.session_state.search_history.append(st.session_state.last_search_query)
+                
+                persist_session(user_id)
                 
                 status.update(label="✅ Search completed!", state="complete")
                 st.session_state.is_searching = False  # Reset after success
@@ -944,17 +1202,29 @@ def main():
             st.session_state.is_searching = False
             st.session_state.start_new_search = False
     
+    # Write any changed session fields (sort, filter, history)
+    persist_session(user_id)
+    
     # Always try to show results
     if st.session_state.get('current_videos'):
+        refresh_statistics(st.session_state.current_videos, st.session_state.last_search_query)
         display_video_grid(st.session_state.current_videos, rating_filter)
     # If no current results but we have a last query, try to restore from database
     elif st.session_state.get('last_search_query'):
-        saved_results = db.get_search_results(user_id, st.session_state.last_search_query)
+        saved_results = load_shared_results(st.session_state.last_search_query)
+        if not saved_results:
+            saved_results = compact_videos(db.get_search_results(user_id, st.session_state.last_search_query) or [])
         if saved_results:
             st.session_state.current_videos = saved_results
+            refresh_statistics(saved_results, st.session_state.last_search_query)
             display_video_grid(saved_results, rating_filter)
 
+@st.cache_resource(show_spinner=False)
+def setup_database():
+    """Initialize the database once per server process instead of on every rerun"""
+    init_db()
+
 if __name__ == "__main__":
     # Initialize the database when the app starts
-    init_db()
+    setup_database()
     main() 
\ No newline at end of file
@@ -0,0 +1,323 @@
+"""asyncio-native versions of the search, rating and summary pipeline in utils.py.
+
+YouTube Data API calls go through an async HTTP client, transcripts are fetched
+in a bounded thread pool (the transcript library only has a blocking API) and
+ratings and summaries use AsyncOpenAI through the LLM gateway. Many searches
+can then run concurrently on one event loop:
+
+    results = await asyncio.gather(*(search_videos(q) for q in queries))
+
+Synchronous code (Streamlit, CLIs) can use the ``*_sync`` wrappers, which run
+the coroutines on one shared background event loop.
+"""
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+import config
+from config import ASYNC_TRANSCRIPT_WORKERS, ASYNC_RATING_CONCURRENCY, YOUTUBE_HTTP_TIMEOUT_SECONDS
+from database import DatabaseManager
+from llm_gateway import async_chat_completion, async_chat_completion_stream
+from prompts import build_summary_messages
+import utils
+from utils import (
+    format_rating, rating_steps, rating_error, apply_rating, copy_duplicate_rating, get_summary_key,
+    ranking_key, _video_from_item, RATING_CALL_OPTIONS, VIDEOS_LIST_MAX_IDS, SUMMARY_ERROR_MESSAGE
+)
+
+YOUTUBE_API_URL = 'https://www.googleapis.com/youtube/v3'
+
+# SQLite calls run in worker threads with asyncio.to_thread: a busy database
+# (e.g. another process holding the write lock) must not stall the event loop
+
+_transcript_executor = ThreadPoolExecutor(max_workers=ASYNC_TRANSCRIPT_WORKERS,
+                                          thread_name_prefix='transcript')
+# HTTP clients are bound to the event loop they were created on
+_http_clients = weakref.WeakKeyDictionary()
+
+_loop_lock = threading.Lock()
+_background_loop = None
+
+def get_http_client():
+    """Get the YouTube HTTP client for the running event loop"""
+    import httpx
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(base_url=YOUTUBE_API_URL, timeout=YOUTUBE_HTTP_TIMEOUT_SECONDS)
+        _http_clients[loop] = client
+    return client
+
+async def youtube_get(resource: str, **params) -> dict:
+    """Call a YouTube Data API list endpoint and return the decoded response"""
+    response = await get_http_client().get(f'/{resource}', params={**params, 'key': config.YOUTUBE_API_KEY})
+    response.raise_for_status()
+    return response.json()
+
+async def get_videos_metadata(video_ids):
+    """Fetch metadata for many videos, one concurrent videos.list call per 50 IDs
+    
+    Returns videos in the order of video_ids, skipping IDs YouTube didn't return.
+    """
+    async def fetch_chunk(chunk):
+        try:
+            response = await youtube_get('videos', part='snippet,statistics', id=','.join(chunk),
+                                         maxResults=len(chunk))
+            return response.get('items', [])
+        except Exception as e:
+            print(f"Error fetching video metadata: {str(e)}")
+            return []
+    
+    chunks = [video_ids[start:start + VIDEOS_LIST_MAX_IDS] for start in range(0, len(video_ids), VIDEOS_LIST_MAX_IDS)]
+    videos_by_id = {}
+    for items in await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks)):
+        for item in items:
+            videos_by_id[item['id']] = _video_from_item(item)
+    return [videos_by_id[video_id] for video_id in video_ids if video_id in videos_by_id]
+
+async def fetch_search_candidates(query, max_results=6):
+    """Search YouTube and return metadata-only videos, before any rating"""
+    try:
+        search_response = await youtube_get('search', q=query, part='id,snippet', type='video',
+                                            maxResults=max_results, relevanceLanguage='en')
+        video_ids = [
+            item['id']['videoId'] for item in search_response.get('items', [])
+            if item['id'].get('kind') == 'youtube#video'
+        ]
+        videos = await get_videos_metadata(video_ids)
+        for video_data in videos:
+            # Rate against the query that found the video
+            video_data['search_query'] = query
+        return videos
+    except Exception as e:
+        print(f"Error in fetch_search_candidates: {str(e)}")
+        raise e
+
+async def get_video_transcript(video_id):
+    """Fetch a transcript in the bounded transcript pool, or None if there is none"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_transcript_executor, utils.get_video_transcript, video_id)
+
+async def get_transcript_signature(video_id):
+    """Get a video's MinHash signature from the cache or its transcript
+    
+    Runs utils.get_transcript_signature in the transcript pool, since a cache
+    miss fetches the transcript. Returns (signature, transcript); the transcript
+    is None when the signature was cached, and both are None when there is no
+    transcript.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_transcript_executor, utils.get_transcript_signature, video_id)
+
+async def get_content_rating(transcript: str, query: str) -> dict:
+    """Rate content with AsyncOpenAI, following the same rating_steps as utils"""
+    try:
+        steps = rating_steps(transcript, query)
+        messages = next(steps)
+        while True:
+            response = await async_chat_completion('rating', messages=messages, **RATING_CALL_OPTIONS)
+            messages = steps.send(response)
+    except StopIteration as finished:
+        return finished.value
+    except Exception as e:
+        print(f"Error in content rating: {e}")
+        return rating_error(e)
+
+async def rank_videos(videos, concurrency: int = ASYNC_RATING_CONCURRENCY):
+    """Rate videos concurrently and return them in tier order
+    
+    Transcripts and signatures are fetched for all videos at once. Near-duplicates
+    are then assigned in input order, like utils.rank_videos, so each group of
+    copies costs one rating call.
+    """
+    from dedup import DuplicateIndex, signature_from_bytes
+    db = DatabaseManager()
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def prepare(video):
+        """Return (stored rating, signature, transcript) for a video"""
+        stored = await asyncio.to_thread(db.get_rating, video['id'], video.get('search_query', ''))
+        if stored:
+            cached = await asyncio.to_thread(db.get_video_signature, video['id'])
+            return stored, signature_from_bytes(cached) if cached is not None else None, None
+        signature, transcript = await get_transcript_signature(video['id'])
+        return None, signature, transcript
+    
+    async def rate(video, transcript):
+        """Rate and store one video; None if it has no transcript, else whether rating succeeded"""
+        transcript = transcript or await get_video_transcript(video['id'])
+        if not transcript:
+            return None
+        async with semaphore:
+            rating = await get_content_rating(transcript, video.get('search_query', ''))
+        apply_rating(video, rating)
+        if rating.get('detailed_analysis') is None:
+            return False
+        await asyncio.to_thread(
+            db.save_rating, video['id'], video.get('search_query', ''), rating.get('model'),
+            rating['rating'], rating['score'], rating['detailed_analysis']
+        )
+        return True
+    
+    try:
+        prepared = await asyncio.gather(*(prepare(video) for video in videos))
+        
+        duplicate_index = DuplicateIndex()
+        included_ids = set()  # videos that end up in the ranking
+        reusable_ids = set()  # videos whose rating near-duplicates may copy
+        to_rate = []
+        duplicates = []
+        for video, (stored, signature, transcript) in zip(videos, prepared):
+            if stored:
+                apply_rating(video, format_rating(stored))
+                included_ids.add(video['id'])
+                reusable_ids.add(video['id'])
+                if signature is not None:
+                    duplicate_index.add(video, signature)
+                continue
+            if signature is None:
+                continue
+            original = duplicate_index.find(signature)
+            if original is not None:
+                duplicates.append((video, original, transcript))
+            else:
+                duplicate_index.add(video, signature)
+                to_rate.append((video, transcript))
+        
+        results = await asyncio.gather(*(rate(video, transcript) for video, transcript in to_rate))
+        for (video, _), rated in zip(to_rate, results):
+            if rated is not None:
+                included_ids.add(video['id'])
+            if rated:
+                reusable_ids.add(video['id'])
+        
+        # Failed ratings (e.g. an API error) aren't reused; their copies are rated on their own
+        retry = []
+        for video, original, transcript in duplicates:
+            if original['id'] in reusable_ids:
+                copy_duplicate_rating(video, original)
+                included_ids.add(video['id'])
+            else:
+                retry.append((video, transcript))
+        retry_results = await asyncio.gather(*(rate(video, transcript) for video, transcript in retry))
+        for (video, _), rated in zip(retry, retry_results):
+            if rated is not None:
+                included_ids.add(video['id'])
+        
+        # Stable sort: ties keep arrival order, as in utils.rank_videos
+        return sorted((video for video in videos if video['id'] in included_ids), key=ranking_key)
+    except Exception as e:
+        print(f"Error in rank_videos: {e}")
+        raise e
+
+async def search_videos(query):
+    """Search YouTube videos and return them rated and ranked"""
+    try:
+        return await rank_videos(await fetch_search_candidates(query))
+    except Exception as e:
+        print(f"Error in search_videos: {str(e)}")
+        raise e
+
+async def generate_summary_with_style(transcript: str, prompt_template: str, route: str = 'summary',
+                                      model: str = None) -> str:
+    try:
+        response = await async_chat_completion(
+            route,
+            messages=build_summary_messages(transcript, prompt_template),
+            model=model
+        )
+        return response.choices[0].message.content
+    except Exception as e:
+        print(f"Error generating summary: {e}")
+        return SUMMARY_ERROR_MESSAGE
+
+async def get_or_generate_summary(video_id: str, prompt_template: str, route: str, language: str,
+                                  user_id: int = None, is_public: bool = True, model: str = None) -> tuple:
+    """Get a summary from the summaries store, generating and storing it on a miss
+    
+    Like utils.get_or_generate_summary, the summary is stored under the model that wrote it.
+    Returns (summary, from_store); summary is None when generation failed.
+    """
+    prompt_hash, model = get_summary_key(prompt_template, route, model)
+    
+    db = DatabaseManager()
+    summary = await asyncio.to_thread(db.get_summary, user_id, video_id, prompt_hash, language, model)
+    if summary is not None:
+        return summary, True
+    
+    transcript = await get_video_transcript(video_id)
+    if not transcript:
+        return None, False
+    
+    summary = await generate_summary_with_style(transcript, prompt_template, route=route, model=model)
+    if summary == SUMMARY_ERROR_MESSAGE:
+        return None, False
+    
+    await asyncio.to_thread(
+        db.save_summary, user_id, video_id, prompt_hash, language, model, summary, is_public=is_public
+    )
+    return summary, False
+
+async def stream_summary(video_id: str, prompt_template: str, route: str, language: str,
+                         user_id: int = None, is_public: bool = True):
+    """Yield a summary in pieces as the model writes it, storing it once complete
+    
+    A stored summary is yielded in one piece. Raises LookupError when the video
+    has no transcript.
+    """
+    prompt_hash, model = get_summary_key(prompt_template, route)
+    
+    db = DatabaseManager()
+    summary = await asyncio.to_thread(db.get_summary, user_id, video_id, prompt_hash, language, model)
+    if summary is not None:
+        yield summary
+        return
+    
+    transcript = await get_video_transcript(video_id)
+    if not transcript:
+        raise LookupError(f"No transcript available for {video_id}")
+    
+    parts = []
+    messages = build_summary_messages(transcript, prompt_template)
+    async for delta in async_chat_completion_stream(route, messages=messages, model=model):
+        parts.append(delta)
+        yield delta
+    summary = ''.join(parts)
+    # An empty stream is not a summary; storing it would serve an empty summary from then on
+    if summary:
+        await asyncio.to_thread(
+            db.save_summary, user_id, video_id, prompt_hash, language, model, summary, is_public=is_public
+        )
+
+def get_background_loop():
+    """Get the event loop the sync wrappers run on, starting its thread on first use"""
+    global _background_loop
+    with _loop_lock:
+        if _background_loop is None:
+            _background_loop = asyncio.new_event_loop()
+            threading.Thread(target=_background_loop.run_forever, name='async-utils-loop', daemon=True).start()
+    return _background_loop
+
+def run_sync(coro):
+    """Run a coroutine on the shared background loop and wait for its result
+    
+    One long-lived loop keeps the HTTP and AsyncOpenAI connection pools warm
+    across calls, unlike asyncio.run, which would start from scratch each time.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_background_loop()).result()
+
+def search_videos_sync(query):
+    return run_sync(search_videos(query))
+
+def search_many_sync(queries):
+    """Search several queries concurrently; failed queries map to their exception"""
+    async def search_all():
+        return await asyncio.gather(*(search_videos(query) for query in queries), return_exceptions=True)
+    return dict(zip(queries, run_sync(search_all())))
+
+def rank_videos_sync(videos, concurrency: int = ASYNC_RATING_CONCURRENCY):
+    return run_sync(rank_videos(videos, concurrency))
+
+def get_or_generate_summary_sync(video_id: str, prompt_template: str, route: str, language: str,
+                                 user_id: int = None, is_public: bool = True) -> tuple:
+    return run_sync(get_or_generate_summary(video_id, prompt_template, route, language, user_id, is_public))
@@ -1,24 +1,67 @@
 import streamlit as st
-from werkzeug.security import check_password_hash
+import streamlit.components.v1 as components
 from database import DatabaseManager
-import json
-import base64
+from config import SESSION_TTL_HOURS, SESSION_COOKIE_NAME, SESSION_QUERY_PARAM
+import hashlib
+import secrets
 
-def encode_auth_data(data):
-    """Encode auth data to base64 string"""
-    return base64.b64encode(json.dumps(data).encode()).decode()
+def hash_session_token(token):
+    """Hash a session token for storage; tokens are random, so a fast hash is enough"""
+    return hashlib.sha256(token.encode()).hexdigest()
 
-def decode_auth_data(encoded_data):
-    """Decode auth data from base64 string"""
-    try:
-        return json.loads(base64.b64decode(encoded_data).decode())
-    except:
-        return None
+def start_auth_session(user):
+    """Issue a session token for a freshly logged-in user and queue it for the browser"""
+    token = secrets.token_urlsafe(32)
+    if DatabaseManager().create_auth_session(hash_session_token(token), user['user_id'], SESSION_TTL_HOURS):
+        st.session_state.session_token = token
+        # The cookie is written on the next run, after the login rerun
+        st.session_state.pending_session_cookie = token
+
+def _write_session_cookie(token, max_age_seconds):
+    """Set (or with max_age 0, clear) the session cookie on the app's page"""
+    components.html(f"""
+        <script>
+            const secure = window.parent.location.protocol === 'https:' ? '; Secure' : '';
+            window.parent.document.cookie =
+                '{SESSION_COOKIE_NAME}={token}; max-age={max_age_seconds}; path=/; SameSite=Strict' + secure;
+        </script>
+    """, height=0)
+
+def sync_session_cookie():
+    """Write a queued session cookie and drop the token from the URL once it is stored"""
+    token = st.session_state.pop('pending_session_cookie', None)
+    if token:
+        _write_session_cookie(token, SESSION_TTL_HOURS * 3600)
+        if SESSION_QUERY_PARAM in st.query_params:
+            del st.query_params[SESSION_QUERY_PARAM]
+
+def restore_auth_session():
+    """Log in from a session cookie or query parameter without re-checking the password"""
+    token = st.query_params.get(SESSION_QUERY_PARAM) or st.context.cookies.get(SESSION_COOKIE_NAME)
+    # Remember a rejected token so a stale cookie costs one lookup, not one per rerun
+    if not token or token == st.session_state.get('rejected_session_token'):
+        return False
+    
+    user = DatabaseManager().get_auth_session_user(hash_session_token(token))
+    if not user:
+        st.session_state.rejected_session_token = token
+        return False
+    
+    st.session_state.authenticated = True
+    st.session_state.user = user
+    st.session_state.session_token = token
+    if SESSION_QUERY_PARAM in st.query_params:
+        # Move a token passed in the URL into the cookie
+        st.session_state.pending_session_cookie = token
+    return True
 
 def show_login_page():
     """Display the login page"""
     st.title("Login")
     
+    if st.session_state.pop('clear_session_cookie', False):
+        _write_session_cookie('', 0)
+    
     with st.form("login_form"):
         username = st.text_input("Username")
         password = st.text_input("Password", type="password")
@@ -31,6 +74,7 @@ def show_login_page():
                 if user:
                     st.session_state.authenticated = True
                     st.session_state.user = user
+                    start_auth_session(user)
                     st.rerun()
                 else:
                     st.error("Invalid username or password")
@@ -69,23 +113,18 @@ def show_signup_page():
                 st.rerun()
 
 def check_auth():
-    """Check if user is authenticated"""
-    return st.session_state.get('authenticated', False)
+    """Check if user is authenticated, restoring a saved session if there is one"""
+    return st.session_state.get('authenticated', False) or restore_auth_session()
 
 def logout():
-    """Log out the user"""
-    for key in ['authenticated', 'user', 'show_signup']:
+    """Log out the user and revoke their session token"""
+    token = st.session_state.get('session_token')
+    if token:
+        DatabaseManager().delete_auth_session(hash_session_token(token))
+        st.session_state.rejected_session_token = token
+        st.session_state.clear_session_cookie = True
+    if SESSION_QUERY_PARAM in st.query_params:
+        del st.query_params[SESSION_QUERY_PARAM]
+    for key in ['authenticated', 'user', 'show_signup', 'state_restored', 'session_token', 'pending_session_cookie']:
         if key in st.session_state:
             del st.session_state[key]
-
-def store_auth_cookie():
-    """Store authentication data in browser localStorage"""
-    st.markdown("""
-        <script>
-            const auth = {
-                'username': '%s',
-                'password': '%s'
-            };
-            localStorage.setItem('auth_data', JSON.stringify(auth));
-        </script>
-    """ % (st.session_state.username, st.session_state.password), unsafe_allow_html=True) 
\ No newline at end of file
@@ -0,0 +1,305 @@
+"""Offline bulk rating through the OpenAI Batch API.
+
+Turns (video, query) pairs into Batch API JSONL jobs, submits them, polls for
+completion and ingests the results into the video_ratings store, where
+rate_video picks them up instead of calling the API interactively.
+
+    python batch_rating.py submit --input pairs.jsonl
+    python batch_rating.py submit --from-cache
+    python batch_rating.py poll --wait
+"""
+import argparse
+import hashlib
+import io
+import json
+import sys
+import time
+import uuid
+from config import MODEL_ROUTES
+from database import DatabaseManager
+from llm_gateway import get_client, chat_completion
+from rating_schema import parse_rating, record_parse_result, RatingParseError
+from prompts import build_rating_messages
+from utils import get_video_transcript
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+# Batch API limits per input file: request count and file size
+BATCH_MAX_REQUESTS = 50000
+BATCH_MAX_BYTES = 200 * 1024 * 1024
+# Batch statuses after which nothing more will happen to a batch
+FINAL_STATUSES = ('completed', 'failed', 'expired', 'cancelled')
+# IDs of batches run by LocalBatchBackend; every other ID belongs to the Batch endpoint
+LOCAL_BATCH_PREFIX = "local-batch-"
+
+class OpenAIBatchBackend:
+    """Submits and polls jobs on the OpenAI Batch endpoint"""
+    
+    def submit(self, jsonl_text: str) -> str:
+        client = get_client()
+        input_file = client.files.create(
+            file=("ratings.jsonl", io.BytesIO(jsonl_text.encode())),
+            purpose="batch"
+        )
+        batch = client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h"
+        )
+        return batch.id
+    
+    def handles(self, batch_id: str) -> bool:
+        """Whether a stored batch was submitted through this backend"""
+        return not batch_id.startswith(LOCAL_BATCH_PREFIX)
+    
+    def poll(self, batch_id: str) -> tuple:
+        """Return (status, output JSONL text or None)"""
+        client = get_client()
+        batch = client.batches.retrieve(batch_id)
+        if batch.status == 'completed' and batch.output_file_id:
+            return batch.status, client.files.content(batch.output_file_id).text
+        return batch.status, None
+
+class LocalBatchBackend:
+    """In-process stand-in for the Batch endpoint, for tests and offline runs
+    
+    Each request body is passed to ``responder(body) -> str`` and the reply is
+    wrapped in the Batch API output format. Without a responder, requests are
+    sent one by one through the regular chat completion path.
+    """
+    
+    def __init__(self, responder=None):
+        self.responder = responder or self._chat_responder
+        self.outputs = {}
+    
+    @staticmethod
+    def _chat_responder(body: dict) -> str:
+        body = dict(body)
+        messages = body.pop('messages')
+        response = chat_completion('rating', messages, **body)
+        return response.choices[0].message.content
+    
+    def submit(self, jsonl_text: str) -> str:
+        # Unique across runs, so a new process never answers for an old batch's row
+        batch_id = f"{LOCAL_BATCH_PREFIX}{uuid.uuid4().hex[:12]}"
+        output_lines = []
+        for line in jsonl_text.splitlines():
+            request = json.loads(line)
+            output_lines.append(json.dumps({
+                'id': f"{batch_id}-{request['custom_id']}",
+                'custom_id': request['custom_id'],
+                'response': {
+                    'status_code': 200,
+                    'body': {
+                        'model': request['body']['model'],
+                        'choices': [{
+                            'index': 0,
+                            'message': {'role': 'assistant', 'content': self.responder(request['body'])}
+                        }]
+                    }
+                },
+                'error': None
+            }))
+        self.outputs[batch_id] = '\n'.join(output_lines)
+        return batch_id
+    
+    def handles(self, batch_id: str) -> bool:
+        return batch_id.startswith(LOCAL_BATCH_PREFIX)
+    
+    def poll(self, batch_id: str) -> tuple:
+        # Outputs only live in this process; batches left over from an earlier run are gone
+        if batch_id not in self.outputs:
+            return 'expired', None
+        return 'completed', self.outputs[batch_id]
+
+def make_custom_id(video_id: str, search_query: str) -> str:
+    """Stable custom_id for a (video, query) pair"""
+    return f"{video_id}-{hashlib.sha1(search_query.encode()).hexdigest()[:12]}"
+
+def build_batch_requests(items: list, max_requests: int = BATCH_MAX_REQUESTS,
+                         max_bytes: int = BATCH_MAX_BYTES) -> list:
+    """Build Batch API JSONL for items with video_id, search_query and transcript
+    
+    Requests are split into chunks that stay within both the request count and
+    the input file size limit, since full transcripts reach the size limit long
+    before the count. Returns a list of (jsonl_text, manifest) chunks, where each
+    manifest maps a custom_id back to its [video_id, search_query].
+    """
+    model = MODEL_ROUTES['rating']['model']
+    chunks = []
+    lines, manifest, size = [], {}, 0
+    seen = set()
+    for item in items:
+        custom_id = make_custom_id(item['video_id'], item['search_query'])
+        if custom_id in seen:
+            continue
+        seen.add(custom_id)
+        line = json.dumps({
+            'custom_id': custom_id,
+            'method': 'POST',
+            'url': BATCH_ENDPOINT,
+            'body': {
+                'model': model,
+                'messages': build_rating_messages(item['transcript'], item['search_query']),
+                'temperature': 0,
+                'response_format': {'type': 'json_object'}
+            }
+        })
+        # Lines are joined with newlines, so each one adds its encoded size plus one byte
+        line_size = len(line.encode('utf-8')) + 1
+        if line_size > max_bytes:
+            print(f"Skipping {item['video_id']}: request is larger than a batch input file may be")
+            continue
+        if lines and (len(lines) >= max_requests or size + line_size > max_bytes):
+            chunks.append(('\n'.join(lines), manifest))
+            lines, manifest, size = [], {}, 0
+        lines.append(line)
+        manifest[custom_id] = [item['video_id'], item['search_query']]
+        size += line_size
+    if lines:
+        chunks.append(('\n'.join(lines), manifest))
+    return chunks
+
+def submit_rating_batches(items: list, backend) -> list:
+    """Submit items in chunks that fit the Batch API limits; returns the batch IDs"""
+    db = DatabaseManager()
+    batch_ids = []
+    for jsonl_text, manifest in build_batch_requests(items):
+        batch_id = backend.submit(jsonl_text)
+        db.save_rating_batch(batch_id, manifest, 'submitted')
+        batch_ids.append(batch_id)
+        print(f"Submitted batch {batch_id} with {len(manifest)} ratings")
+    return batch_ids
+
+def ingest_batch_output(output_text: str, manifest: dict) -> dict:
+    """Validate each rating in a batch output file and store it"""
+    db = DatabaseManager()
+    counts = {'stored': 0, 'failed': 0}
+    for line in output_text.splitlines():
+        if not line.strip():
+            continue
+        try:
+            result = json.loads(line)
+        except json.JSONDecodeError:
+            print(f"Skipping undecodable batch output line: {line[:80]}")
+            counts['failed'] += 1
+            continue
+        pair = manifest.get(result.get('custom_id'))
+        response = result.get('response') or {}
+        if not pair or result.get('error') or response.get('status_code') != 200:
+            counts['failed'] += 1
+            continue
+        
+        body = response['body']
+        try:
+            content = parse_rating(body['choices'][0]['message']['content'])
+            record_parse_result()
+        except RatingParseError as e:
+            # Left unrated; the interactive path will rate it with a repair attempt
+            print(f"Skipping invalid rating for {pair[0]}: {e}")
+            record_parse_result(parse_failed=True)
+            counts['failed'] += 1
+            continue
+        
+        video_id, search_query = pair
+        db.save_rating(
+            video_id, search_query, body.get('model'),
+            content['rating'], content['score'], content['explanation']
+        )
+        counts['stored'] += 1
+    return counts
+
+def poll_rating_batches(backend, wait: bool = False, poll_seconds: int = 60, batch_ids: list = None) -> dict:
+    """Check pending batches and ingest the completed ones; returns total counts
+    
+    Only batches submitted through ``backend`` are polled, so the local stand-in
+    never touches Batch endpoint jobs and the other way round. ``batch_ids``
+    limits polling further to those batches.
+    """
+    db = DatabaseManager()
+    totals = {'stored': 0, 'failed': 0}
+    
+    def get_pending():
+        return [
+            (batch_id, manifest) for batch_id, manifest in db.get_pending_rating_batches()
+            if backend.handles(batch_id) and (batch_ids is None or batch_id in batch_ids)
+        ]
+    
+    while True:
+        for batch_id, manifest in get_pending():
+            try:
+                status, output_text = backend.poll(batch_id)
+            except Exception as e:
+                # Left pending for the next poll; one failing batch doesn't stop the rest
+                print(f"Error polling batch {batch_id}: {str(e)}")
+                continue
+            if status == 'completed':
+                counts = ingest_batch_output(output_text or '', manifest)
+                db.update_rating_batch_status(batch_id, 'ingested')
+                print(f"Ingested batch {batch_id}: {counts['stored']} stored, {counts['failed']} failed")
+                for key in totals:
+                    totals[key] += counts[key]
+            elif status in FINAL_STATUSES:
+                db.update_rating_batch_status(batch_id, status)
+                print(f"Batch {batch_id} ended with status {status}")
+            else:
+                db.update_rating_batch_status(batch_id, status)
+        
+        if not wait or not get_pending():
+            return totals
+        time.sleep(poll_seconds)
+
+def collect_items(pairs: list, force: bool = False) -> list:
+    """Attach transcripts to (video_id, search_query) pairs, skipping already-rated ones"""
+    db = DatabaseManager()
+    items = []
+    for video_id, search_query, transcript in pairs:
+        if not force and db.get_rating(video_id, search_query):
+            continue
+        transcript = transcript or get_video_transcript(video_id)
+        if not transcript:
+            print(f"No transcript for {video_id}, skipping")
+            continue
+        items.append({'video_id': video_id, 'search_query': search_query, 'transcript': transcript})
+    return items
+
+def read_pairs(path: str) -> list:
+    """Read JSONL lines with video_id, query and optional transcript"""
+    with (sys.stdin if path == '-' else open(path)) as f:
+        rows = [json.loads(line) for line in f if line.strip()]
+    return [(row['video_id'], row.get('query', ''), row.get('transcript')) for row in rows]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-rate videos through the OpenAI Batch API")
+    parser.add_argument('--local', action='store_true',
+                        help="Use the in-process stand-in instead of the Batch endpoint")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    submit_parser = subparsers.add_parser('submit', help="Build and submit rating batches")
+    source = submit_parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--input', help="JSONL file of {video_id, query, transcript?} ('-' for stdin)")
+    source.add_argument('--from-cache', action='store_true', help="Re-rate every video in cached search results")
+    submit_parser.add_argument('--force', action='store_true', help="Re-rate pairs that already have a rating")
+    
+    poll_parser = subparsers.add_parser('poll', help="Poll pending batches and ingest finished ones")
+    poll_parser.add_argument('--wait', action='store_true', help="Keep polling until no batch is pending")
+    poll_parser.add_argument('--interval', type=int, default=60, help="Seconds between polls")
+    
+    args = parser.parse_args(argv)
+    backend = LocalBatchBackend() if args.local else OpenAIBatchBackend()
+    
+    if args.command == 'submit':
+        if args.from_cache:
+            pairs = [(video_id, query, None) for video_id, query in DatabaseManager().get_cached_video_queries()]
+        else:
+            pairs = read_pairs(args.input)
+        items = collect_items(pairs, force=args.force)
+        batch_ids = submit_rating_batches(items, backend)
+        # The local stand-in completes immediately, so ingest in the same run
+        if args.local:
+            poll_rating_batches(backend, batch_ids=batch_ids)
+    else:
+        totals = poll_rating_batches(backend, wait=args.wait, poll_seconds=args.interval)
+        print(f"Stored {totals['stored']} ratings, {totals['failed']} failed")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Throughput benchmark for api_server.py against the offline fake backends.
+
+Drives the ASGI app in-process (no sockets) with a mix of search, transcript,
+summary and streamed summary requests from concurrent clients, replaying some
+searches with If-None-Match, and reports requests per second, status counts and
+latency percentiles per endpoint.
+
+    python benchmarks/api_throughput.py --requests 400 --clients 32 --llm-latency 1.5
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import fake_backends
+
+def percentile(values: list, pct: float) -> float:
+    if len(values) < 2:
+        return values[0] if values else 0.0
+    return statistics.quantiles(values, n=100, method='inclusive')[int(pct) - 1]
+
+def build_workload(total: int, query_count: int) -> list:
+    """Return (name, method, path) requests: mostly searches, some transcripts and summaries"""
+    queries = [f"benchmark topic {index}" for index in range(query_count)]
+    workload = []
+    for _ in range(total):
+        query = random.choice(queries)
+        video_id = random.choice(fake_backends.fake_video_ids(query))
+        kind = random.choices(['search', 'transcript', 'summary', 'summary_stream'], weights=[5, 2, 2, 1])[0]
+        if kind == 'search':
+            workload.append(('search', 'GET', f"/search?q={query.replace(' ', '+')}"))
+        elif kind == 'transcript':
+            workload.append(('transcript', 'GET', f"/videos/{video_id}/transcript"))
+        elif kind == 'summary':
+            workload.append(('summary', 'GET', f"/videos/{video_id}/summary?style=Concise"))
+        else:
+            workload.append(('summary_stream', 'GET', f"/videos/{video_id}/summary?style=Concise&stream=1"))
+    return workload
+
+async def run_benchmark(workload: list, clients: int) -> tuple:
+    import httpx
+    import api_server
+    latencies = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    etags = {}
+    queue = asyncio.Queue()
+    for item in workload:
+        queue.put_nowait(item)
+    
+    async def client_loop(client):
+        while not queue.empty():
+            name, method, path = queue.get_nowait()
+            headers = {}
+            if name == 'search' and path in etags:
+                headers['if-none-match'] = etags[path]
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, headers=headers)
+                status = response.status_code
+                if 'etag' in response.headers:
+                    etags[path] = response.headers['etag']
+            except Exception as e:
+                print(f"Error requesting {path}: {str(e)}")
+                status = 'exception'
+            latencies[name].append(time.perf_counter() - start)
+            statuses[name][status] += 1
+    
+    transport = httpx.ASGITransport(app=api_server.app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://api', timeout=120) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+    return elapsed, latencies, statuses
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure api_server.py throughput with fake backends")
+    parser.add_argument('--requests', type=int, default=400, help="Total requests to send")
+    parser.add_argument('--clients', type=int, default=32, help="Concurrent clients")
+    parser.add_argument('--queries', type=int, default=20, help="Distinct search queries")
+    parser.add_argument('--llm-latency', type=float, default=1.5, help="Base fake LLM latency in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Injected failure rate of every backend")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+    
+    random.seed(args.seed)
+    # Fresh database per run so results don't depend on earlier runs' caches
+    os.environ['DB_PATH'] = os.path.join(tempfile.mkdtemp(prefix='api-bench-'), 'bench.db')
+    os.environ.setdefault('OPENAI_API_KEY', 'benchmark')
+    os.environ.setdefault('YOUTUBE_API_KEY', 'benchmark')
+    
+    fake_backends.install({
+        'youtube': fake_backends.Latency(0.08, 0.04, args.error_rate),
+        'transcript': fake_backends.Latency(0.3, 0.2, args.error_rate),
+        'llm': fake_backends.Latency(args.llm_latency, args.llm_latency / 2, args.error_rate),
+    })
+    
+    workload = build_workload(args.requests, args.queries)
+    elapsed, latencies, statuses = asyncio.run(run_benchmark(workload, args.clients))
+    
+    print(f"{args.requests} requests from {args.clients} clients in {elapsed:.1f}s "
+          f"({args.requests / elapsed:.1f} req/s)")
+    print(f"{'endpoint':<16} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}  statuses")
+    for name in sorted(latencies):
+        values = latencies[name]
+        status_text = ', '.join(f"{status}: {count}" for status, count in sorted(statuses[name].items(), key=str))
+        print(f"{name:<16} {len(values):>6} {percentile(values, 50) * 1000:>8.0f} "
+              f"{percentile(values, 95) * 1000:>8.0f} {percentile(values, 99) * 1000:>8.0f}  {status_text}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""Offline stand-ins for YouTube, transcripts and OpenAI, used by the benchmarks.
+
+Each fake sleeps for a configurable latency and returns deterministic data, so
+benchmarks exercise the real caching, rating and storage code without network
+access or API costs. ``install()`` patches the module attributes the pipeline
+looks up at call time.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import time
+from types import SimpleNamespace
+
+class Latency:
+    """Latency of one fake backend: a base delay plus uniform jitter, in seconds"""
+    def __init__(self, base: float, jitter: float = 0.0, error_rate: float = 0.0):
+        self.base = base
+        self.jitter = jitter
+        self.error_rate = error_rate
+    
+    def sample(self) -> float:
+        return self.base + random.uniform(0, self.jitter)
+    
+    def maybe_fail(self, backend: str):
+        if self.error_rate and random.random() < self.error_rate:
+            raise RuntimeError(f"Injected {backend} failure")
+
+DEFAULT_LATENCIES = {
+    'youtube': Latency(0.08, 0.04),
+    'transcript': Latency(0.3, 0.2),
+    'llm': Latency(1.5, 1.0),
+}
+
+def fake_video_ids(query: str, count: int = 6) -> list:
+    """Deterministic 11-character video IDs for a query"""
+    return [hashlib.sha256(f"{query}:{index}".encode()).hexdigest()[:11] for index in range(count)]
+
+def fake_video_item(video_id: str) -> dict:
+    """A videos().list item in the shape YouTube returns"""
+    return {
+        'id': video_id,
+        'snippet': {
+            'title': f"Video {video_id}",
+            'description': f"Description of video {video_id}. " * 20,
+            'publishedAt': '2024-01-01T00:00:00Z'
+        },
+        'statistics': {'viewCount': str(int(video_id[:4], 16) * 10), 'likeCount': str(int(video_id[:3], 16))}
+    }
+
+def fake_transcript(video_id: str) -> str:
+    # Distinct vocabulary per video, so dedup treats every video as unique
+    return ' '.join(f"{video_id}word{index}" for index in range(400))
+
+def fake_rating_content(seed: str) -> str:
+    score = int(hashlib.sha256(seed.encode()).hexdigest()[:2], 16) * 100 // 255
+    tier = 'S' if score >= 90 else 'A' if score >= 75 else 'B' if score >= 60 else 'C' if score >= 40 else 'D'
+    return json.dumps({
+        'rating': tier,
+        'score': score,
+        'explanation': {
+            'main_reason': "Benchmark rating",
+            'strengths': ["Deterministic"],
+            'weaknesses': ["Synthetic"],
+            'relevance': "Synthetic relevance",
+            'idea_count': "5",
+            'recommendation': "Benchmark only"
+        }
+    })
+
+def _completion(model: str, messages: list, response_format=None):
+    prompt = ''.join(message['content'] for message in messages)
+    if response_format:
+        content = fake_rating_content(prompt)
+    else:
+        content = f"Summary of {len(prompt)} characters of transcript.\n- Point one\n- Point two"
+    usage = SimpleNamespace(prompt_tokens=len(prompt) // 4, completion_tokens=len(content) // 4,
+                            prompt_tokens_details=None)
+    return SimpleNamespace(
+        model=model,
+        choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+        usage=usage
+    )
+
+class _FakeCompletions:
+    def __init__(self, latency: Latency, is_async: bool):
+        self.latency = latency
+        self.is_async = is_async
+    
+    def create(self, messages, model, stream=False, response_format=None, **kwargs):
+        if self.is_async:
+            return self._create_async(messages, model, stream, response_format)
+        time.sleep(self.latency.sample())
+        self.latency.maybe_fail('llm')
+        return _completion(model, messages, response_format)
+    
+    async def _create_async(self, messages, model, stream, response_format):
+        if stream:
+            return self._stream(messages, model)
+        await asyncio.sleep(self.latency.sample())
+        self.latency.maybe_fail('llm')
+        return _completion(model, messages, response_format)
+    
+    async def _stream(self, messages, model):
+        response = _completion(model, messages, None)
+        words = response.choices[0].message.content.split(' ')
+        for word in words:
+            await asyncio.sleep(self.latency.sample() / len(words))
+            delta = SimpleNamespace(content=word + ' ')
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)
+        yield SimpleNamespace(choices=[], usage=response.usage)
+
+def fake_openai_client(latency: Latency, is_async: bool = False):
+    """An object with the chat.completions.create surface of (Async)OpenAI"""
+    return SimpleNamespace(chat=SimpleNamespace(completions=_FakeCompletions(latency, is_async)))
+
+class _FakeRequest:
+    def __init__(self, latency: Latency, response: dict):
+        self.latency = latency
+        self.response = response
+    
+    def execute(self):
+        time.sleep(self.latency.sample())
+        self.latency.maybe_fail('youtube')
+        return self.response
+
+class FakeYouTubeService:
+    """The subset of the googleapiclient YouTube service the app uses"""
+    def __init__(self, latency: Latency):
+        self.latency = latency
+    
+    def search(self):
+        return SimpleNamespace(list=lambda q, **kwargs: _FakeRequest(self.latency, {
+            'items': [{'id': {'kind': 'youtube#video', 'videoId': video_id}} for video_id in fake_video_ids(q)]
+        }))
+    
+    def videos(self):
+        return SimpleNamespace(list=lambda id, **kwargs: _FakeRequest(self.latency, {
+            'items': [fake_video_item(video_id) for video_id in id.split(',')]
+        }))
+
+def install(latencies: dict = None):
+    """Patch the pipeline modules to use the fakes; returns the latencies in effect"""
+    import llm_gateway
+    import utils
+    import async_utils
+    
+    latencies = {**DEFAULT_LATENCIES, **(latencies or {})}
+    youtube, transcript, llm = latencies['youtube'], latencies['transcript'], latencies['llm']
+    
+    sync_client = fake_openai_client(llm)
+    async_client = fake_openai_client(llm, is_async=True)
+    llm_gateway.get_client = lambda: sync_client
+    llm_gateway.get_async_client = lambda: async_client
+    
+    def get_video_transcript(video_id):
+        time.sleep(transcript.sample())
+        try:
+            transcript.maybe_fail('transcript')
+        except RuntimeError:
+            # Like the real function, a failed fetch means "no transcript"
+            return None
+        return fake_transcript(video_id)
+    utils.get_video_transcript = get_video_transcript
+    utils.build_youtube_client = lambda: FakeYouTubeService(youtube)
+    
+    async def youtube_get(resource, **params):
+        await asyncio.sleep(youtube.sample())
+        youtube.maybe_fail('youtube')
+        if resource == 'search':
+            return {'items': [{'id': {'kind': 'youtube#video', 'videoId': video_id}}
+                              for video_id in fake_video_ids(params['q'], params.get('maxResults', 6))]}
+        return {'items': [fake_video_item(video_id) for video_id in params['id'].split(',')]}
+    async_utils.youtube_get = youtube_get
+    
+    return latencies
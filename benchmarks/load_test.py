@@ -0,0 +1,224 @@
+"""Load test of app.py with concurrent simulated Streamlit sessions.
+
+Each simulated user drives the real app script through streamlit's AppTest:
+login -> search -> sort/filter -> transcript -> summarize, against the offline
+fake backends with configurable latency. All sessions run as threads in this
+process and share one SQLite database, like sessions of one app instance.
+Reports per-step p50/p95/p99 latency and error rates.
+
+    python benchmarks/load_test.py --sessions 16 --iterations 3 --llm-latency 1.5
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from collections import Counter, defaultdict
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import fake_backends
+from api_throughput import percentile
+
+APP_PATH = os.path.join(REPO_ROOT, 'app.py')
+STEPS = ('login', 'search', 'sort_filter', 'transcript', 'summarize')
+PASSWORD = 'load-test-password'
+
+class StepError(Exception):
+    """A step finished but the app didn't reach the expected state"""
+
+def install_shared_runtime():
+    """Make concurrent AppTest runs share one runtime and script cache, as in a real server
+    
+    AppTest installs a fresh mock Runtime for every run and clears it afterwards,
+    and compiles the script again for every run. Both break when runs overlap
+    in threads (and concurrent compile() is not thread-safe on Python 3.11).
+    """
+    from unittest.mock import MagicMock
+    from streamlit import config as streamlit_config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    import streamlit.testing.v1.app_test as app_test_module
+    import streamlit.testing.v1.local_script_runner as local_script_runner
+    
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage('/mock/media'))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+    
+    class _IgnoredRuntimeSlot:
+        """Receives AppTest's per-run runtime so the shared one stays installed"""
+        _instance = None
+    app_test_module.Runtime = _IgnoredRuntimeSlot
+    
+    script_cache = ScriptCache()
+    local_script_runner.ScriptCache = lambda: script_cache
+    streamlit_config.set_option('global.appTest', True)
+
+def check_app(at, step: str):
+    if at.exception:
+        raise StepError(f"{step}: {at.exception[0].value.splitlines()[0]}")
+
+def find_button(at, label: str = None, key: str = None):
+    for button in at.button:
+        if (key and button.key == key) or (label and button.label == label):
+            return button
+    raise StepError(f"Button {key or label!r} not found")
+
+def step_login(at, username: str):
+    at.run()
+    check_app(at, 'login')
+    at.text_input[0].input(username)
+    at.text_input[1].input(PASSWORD)
+    find_button(at, label='Login').click().run()
+    check_app(at, 'login')
+    if not at.session_state['authenticated']:
+        raise StepError("login: not authenticated")
+
+def step_search(at, query: str):
+    reset_count = at.session_state['reset_count'] if 'reset_count' in at.session_state else 0
+    at.text_input(key=f"search_input_{reset_count}").input(query)
+    find_button(at, key='search_button').click().run()
+    check_app(at, 'search')
+    if not at.session_state['current_videos']:
+        raise StepError("search: no results")
+
+def step_sort_filter(at):
+    at.selectbox(key='sort_selector').select(random.choice(['Date', 'Views', 'Rating', 'Content Score'])).run()
+    check_app(at, 'sort_filter')
+    # Keep only tiers that occur, so the filtered grid is never empty
+    tiers = sorted({video['rating_tier'] for video in at.session_state['current_videos']})
+    reset_count = at.session_state['reset_count'] if 'reset_count' in at.session_state else 0
+    at.multiselect(key=f"rating_filter_{reset_count}").set_value(tiers).run()
+    check_app(at, 'sort_filter')
+
+def _first_video_id(at) -> str:
+    for button in at.button:
+        if button.key and button.key.startswith('btn_transcript_'):
+            return button.key[len('btn_transcript_'):]
+    raise StepError("No video card rendered")
+
+def step_transcript(at) -> str:
+    """Open the transcript of the first video card and return its video ID"""
+    video_id = _first_video_id(at)
+    find_button(at, key=f"btn_transcript_{video_id}").click().run()
+    check_app(at, 'transcript')
+    return video_id
+
+def step_summarize(at, video_id: str):
+    find_button(at, key=f"summarize_{video_id}").click().run()
+    check_app(at, 'summarize')
+    if not any(key.startswith(f"summary_{video_id}_") for key in at.session_state['summaries']):
+        raise StepError("summarize: no summary in session")
+
+def run_session(index: int, options, results: dict, lock: threading.Lock):
+    """Drive one simulated user through the flow options.iterations times"""
+    from streamlit.testing.v1 import AppTest
+    
+    def timed(step, func, *args):
+        start = time.perf_counter()
+        try:
+            result = func(*args)
+            error = None
+        except Exception as e:
+            error = str(e) if isinstance(e, StepError) else f"{step}: {type(e).__name__}: {e}"
+            if options.verbose:
+                traceback.print_exc()
+        with lock:
+            results['latencies'][step].append(time.perf_counter() - start)
+            if error:
+                results['errors'][step] += 1
+                results['messages'][error.splitlines()[0][:120]] += 1
+        if error:
+            raise StepError(error)
+        return result
+    
+    time.sleep(random.uniform(0, options.ramp_seconds))
+    at = AppTest.from_file(APP_PATH, default_timeout=options.step_timeout)
+    try:
+        timed('login', step_login, at, f"loadtest_{index}")
+        for _ in range(options.iterations):
+            query = f"load test topic {random.randrange(options.queries)}"
+            timed('search', step_search, at, query)
+            timed('sort_filter', step_sort_filter, at)
+            video_id = timed('transcript', step_transcript, at)
+            timed('summarize', step_summarize, at, video_id)
+            time.sleep(random.uniform(0, options.think_seconds))
+        with lock:
+            results['completed'] += 1
+    except StepError:
+        pass
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive concurrent simulated sessions through app.py")
+    parser.add_argument('--sessions', type=int, default=8, help="Concurrent simulated users")
+    parser.add_argument('--iterations', type=int, default=2, help="Search-to-summary cycles per user")
+    parser.add_argument('--queries', type=int, default=10, help="Distinct search queries (fewer means more cache hits)")
+    parser.add_argument('--ramp-seconds', type=float, default=2.0, help="Spread session starts over this long")
+    parser.add_argument('--think-seconds', type=float, default=0.5, help="Max pause between cycles")
+    parser.add_argument('--youtube-latency', type=float, default=0.08, help="Base fake YouTube latency in seconds")
+    parser.add_argument('--transcript-latency', type=float, default=0.3, help="Base fake transcript latency in seconds")
+    parser.add_argument('--llm-latency', type=float, default=1.5, help="Base fake LLM latency in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Injected failure rate of every backend")
+    parser.add_argument('--step-timeout', type=float, default=120.0, help="Seconds before a step counts as hung")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--verbose', action='store_true', help="Print tracebacks of failed steps")
+    options = parser.parse_args(argv)
+    
+    random.seed(options.seed)
+    os.environ['DB_PATH'] = os.path.join(tempfile.mkdtemp(prefix='load-test-'), 'load.db')
+    os.environ.setdefault('OPENAI_API_KEY', 'load-test')
+    os.environ.setdefault('YOUTUBE_API_KEY', 'load-test')
+    
+    fake_backends.install({
+        'youtube': fake_backends.Latency(options.youtube_latency, options.youtube_latency / 2, options.error_rate),
+        'transcript': fake_backends.Latency(options.transcript_latency, options.transcript_latency / 2,
+                                            options.error_rate),
+        'llm': fake_backends.Latency(options.llm_latency, options.llm_latency / 2, options.error_rate),
+    })
+    install_shared_runtime()
+    
+    from database import DatabaseManager
+    db = DatabaseManager()
+    for index in range(options.sessions):
+        db.create_user(f"loadtest_{index}", PASSWORD, None)
+    
+    results = {'latencies': defaultdict(list), 'errors': Counter(), 'messages': Counter(), 'completed': 0}
+    lock = threading.Lock()
+    threads = [
+        threading.Thread(target=run_session, args=(index, options, results, lock), name=f"session-{index}")
+        for index in range(options.sessions)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    
+    print(f"\n{options.sessions} sessions x {options.iterations} cycles in {elapsed:.1f}s, "
+          f"{results['completed']} completed without errors")
+    print(f"{'step':<12} {'count':>6} {'errors':>7} {'err %':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for step in STEPS:
+        values = results['latencies'][step]
+        if not values:
+            continue
+        errors = results['errors'][step]
+        print(f"{step:<12} {len(values):>6} {errors:>7} {errors / len(values) * 100:>5.1f}% "
+              f"{percentile(values, 50) * 1000:>8.0f} {percentile(values, 95) * 1000:>8.0f} "
+              f"{percentile(values, 99) * 1000:>8.0f}")
+    if results['messages']:
+        print("\nMost common errors:")
+        for message, count in results['messages'].most_common(5):
+            print(f"  {count:>4}x {message}")
+    return 1 if results['errors'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
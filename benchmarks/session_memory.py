@@ -0,0 +1,102 @@
+"""Memory held per session for search results, before and after compact records.
+
+Builds ranked results for a set of queries with the offline fakes, then keeps
+them in many simulated sessions the way app.py does and measures the Python
+heap with tracemalloc:
+
+    dicts    every session decodes its own list of full video dicts from the
+             database (the layout before video_records)
+    records  the same results as VideoRecords, not shared (one query per session)
+    shared   VideoRecords shared by reference through the process-level cache
+    
+    python benchmarks/session_memory.py --sessions 200 --queries 20 --videos 24
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+import fake_backends
+
+def build_results(query: str, count: int) -> list:
+    """Ranked video dicts for a query, as rank_videos returns them"""
+    import json
+    from utils import _video_from_item, apply_rating, format_rating
+    from rating_schema import parse_rating
+    videos = []
+    for video_id in fake_backends.fake_video_ids(query, count):
+        video = _video_from_item(fake_backends.fake_video_item(video_id))
+        video['search_query'] = query
+        content = parse_rating(fake_backends.fake_rating_content(video_id))
+        videos.append(apply_rating(video, format_rating(content)))
+    return videos
+
+def measure(build_sessions) -> int:
+    """Bytes still allocated after build_sessions() returns, while its result is alive"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = build_sessions()
+    gc.collect()
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del sessions
+    return allocated
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure search-result memory per simulated session")
+    parser.add_argument('--sessions', type=int, default=200, help="Simulated open sessions")
+    parser.add_argument('--queries', type=int, default=20, help="Distinct queries the sessions searched")
+    parser.add_argument('--videos', type=int, default=24, help="Ranked videos per query")
+    args = parser.parse_args(argv)
+    
+    from database import encode_json_blob, decode_json_blob
+    from video_records import compact_videos, get_shared_results, share_results, clear_shared_results
+    
+    queries = [f"memory benchmark topic {index}" for index in range(args.queries)]
+    stored = {}
+    for query in queries:
+        videos = build_results(query, args.videos)
+        # Rows saved before rating_analysis existed only carry the formatted text
+        legacy_videos = [{key: value for key, value in video.items() if key != 'rating_analysis'}
+                         for video in videos]
+        stored[query] = encode_json_blob(legacy_videos), encode_json_blob(videos)
+    session_queries = [queries[index % len(queries)] for index in range(args.sessions)]
+    
+    def dict_sessions():
+        sessions = []
+        for query in session_queries:
+            videos = decode_json_blob(stored[query][0])
+            sessions.append({'current_videos': videos, 'last_search_results': videos})
+        return sessions
+    
+    def record_sessions():
+        return [{'current_videos': compact_videos(decode_json_blob(stored[query][1]))} for query in session_queries]
+    
+    def shared_sessions():
+        clear_shared_results()
+        sessions = []
+        for query in session_queries:
+            videos = get_shared_results(query)
+            if videos is None:
+                videos = share_results(query, decode_json_blob(stored[query][1]))
+            sessions.append({'current_videos': videos})
+        return sessions
+    
+    layouts = [('dicts', dict_sessions), ('records', record_sessions), ('shared', shared_sessions)]
+    print(f"{args.sessions} sessions over {args.queries} queries, {args.videos} videos per query")
+    print(f"{'layout':<8} {'total KiB':>10} {'bytes/session':>14} {'vs dicts':>9}")
+    baseline = None
+    for name, build_sessions in layouts:
+        allocated = measure(build_sessions)
+        baseline = baseline or allocated
+        print(f"{name:<8} {allocated / 1024:>10.0f} {allocated // args.sessions:>14,} "
+              f"{allocated / baseline * 100:>8.0f}%")
+    clear_shared_results()
+
+if __name__ == "__main__":
+    main()
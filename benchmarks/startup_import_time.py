@@ -0,0 +1,75 @@
+"""Startup import-time benchmark for app.py.
+
+Runs ``python -X importtime -c "import app"`` several times and checks that
+importing the app (excluding streamlit itself) stays within budget and that
+no heavy SDK is loaded before the login page renders.
+
+    python benchmarks/startup_import_time.py
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Import time of app.py's own modules, excluding streamlit, in milliseconds
+APP_IMPORT_BUDGET_MS = 150
+# Modules that must only be imported on first use
+LAZY_MODULES = (
+    'openai', 'httpx', 'googleapiclient', 'youtube_transcript_api',
+    'pandas', 'numpy', 'werkzeug', 'dotenv'
+)
+
+def measure_once() -> dict:
+    """Import app once in a fresh interpreter; returns cumulative microseconds per top-level module"""
+    env = dict(os.environ)
+    # Placeholder keys so nothing falls through to secrets lookups
+    env.setdefault('OPENAI_API_KEY', 'benchmark')
+    env.setdefault('YOUTUBE_API_KEY', 'benchmark')
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import app'],
+        cwd=REPO_ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        # "import time: <self us> | <cumulative us> | <indented module name>"
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        cumulative[name.strip()] = int(cumulative_us)
+    return cumulative
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure app.py import time")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters to measure")
+    parser.add_argument('--budget-ms', type=float, default=APP_IMPORT_BUDGET_MS,
+                        help="Budget for app import time excluding streamlit")
+    args = parser.parse_args(argv)
+    
+    app_ms, streamlit_ms, loaded_lazy = [], [], set()
+    for _ in range(args.runs):
+        cumulative = measure_once()
+        app_ms.append(cumulative.get('app', 0) / 1000)
+        streamlit_ms.append(cumulative.get('streamlit', 0) / 1000)
+        loaded_lazy.update(name for name in LAZY_MODULES if name in cumulative)
+    
+    total = statistics.median(app_ms)
+    own = statistics.median(a - s for a, s in zip(app_ms, streamlit_ms))
+    print(f"import app: {total:.1f} ms median ({own:.1f} ms excluding streamlit, budget {args.budget_ms:.0f} ms)")
+    
+    failed = False
+    if own > args.budget_ms:
+        print(f"FAIL: app import is over budget by {own - args.budget_ms:.1f} ms")
+        failed = True
+    if loaded_lazy:
+        print(f"FAIL: imported at startup: {', '.join(sorted(loaded_lazy))}")
+        failed = True
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""Off-peak cache warming for popular search queries.
+
+Re-runs the most popular queries from search_hits within a YouTube API
+quota budget and saves the refreshed rankings to the shared search cache.
+
+    python cache_warmer.py                 # one warming run now
+    python cache_warmer.py --schedule      # run every night during off-peak hours
+"""
+import argparse
+import time
+from datetime import datetime
+from config import (
+    WARM_TOP_N, WARM_REFRESH_AFTER_HOURS, WARM_QUOTA_UNITS, WARM_OFF_PEAK_HOURS,
+    YOUTUBE_SEARCH_COST_UNITS, YOUTUBE_VIDEOS_COST_UNITS
+)
+from database import DatabaseManager
+from utils import search_videos
+
+# YouTube units one query costs: one search plus one batched videos.list for all its results
+QUERY_COST_UNITS = YOUTUBE_SEARCH_COST_UNITS + YOUTUBE_VIDEOS_COST_UNITS
+
+def is_off_peak(now: datetime = None, off_peak_hours: tuple = WARM_OFF_PEAK_HOURS) -> bool:
+    """Check whether the local hour falls in the off-peak window"""
+    hour = (now or datetime.now()).hour
+    start, end = off_peak_hours
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+def warm_popular_queries(top_n: int = WARM_TOP_N, quota_units: int = WARM_QUOTA_UNITS,
+                         refresh_after_hours: int = WARM_REFRESH_AFTER_HOURS) -> dict:
+    """Refresh cached rankings of the top-N queries that are older than refresh_after_hours"""
+    db = DatabaseManager()
+    counts = {'refreshed': 0, 'fresh': 0, 'failed': 0, 'units_spent': 0}
+    
+    for search_query, user_count in db.get_popular_queries(limit=top_n):
+        age_hours = db.get_search_results_age_hours(search_query)
+        if age_hours is not None and age_hours < refresh_after_hours:
+            counts['fresh'] += 1
+            continue
+        if counts['units_spent'] + QUERY_COST_UNITS > quota_units:
+            print(f"Quota budget of {quota_units} units reached, stopping")
+            break
+        
+        print(f"Warming '{search_query}' ({user_count} users, {age_hours or 0:.1f}h old)")
+        counts['units_spent'] += QUERY_COST_UNITS
+        try:
+            videos = search_videos(search_query)
+        except Exception as e:
+            print(f"Error warming '{search_query}': {str(e)}")
+            counts['failed'] += 1
+            continue
+        
+        if videos:
+            db.save_search_results(None, search_query, videos)
+            counts['refreshed'] += 1
+    
+    return counts
+
+def run_schedule(interval_seconds: int = 900, **warm_kwargs):
+    """Warm caches once per off-peak window, checking every interval_seconds"""
+    last_run_date = None
+    while True:
+        now = datetime.now()
+        if is_off_peak(now) and last_run_date != now.date():
+            counts = warm_popular_queries(**warm_kwargs)
+            print(f"Warming run finished: {counts}")
+            last_run_date = now.date()
+        time.sleep(interval_seconds)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Refresh cached rankings of popular queries")
+    parser.add_argument('--top', type=int, default=WARM_TOP_N, help="Number of popular queries to consider")
+    parser.add_argument('--quota', type=int, default=WARM_QUOTA_UNITS, help="YouTube API units to spend per run")
+    parser.add_argument('--refresh-after', type=int, default=WARM_REFRESH_AFTER_HOURS,
+                        help="Only refresh results older than this many hours")
+    parser.add_argument('--schedule', action='store_true', help="Keep running and warm once per off-peak window")
+    args = parser.parse_args(argv)
+    
+    warm_kwargs = {'top_n': args.top, 'quota_units': args.quota, 'refresh_after_hours': args.refresh_after}
+    if args.schedule:
+        run_schedule(**warm_kwargs)
+    else:
+        print(warm_popular_queries(**warm_kwargs))
+
+if __name__ == "__main__":
+    main()
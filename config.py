@@ -1,21 +1,104 @@
 import os
-from dotenv import load_dotenv
+from functools import lru_cache
 import streamlit as st
 
-# Try to load from .env file
-load_dotenv()
+@lru_cache(maxsize=None)
+def _load_dotenv():
+    """Load the .env file once, on first use of a setting"""
+    from dotenv import load_dotenv
+    load_dotenv()
 
-# Get API keys - first try environment variables, then streamlit secrets
-OPENAI_API_KEY = os.getenv('OPENAI_API_KEY') or st.secrets.get('OPENAI_API_KEY')
-YOUTUBE_API_KEY = os.getenv('YOUTUBE_API_KEY') or st.secrets.get('YOUTUBE_API_KEY')
+def get_secret(name, default=None):
+    """Read a setting from environment variables, then streamlit secrets
+    
+    Command-line tools run without a secrets.toml, so a missing secrets file
+    falls back to the default instead of raising.
+    """
+    _load_dotenv()
+    value = os.getenv(name)
+    if value:
+        return value
+    try:
+        return st.secrets.get(name, default)
+    except Exception:
+        return default
 
-# Add debug logging
-print("\nAPI Keys loaded:")
-print(f"YouTube API Key: {YOUTUBE_API_KEY[:10]}...")
-print(f"OpenAI API Key: {OPENAI_API_KEY[:10]}...")
-print(f"YouTube API Key source: {'Environment' if os.getenv('YOUTUBE_API_KEY') else 'Streamlit Secrets'}")
+# API keys are read on first access rather than at import, so importing the app
+# doesn't load .env or streamlit secrets before the login page renders
+_LAZY_SECRETS = ('OPENAI_API_KEY', 'YOUTUBE_API_KEY')
+
+def __getattr__(name):
+    if name in _LAZY_SECRETS:
+        value = get_secret(name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module 'config' has no attribute '{name}'")
 
 # YouTube API settings
 YOUTUBE_API_SERVICE_NAME = "youtube"
 YOUTUBE_API_VERSION = "v3"
-MAX_RESULTS = 10  # Number of videos to fetch per search 
\ No newline at end of file
+MAX_RESULTS = 10  # Number of videos to fetch per search
+
+# OpenAI settings
+LLM_TEMPERATURE = 0.7
+LLM_TIMEOUT_SECONDS = 60.0
+LLM_CONNECT_TIMEOUT_SECONDS = 5.0
+LLM_MAX_RETRIES = 2
+
+# Model routing per task. Routes named "<task>:<style>" override the task
+# route for one summary style. When recent calls on the primary model exceed
+# slo_seconds, calls are sent to the fallback model until latency recovers.
+MODEL_ROUTES = {
+    'rating': {'model': 'gpt-4o-mini', 'fallback': 'gpt-3.5-turbo', 'slo_seconds': 10.0},
+    'summary': {'model': 'gpt-4', 'fallback': 'gpt-4o-mini', 'slo_seconds': 45.0},
+    'summary:Concise': {'model': 'gpt-4o-mini', 'fallback': 'gpt-3.5-turbo', 'slo_seconds': 20.0},
+    'summary:ELI5': {'model': 'gpt-4o-mini', 'fallback': 'gpt-3.5-turbo', 'slo_seconds': 20.0},
+    'custom_pattern': {'model': 'gpt-4', 'fallback': 'gpt-4o-mini', 'slo_seconds': 45.0},
+}
+
+# USD per 1K tokens as (prompt, completion), used for cost accounting
+MODEL_PRICES = {
+    'gpt-4': (0.03, 0.06),
+    'gpt-4o-mini': (0.00015, 0.0006),
+    'gpt-3.5-turbo': (0.0005, 0.0015),
+}
+
+# Background summary prefetch after each search
+PREFETCH_STYLE = "Concise"
+PREFETCH_TIERS = ('S', 'A')
+PREFETCH_TOP_K = 3
+PREFETCH_WORKERS = 2
+PREFETCH_HOURLY_BUDGET = 100  # Max prefetch generations per process per hour
+PREFETCH_WAIT_SECONDS = 120  # How long a Summarize click waits for the same summary being prefetched
+PREFETCH_TRACKED_KEYS = 1000  # Prefetched summaries remembered for the hit rate (least recently generated dropped first)
+
+# Search result caching and off-peak cache warming
+SEARCH_CACHE_MAX_AGE_HOURS = 48  # Matches the 2-day window used for saved results
+WARM_TOP_N = 20
+WARM_REFRESH_AFTER_HOURS = 24  # Refresh popular queries well before they expire
+WARM_QUOTA_UNITS = 3000  # YouTube Data API units a warming run may spend
+WARM_OFF_PEAK_HOURS = (1, 6)  # Local hours [start, end) when the scheduler runs
+YOUTUBE_SEARCH_COST_UNITS = 100
+YOUTUBE_VIDEOS_COST_UNITS = 1
+RETENTION_USER_STATE_DAYS = 2  # get_user_state ignores anything older
+RETENTION_SEARCH_RESULTS_DAYS = 30
+RETENTION_SEARCH_HITS_DAYS = 30  # Keeps the window get_popular_queries counts over
+RETENTION_SEARCH_STATE_DAYS = 30
+RETENTION_RATING_BATCHES_DAYS = 30  # Finished Batch API jobs only
+RETENTION_BATCH_SIZE = 500  # Rows deleted per write transaction
+RETENTION_PAUSE_SECONDS = 0.05  # Pause between batches so app writes can interleave
+RETENTION_VACUUM_PAGES = 2000  # Free pages released per incremental vacuum
+SESSION_TTL_HOURS = 24 * 14  # Lifetime of a login session token
+SESSION_COOKIE_NAME = 'yt_session'
+SESSION_QUERY_PARAM = 'session'  # Alternative to the cookie, e.g. for links opened in a new tab
+ASYNC_TRANSCRIPT_WORKERS = 8  # Threads for the blocking transcript library
+ASYNC_RATING_CONCURRENCY = 6  # Concurrent rating calls per ranking run
+YOUTUBE_HTTP_TIMEOUT_SECONDS = 10
+API_MAX_CONCURRENT_REQUESTS = 32  # Requests processed at once by api_server.py
+API_QUEUE_TIMEOUT_SECONDS = 5.0  # Wait for a free slot before answering 503
+API_TRANSCRIPT_CACHE_SIZE = 256  # Transcripts kept in memory by the API
+API_MAX_RANK_VIDEOS = 50
+VIDEO_DESCRIPTION_MAX_CHARS = 300  # Description kept per result in session memory
+SHARED_RESULTS_MAX_QUERIES = 256  # Queries whose ranked results are shared in process memory
+SHARED_RESULTS_MAX_AGE_SECONDS = 15 * 60  # Then reloaded, to pick up refreshes by other processes
+STATISTICS_MAX_AGE_SECONDS = 10 * 60  # View and like counts older than this are refreshed on display
@@ -1,85 +1,281 @@
 import sqlite3
-from werkzeug.security import generate_password_hash, check_password_hash
+import threading
+import time
 from datetime import datetime
 import json
+import zlib
 import streamlit as st
 import os
+from config import get_secret
 
-def init_db():
-    """Initialize database and create tables if they don't exist"""
+# Storage format of JSON blob columns: one version byte followed by the payload.
+# Rows written before the codec existed are plain JSON text and still decode.
+BLOB_FORMAT_RAW = 0x00  # Compact JSON, used when compression would not pay off
+BLOB_FORMAT_ZLIB = 0x01  # zlib-compressed compact JSON
+BLOB_COMPRESS_MIN_BYTES = 256
+BLOB_COMPRESS_LEVEL = 6
+
+def encode_json_blob(value) -> bytes:
+    """Serialize value as compact JSON and compress it when that makes it smaller"""
+    payload = json.dumps(value, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    if len(payload) >= BLOB_COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(payload, BLOB_COMPRESS_LEVEL)
+        if len(compressed) < len(payload):
+            return bytes([BLOB_FORMAT_ZLIB]) + compressed
+    return bytes([BLOB_FORMAT_RAW]) + payload
+
+def decode_json_blob(blob):
+    """Deserialize a value stored by encode_json_blob, or a legacy JSON text row"""
+    if isinstance(blob, str):
+        return json.loads(blob)
+    blob = bytes(blob)
+    if blob[0] == BLOB_FORMAT_ZLIB:
+        return json.loads(zlib.decompress(blob[1:]))
+    if blob[0] == BLOB_FORMAT_RAW:
+        return json.loads(blob[1:])
+    raise ValueError(f"Unknown blob format {blob[0]}")
+
+# (table, column) pairs stored through the blob codec
+JSON_BLOB_COLUMNS = [
+    ('search_state', 'state_data'),
+    ('search_results', 'videos'),
+    ('user_state', 'state_data'),
+]
+
+def _compress_json_blobs(conn, batch_size: int = 500):
+    """Re-encode legacy JSON text rows of every codec column"""
+    for table, column in JSON_BLOB_COLUMNS:
+        last_rowid = 0
+        while True:
+            rows = conn.execute(f'''
+                SELECT rowid, {column} FROM {table}
+                WHERE rowid > ? AND typeof({column}) = 'text'
+                ORDER BY rowid LIMIT ?
+            ''', (last_rowid, batch_size)).fetchall()
+            if not rows:
+                break
+            conn.executemany(
+                f'UPDATE {table} SET {column} = ? WHERE rowid = ?',
+                [(sqlite3.Binary(encode_json_blob(json.loads(value))), rowid) for rowid, value in rows]
+            )
+            last_rowid = rows[-1][0]
+
+def _seed_admin_user(conn):
+    """Create the default admin user if it does not exist yet"""
+    from werkzeug.security import generate_password_hash
+    c = conn.cursor()
+    c.execute('SELECT id FROM users WHERE username = ?', ('admin',))
+    if not c.fetchone():
+        admin_password = generate_password_hash('admin123')
+        c.execute('''
+            INSERT INTO users (username, password, is_admin)
+            VALUES (?, ?, ?)
+        ''', ('admin', admin_password, True))
+
+# Schema migrations as (version, description, steps), applied in order.
+# PRAGMA user_version records the last applied version; steps are SQL
+# statements or callables taking the open connection (for data migrations).
+# Never edit an applied migration - append a new one instead.
+MIGRATIONS = [
+    (1, 'baseline schema', [
+        '''CREATE TABLE IF NOT EXISTS users
+           (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            is_admin BOOLEAN DEFAULT 0)''',
+        '''CREATE TABLE IF NOT EXISTS patterns
+           (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            name TEXT NOT NULL,
+            description TEXT,
+            prompt_template TEXT NOT NULL,
+            is_public BOOLEAN DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id))''',
+        '''CREATE TABLE IF NOT EXISTS search_state
+           (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            state_data TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id))''',
+        '''CREATE TABLE IF NOT EXISTS search_results
+           (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            search_query TEXT NOT NULL,
+            videos TEXT NOT NULL,
+            timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id))''',
+        '''CREATE INDEX IF NOT EXISTS idx_search_results
+           ON search_results (user_id, search_query, timestamp)''',
+        # Summaries are shared according to pattern visibility
+        '''CREATE TABLE IF NOT EXISTS summaries
+           (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            video_id TEXT NOT NULL,
+            prompt_hash TEXT NOT NULL,
+            language TEXT NOT NULL,
+            model TEXT NOT NULL,
+            is_public BOOLEAN DEFAULT 0,
+            summary TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (video_id, prompt_hash, language, model, user_id),
+            FOREIGN KEY (user_id) REFERENCES users(id))''',
+        '''CREATE INDEX IF NOT EXISTS idx_summaries_user
+           ON summaries (user_id, created_at)''',
+        # One stored rating per video and query
+        '''CREATE TABLE IF NOT EXISTS video_ratings
+           (video_id TEXT NOT NULL,
+            search_query TEXT NOT NULL,
+            model TEXT,
+            rating TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            analysis TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (video_id, search_query))''',
+        # Offline Batch API rating jobs
+        '''CREATE TABLE IF NOT EXISTS rating_batches
+           (batch_id TEXT PRIMARY KEY,
+            manifest TEXT NOT NULL,
+            status TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP)''',
+        # Per-video progress of playlist/channel ingestion
+        '''CREATE TABLE IF NOT EXISTS ingestion_progress
+           (source_id TEXT NOT NULL,
+            video_id TEXT NOT NULL,
+            status TEXT NOT NULL,
+            processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (source_id, video_id))''',
+        # Cached MinHash signatures of transcripts
+        '''CREATE TABLE IF NOT EXISTS video_signatures
+           (video_id TEXT PRIMARY KEY,
+            signature BLOB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''',
+        # One row per persisted session key
+        '''CREATE TABLE IF NOT EXISTS session_fields
+           (user_id INTEGER NOT NULL,
+            field TEXT NOT NULL,
+            value TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, field),
+            FOREIGN KEY (user_id) REFERENCES users(id))''',
+        # Previously created lazily by save_user_state
+        '''CREATE TABLE IF NOT EXISTS user_state
+           (user_id INTEGER PRIMARY KEY,
+            state_data TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''',
+        _seed_admin_user,
+    ]),
+    (2, 'indexes for pattern listing, search state and user state lookups', [
+        '''CREATE INDEX IF NOT EXISTS idx_patterns_visibility
+           ON patterns (user_id, is_public, created_at)''',
+        '''CREATE INDEX IF NOT EXISTS idx_search_state_user
+           ON search_state (user_id, created_at)''',
+        '''CREATE INDEX IF NOT EXISTS idx_user_state_updated
+           ON user_state (updated_at)''',
+    ]),
+    (3, 'compress JSON blobs of search state, search results and user state', [
+        _compress_json_blobs,
+    ]),
+    (4, 'server-side login sessions', [
+        # Only a hash of the session token is stored; the primary key is the lookup index
+        '''CREATE TABLE IF NOT EXISTS auth_sessions
+           (token_hash TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            expires_at TIMESTAMP NOT NULL,
+            FOREIGN KEY (user_id) REFERENCES users(id))''',
+        '''CREATE INDEX IF NOT EXISTS idx_auth_sessions_expires
+           ON auth_sessions (expires_at)''',
+    ]),
+    (5, 'search hits for query popularity', [
+        # One row per search, cached or not; search_results only gets a row when a search misses the cache
+        '''CREATE TABLE IF NOT EXISTS search_hits
+           (id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            search_query TEXT NOT NULL,
+            searched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(id))''',
+        '''CREATE INDEX IF NOT EXISTS idx_search_hits_searched
+           ON search_hits (searched_at, search_query)''',
+        # Keep the popularity counted so far from users' saved results
+        '''INSERT INTO search_hits (user_id, search_query, searched_at)
+           SELECT user_id, search_query, timestamp FROM search_results
+           WHERE user_id IS NOT NULL''',
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+# ingestion_progress row of a source once a run reached the end of its playlist
+INGESTION_COMPLETE_MARKER = '*'
+
+_migrated_paths = set()
+_migration_lock = threading.Lock()
+
+def run_migrations(db_path: str) -> int:
+    """Apply pending migrations in a single transaction and return the schema version"""
+    # Autocommit mode so the explicit BEGIN IMMEDIATE below controls the transaction
+    conn = sqlite3.connect(db_path, isolation_level=None)
     try:
-        conn = sqlite3.connect('app.db')
-        c = conn.cursor()
-        
-        # Create users table
-        c.execute('''CREATE TABLE IF NOT EXISTS users
-                     (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                      username TEXT UNIQUE NOT NULL,
-                      password TEXT NOT NULL,
-                      is_admin BOOLEAN DEFAULT 0)''')
-        
-        # Create patterns table
-        c.execute('''CREATE TABLE IF NOT EXISTS patterns
-                     (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                      user_id INTEGER,
-                      name TEXT NOT NULL,
-                      description TEXT,
-                      prompt_template TEXT NOT NULL,
-                      is_public BOOLEAN DEFAULT 0,
-                      created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                      FOREIGN KEY (user_id) REFERENCES users(id))''')
-        
-        # Create search_state table
-        c.execute('''CREATE TABLE IF NOT EXISTS search_state
-                     (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                      user_id INTEGER,
-                      state_data TEXT NOT NULL,
-                      created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                      FOREIGN KEY (user_id) REFERENCES users(id))''')
-        
-        # Create search_results table
-        c.execute('''CREATE TABLE IF NOT EXISTS search_results
-                     (id INTEGER PRIMARY KEY AUTOINCREMENT,
-                      user_id INTEGER,
-                      search_query TEXT NOT NULL,
-                      videos TEXT NOT NULL,
-                      timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                      FOREIGN KEY (user_id) REFERENCES users(id))''')
-        
-        # Create index for faster searches
-        c.execute('''CREATE INDEX IF NOT EXISTS idx_search_results 
-                     ON search_results (user_id, search_query, timestamp)''')
-        
-        # Create default admin user if not exists
-        c.execute('SELECT * FROM users WHERE username = ?', ('admin',))
-        if not c.fetchone():
-            admin_password = generate_password_hash('admin123')
-            c.execute('''
-                INSERT INTO users (username, password, is_admin)
-                VALUES (?, ?, ?)
-            ''', ('admin', admin_password, True))
-        
-        conn.commit()
+        # Only takes effect on a new database; existing ones switch with retention.py --enable-incremental-vacuum
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        # Take the write lock before reading the version so concurrent
+        # processes starting together cannot apply the same migration twice
+        conn.execute('BEGIN IMMEDIATE')
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        for target, description, steps in MIGRATIONS:
+            if target <= version:
+                continue
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+            conn.execute(f'PRAGMA user_version = {int(target)}')
+            version = target
+            print(f"Applied migration {target}: {description}")
+        conn.execute('COMMIT')
+        return version
+    except Exception:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    finally:
         conn.close()
-        print("Database initialized successfully")
-    except Exception as e:
-        print(f"Error initializing database: {str(e)}")
-        raise e
+
+def init_db(db_path: str = None):
+    """Bring the database schema up to date, once per process and database file"""
+    db_path = db_path or get_secret('DB_PATH', './app.db')
+    with _migration_lock:
+        if db_path in _migrated_paths:
+            return
+        try:
+            version = run_migrations(db_path)
+            _migrated_paths.add(db_path)
+            print(f"Database initialized successfully (schema version {version})")
+        except Exception as e:
+            print(f"Error initializing database: {str(e)}")
+            raise e
 
 class DatabaseManager:
     def __init__(self):
         # Use relative path for better cloud compatibility
-        self.db_path = st.secrets.get('DB_PATH', './app.db')
+        self.db_path = get_secret('DB_PATH', './app.db')
         
         # Ensure database directory exists
         db_dir = os.path.dirname(self.db_path)
         if db_dir:  # Only create directory if path has a directory component
             os.makedirs(db_dir, exist_ok=True)
+        
+        # Schema changes run once per process here, never on read/write paths
+        init_db(self.db_path)
     
     def get_connection(self):
         return sqlite3.connect(self.db_path)
     
     def authenticate_user(self, username, password):
+        from werkzeug.security import check_password_hash
         conn = self.get_connection()
         c = conn.cursor()
         c.execute('SELECT * FROM users WHERE username = ?', (username,))
@@ -95,6 +291,7 @@ class DatabaseManager:
         return None
     
     def create_user(self, username, password, email):
+        from werkzeug.security import generate_password_hash
         try:
             conn = self.get_connection()
             c = conn.cursor()
@@ -109,6 +306,56 @@ class DatabaseManager:
         except sqlite3.IntegrityError:
             return False
     
+    def create_auth_session(self, token_hash: str, user_id: int, ttl_hours: int) -> bool:
+        """Store a login session by token hash, valid for ttl_hours"""
+        try:
+            conn = self.get_connection()
+            c = conn.cursor()
+            c.execute('''
+                INSERT INTO auth_sessions (token_hash, user_id, expires_at)
+                VALUES (?, ?, datetime('now', ?))
+            ''', (token_hash, user_id, f'+{int(ttl_hours)} hours'))
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"Error creating auth session: {str(e)}")
+            return False
+    
+    def get_auth_session_user(self, token_hash: str):
+        """Get the user of an unexpired session token hash, or None"""
+        try:
+            conn = self.get_connection()
+            c = conn.cursor()
+            c.execute('''
+                SELECT u.id, u.username, u.is_admin
+                FROM auth_sessions s JOIN users u ON u.id = s.user_id
+                WHERE s.token_hash = ? AND s.expires_at > datetime('now')
+            ''', (token_hash,))
+            user = c.fetchone()
+            conn.close()
+            
+            if user:
+                return {
+                    'user_id': user[0],
+                    'username': user[1],
+                    'is_admin': user[2]
+                }
+        except Exception as e:
+            print(f"Error getting auth session: {str(e)}")
+        return None
+    
+    def delete_auth_session(self, token_hash: str):
+        """Revoke a login session"""
+        try:
+            conn = self.get_connection()
+            c = conn.cursor()
+            c.execute('DELETE FROM auth_sessions WHERE token_hash = ?', (token_hash,))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error deleting auth session: {str(e)}")
+    
     def get_user_patterns(self, user_id):
         """Get patterns visible to the user"""
         try:
@@ -185,10 +432,10 @@ class DatabaseManager:
             conn = self.get_connection()
             c = conn.cursor()
             
-            # First delete old results for this search
+            # First delete old results for this search (user_id None is the shared cache)
             c.execute("""
                 DELETE FROM search_results 
-                WHERE user_id = ? AND search_query = ?
+                WHERE user_id IS ? AND search_query = ?
             """, (user_id, search_query))
             
             # Insert new results
@@ -196,7 +443,7 @@ class DatabaseManager:
                 INSERT INTO search_results 
                 (user_id, search_query, videos) 
                 VALUES (?, ?, ?)
-            """, (user_id, search_query, json.dumps(videos)))
+            """, (user_id, search_query, sqlite3.Binary(encode_json_blob(videos))))
             
             conn.commit()
             conn.close()
@@ -223,11 +470,124 @@ class DatabaseManager:
             conn.close()
             
             if result:
-                return json.loads(result[0])
+                return decode_json_blob(result[0])
         except Exception as e:
             print(f"Error getting search results: {e}")
         return None 
     
+    def merge_search_results_statistics(self, search_query: str, statistics: dict, updated_at: float,
+                                        max_age_hours: int = 48):
+        """Write fresh view and like counts into a query's recent cached results
+        
+        ``statistics`` maps video IDs to (views, likes). Rows keep their timestamp,
+        so refreshed counts don't extend how long a ranking stays cached.
+        """
+        try:
+            conn = self.get_connection()
+            c = conn.cursor()
+            
+            c.execute("""
+                SELECT id, videos FROM search_results 
+                WHERE search_query = ? 
+                AND timestamp > datetime('now', ?)
+            """, (search_query, f'-{int(max_age_hours)} hours'))
+            
+            updates = []
+            for row_id, blob in c.fetchall():
+                videos = decode_json_blob(blob)
+                for video in videos:
+                    if video['id'] in statistics:
+                        video['views'], video['likes'] = statistics[video['id']]
+                        video['statistics_updated_at'] = updated_at
+                updates.append((sqlite3.Binary(encode_json_blob(videos)), row_id))
+            
+            c.executemany("UPDATE search_results SET videos = ? WHERE id = ?", updates)
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error merging search result statistics: {e}")
+    
+    def get_shared_search_results(self, search_query: str, max_age_hours: int = 48) -> list:
+        """Get the freshest results for a query saved by any user or the cache warmer"""
+        try:
+            conn = self.get_connection()
+            c = conn.cursor()
+            
+            c.execute("""
+                SELECT videos FROM search_results 
+                WHERE search_query = ? 
+                AND timestamp > datetime('now', ?)
+                ORDER BY timestamp DESC
+                LIMIT 1
+            """, (search_query, f'-{int(max_age_hours)} hours'))
+            
+            result = c.fetchone()
+            conn.close()
+            
+            if result:
+                return decode_json_blob(result[0])
+        except Exception as e:
+            print(f"Error getting shared search results: {e}")
+        return None
+    
+    def record_search_hit(self, user_id, search_query: str):
+        """Count one search of a query, whether or not it was served from cache"""
+        try:
+            conn = self.get_connection()
+            c = conn.cursor()
+            
+            c.execute("""
+                INSERT INTO search_hits (user_id, search_query)
+                VALUES (?, ?)
+            """, (user_id, search_query))
+            
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error recording search hit: {e}")
+    
+    def get_popular_queries(self, limit: int = 20, days: int = 30) -> list:
+        """Get (search_query, user_count) for the queries most users searched recently"""
+        try:
+            conn = self.get_connection()
+            c = conn.cursor()
+            
+            # Anonymous API searches (user_id NULL) only break ties between equally popular queries
+            c.execute("""
+                SELECT search_query, COUNT(DISTINCT user_id) AS user_count
+                FROM search_hits
+                WHERE searched_at > datetime('now', ?)
+                GROUP BY search_query
+                ORDER BY user_count DESC, COUNT(*) DESC, MAX(searched_at) DESC
+                LIMIT ?
+            """, (f'-{int(days)} days', limit))
+            
+            rows = c.fetchall()
+            conn.close()
+            return rows
+        except Exception as e:
+            print(f"Error getting popular queries: {e}")
+            return []
+    
+    def get_search_results_age_hours(self, search_query: str):
+        """Get the age in hours of the freshest results for a query, or None if never cached"""
+        try:
+            conn = self.get_connection()
+            c = conn.cursor()
+            
+            c.execute("""
+                SELECT (julianday('now') - julianday(MAX(timestamp))) * 24
+                FROM search_results 
+                WHERE search_query = ?
+            """, (search_query,))
+            
+            result = c.fetchone()
+            conn.close()
+            return result[0] if result else None
+        except Exception as e:
+            print(f"Error getting search results age: {e}")
+            return None
+    
     def get_latest_search(self, user_id: int) -> tuple:
         """Get user's most recent search and results"""
         try:
@@ -246,7 +606,7 @@ class DatabaseManager:
             conn.close()
             
             if result:
-                return result[0], json.loads(result[1])
+                return result[0], decode_json_blob(result[1])
             return None, None
         except Exception as e:
             print(f"Error getting latest search: {e}")
@@ -258,20 +618,11 @@ class DatabaseManager:
             conn = self.get_connection()
             c = conn.cursor()
             
-            # Create user_state table if it doesn't exist
-            c.execute('''
-                CREATE TABLE IF NOT EXISTS user_state (
-                    user_id INTEGER PRIMARY KEY,
-                    state_data TEXT NOT NULL,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
             # Save state
             c.execute("""
                 INSERT OR REPLACE INTO user_state (user_id, state_data, updated_at)
                 VALUES (?, ?, datetime('now'))
-            """, (user_id, json.dumps(state_data)))
+            """, (user_id, sqlite3.Binary(encode_json_blob(state_data))))
             
             conn.commit()
             conn.close()
@@ -294,7 +645,7 @@ class DatabaseManager:
             conn.close()
             
             if result:
-                return json.loads(result[0])
+                return decode_json_blob(result[0])
         except Exception as e:
             print(f"Error getting user state: {e}")
         return {} 
@@ -305,8 +656,8 @@ class DatabaseManager:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            # Convert state data to JSON string
-            state_json = json.dumps(state_data)
+            # Convert state data to a compressed JSON blob
+            state_blob = sqlite3.Binary(encode_json_blob(state_data))
             
             # Delete old state for this user
             cursor.execute('DELETE FROM search_state WHERE user_id = ?', (user_id,))
@@ -315,7 +666,7 @@ class DatabaseManager:
             cursor.execute('''
                 INSERT INTO search_state (user_id, state_data)
                 VALUES (?, ?)
-            ''', (user_id, state_json))
+            ''', (user_id, state_blob))
             
             conn.commit()
             conn.close()
@@ -339,8 +690,460 @@ class DatabaseManager:
             conn.close()
             
             if result:
-                return json.loads(result[0])
+                return decode_json_blob(result[0])
             return None
         except Exception as e:
             print(f"Error getting search state: {str(e)}")
-            return None 
\ No newline at end of file
+            return None
+
+    def save_session_fields(self, user_id: int, fields: dict) -> bool:
+        """Upsert only the given session fields for a user; returns whether the write succeeded"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.executemany('''
+                INSERT INTO session_fields (user_id, field, value, updated_at)
+                VALUES (?, ?, ?, datetime('now'))
+                ON CONFLICT (user_id, field)
+                DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at
+            ''', [(user_id, field, json.dumps(value)) for field, value in fields.items()])
+            
+            conn.commit()
+            conn.close()
+            return True
+        except Exception as e:
+            print(f"Error saving session fields: {str(e)}")
+            return False
+
+    def get_session_fields(self, user_id: int) -> dict:
+        """Get all persisted session fields for a user"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT field, value FROM session_fields
+                WHERE user_id = ?
+            ''', (user_id,))
+            
+            rows = cursor.fetchall()
+            conn.close()
+            
+            return {field: json.loads(value) for field, value in rows}
+        except Exception as e:
+            print(f"Error getting session fields: {str(e)}")
+            return {}
+
+    def save_summary(self, user_id: int, video_id: str, prompt_hash: str, language: str,
+                     model: str, summary: str, is_public: bool = False):
+        """Store a generated summary; public summaries are reused by every user"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT OR REPLACE INTO summaries
+                (user_id, video_id, prompt_hash, language, model, is_public, summary)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (user_id, video_id, prompt_hash, language, model, 1 if is_public else 0, summary))
+            
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error saving summary: {str(e)}")
+
+    def get_summary(self, user_id: int, video_id: str, prompt_hash: str, language: str, model: str):
+        """Get a stored summary visible to the user, or None on a miss"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT summary FROM summaries
+                WHERE video_id = ? AND prompt_hash = ? AND language = ? AND model = ?
+                AND (is_public = 1 OR user_id = ?)
+                ORDER BY created_at DESC
+                LIMIT 1
+            ''', (video_id, prompt_hash, language, model, user_id))
+            
+            result = cursor.fetchone()
+            conn.close()
+            
+            if result:
+                return result[0]
+        except Exception as e:
+            print(f"Error getting summary: {str(e)}")
+        return None
+
+    def get_summaries_for_videos(self, user_id: int, video_ids: list, language: str, models: list) -> dict:
+        """Get all stored summaries visible to the user for several videos at once
+        
+        Returns a dict keyed by (video_id, prompt_hash, model).
+        """
+        if not video_ids or not models:
+            return {}
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            video_placeholders = ','.join('?' * len(video_ids))
+            model_placeholders = ','.join('?' * len(models))
+            cursor.execute(f'''
+                SELECT video_id, prompt_hash, model, summary FROM summaries
+                WHERE video_id IN ({video_placeholders}) AND language = ?
+                AND model IN ({model_placeholders})
+                AND (is_public = 1 OR user_id = ?)
+                ORDER BY created_at
+            ''', (*video_ids, language, *models, user_id))
+            
+            rows = cursor.fetchall()
+            conn.close()
+            
+            # Later rows win, so the newest summary is kept for each key
+            return {
+                (video_id, prompt_hash, model): summary
+                for video_id, prompt_hash, model, summary in rows
+            }
+        except Exception as e:
+            print(f"Error getting summaries: {str(e)}")
+            return {}
+
+    def get_summary_history(self, user_id: int, limit: int = 50) -> list:
+        """Get the user's most recently generated summaries"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT video_id, prompt_hash, language, model, summary, created_at
+                FROM summaries
+                WHERE user_id = ?
+                ORDER BY created_at DESC
+                LIMIT ?
+            ''', (user_id, limit))
+            
+            rows = cursor.fetchall()
+            conn.close()
+            return rows
+        except Exception as e:
+            print(f"Error getting summary history: {str(e)}")
+            return []
+
+    def save_rating(self, video_id: str, search_query: str, model: str, rating: str,
+                    score: int, analysis: dict):
+        """Store a validated rating for a video and query"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT OR REPLACE INTO video_ratings
+                (video_id, search_query, model, rating, score, analysis, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, datetime('now'))
+            ''', (video_id, search_query, model, rating, score, json.dumps(analysis)))
+            
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error saving rating: {str(e)}")
+
+    def get_rating(self, video_id: str, search_query: str):
+        """Get a stored rating as a dict with rating, score and explanation, or None"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT rating, score, analysis FROM video_ratings
+                WHERE video_id = ? AND search_query = ?
+            ''', (video_id, search_query))
+            
+            result = cursor.fetchone()
+            conn.close()
+            
+            if result:
+                return {
+                    'rating': result[0],
+                    'score': result[1],
+                    'explanation': json.loads(result[2])
+                }
+        except Exception as e:
+            print(f"Error getting rating: {str(e)}")
+        return None
+
+    def get_cached_video_queries(self) -> list:
+        """Get distinct (video_id, search_query) pairs from cached search results"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT search_query, videos FROM search_results')
+            rows = cursor.fetchall()
+            conn.close()
+            
+            pairs = []
+            seen = set()
+            for search_query, videos in rows:
+                for video in decode_json_blob(videos):
+                    pair = (video['id'], search_query)
+                    if pair not in seen:
+                        seen.add(pair)
+                        pairs.append(pair)
+            return pairs
+        except Exception as e:
+            print(f"Error getting cached video queries: {str(e)}")
+            return []
+
+    def save_rating_batch(self, batch_id: str, manifest: dict, status: str):
+        """Record a submitted rating batch and its custom_id manifest"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT OR REPLACE INTO rating_batches (batch_id, manifest, status)
+                VALUES (?, ?, ?)
+            ''', (batch_id, json.dumps(manifest), status))
+            
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error saving rating batch: {str(e)}")
+
+    def update_rating_batch_status(self, batch_id: str, status: str):
+        """Update the status of a rating batch"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                UPDATE rating_batches
+                SET status = ?,
+                    completed_at = CASE WHEN ? IN ('ingested', 'failed', 'expired', 'cancelled')
+                                        THEN datetime('now') ELSE completed_at END
+                WHERE batch_id = ?
+            ''', (status, status, batch_id))
+            
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error updating rating batch: {str(e)}")
+
+    def get_pending_rating_batches(self) -> list:
+        """Get (batch_id, manifest) for batches not yet ingested or failed"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT batch_id, manifest FROM rating_batches
+                WHERE status NOT IN ('ingested', 'failed', 'expired', 'cancelled')
+                ORDER BY created_at
+            ''')
+            
+            rows = cursor.fetchall()
+            conn.close()
+            return [(batch_id, json.loads(manifest)) for batch_id, manifest in rows]
+        except Exception as e:
+            print(f"Error getting rating batches: {str(e)}")
+            return []
+
+    def get_ingested_video_ids(self, source_id: str) -> set:
+        """Get IDs of videos already fully processed for a playlist or channel"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT video_id FROM ingestion_progress
+                WHERE source_id = ? AND status IN ('done', 'no_transcript')
+            ''', (source_id,))
+            
+            rows = cursor.fetchall()
+            conn.close()
+            return {row[0] for row in rows}
+        except Exception as e:
+            print(f"Error getting ingestion progress: {str(e)}")
+            return set()
+
+    def save_ingestion_progress(self, source_id: str, video_id: str, status: str):
+        """Record the outcome of processing one video of a playlist or channel"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT OR REPLACE INTO ingestion_progress (source_id, video_id, status, processed_at)
+                VALUES (?, ?, ?, datetime('now'))
+            ''', (source_id, video_id, status))
+            
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error saving ingestion progress: {str(e)}")
+
+    def mark_ingestion_complete(self, source_id: str):
+        """Record that one run processed a source all the way to the end of its playlist"""
+        self.save_ingestion_progress(source_id, INGESTION_COMPLETE_MARKER, 'complete')
+    
+    def is_ingestion_complete(self, source_id: str) -> bool:
+        """Check whether a run has ever processed the whole source"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT 1 FROM ingestion_progress
+                WHERE source_id = ? AND video_id = ? AND status = 'complete'
+            ''', (source_id, INGESTION_COMPLETE_MARKER))
+            
+            result = cursor.fetchone()
+            conn.close()
+            return result is not None
+        except Exception as e:
+            print(f"Error getting ingestion progress: {str(e)}")
+            return False
+    
+    def get_video_signature(self, video_id: str):
+        """Get the cached transcript signature bytes of a video, or None"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('SELECT signature FROM video_signatures WHERE video_id = ?', (video_id,))
+            
+            result = cursor.fetchone()
+            conn.close()
+            
+            if result:
+                return result[0]
+        except Exception as e:
+            print(f"Error getting video signature: {str(e)}")
+        return None
+
+    def save_video_signature(self, video_id: str, signature: bytes):
+        """Cache the transcript signature bytes of a video"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                INSERT OR REPLACE INTO video_signatures (video_id, signature)
+                VALUES (?, ?)
+            ''', (video_id, sqlite3.Binary(signature)))
+            
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Error saving video signature: {str(e)}")
+
+    def delete_in_batches(self, table: str, condition: str, params: tuple = (), batch_size: int = 500,
+                          pause_seconds: float = 0.0) -> int:
+        """Delete rows of table matching condition in bounded batches, committing after each one"""
+        # table and condition come from retention policies in code, never from user input
+        deleted = 0
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            while True:
+                cursor.execute(f'''
+                    DELETE FROM {table} WHERE rowid IN (
+                        SELECT rowid FROM {table} WHERE {condition} LIMIT ?
+                    )
+                ''', (*params, batch_size))
+                conn.commit()
+                deleted += cursor.rowcount
+                if cursor.rowcount < batch_size:
+                    break
+                # Short write transactions with a pause let app requests interleave
+                if pause_seconds:
+                    time.sleep(pause_seconds)
+            
+            conn.close()
+        except Exception as e:
+            print(f"Error pruning {table}: {str(e)}")
+        return deleted
+
+    def incremental_vacuum(self, max_pages: int = 2000, enable: bool = False) -> int:
+        """Return up to max_pages free pages to the filesystem and report how many remain free
+        
+        Databases created before incremental auto-vacuum can only be switched over
+        by a full VACUUM, which locks and rewrites the whole file. That only happens
+        with ``enable``; otherwise nothing is released and a warning is printed.
+        """
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('PRAGMA auto_vacuum')
+            if cursor.fetchone()[0] != 2:
+                if enable:
+                    print("Enabling incremental auto-vacuum (one-off full VACUUM)")
+                    cursor.execute('PRAGMA auto_vacuum = INCREMENTAL')
+                    cursor.execute('VACUUM')
+                else:
+                    print("Warning: incremental auto-vacuum is off for this database, so freed pages "
+                          "were not released. Run retention.py --enable-incremental-vacuum once, "
+                          "off-peak, to switch it on (one full VACUUM).")
+            else:
+                cursor.execute(f'PRAGMA incremental_vacuum({int(max_pages)})')
+                cursor.fetchall()
+            cursor.execute('PRAGMA freelist_count')
+            free_pages = cursor.fetchone()[0]
+            
+            conn.close()
+            return free_pages
+        except Exception as e:
+            print(f"Error vacuuming database: {str(e)}")
+            return None
+
+    def get_table_sizes(self) -> dict:
+        """Get row count and on-disk bytes (None if dbstat is unavailable) for every table"""
+        sizes = {}
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('''
+                SELECT name FROM sqlite_master
+                WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+                ORDER BY name
+            ''')
+            for (table,) in cursor.fetchall():
+                cursor.execute(f'SELECT COUNT(*) FROM {table}')
+                sizes[table] = {'rows': cursor.fetchone()[0], 'bytes': None}
+            
+            # dbstat is an optional SQLite build feature
+            try:
+                cursor.execute('SELECT name, SUM(pgsize) FROM dbstat GROUP BY name')
+                for name, size in cursor.fetchall():
+                    if name in sizes:
+                        sizes[name]['bytes'] = size
+            except sqlite3.OperationalError:
+                pass
+            
+            conn.close()
+        except Exception as e:
+            print(f"Error getting table sizes: {str(e)}")
+        return sizes
+
+    def get_database_size(self) -> dict:
+        """Get the database file size and free page totals in bytes"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute('PRAGMA page_size')
+            page_size = cursor.fetchone()[0]
+            cursor.execute('PRAGMA page_count')
+            page_count = cursor.fetchone()[0]
+            cursor.execute('PRAGMA freelist_count')
+            free_pages = cursor.fetchone()[0]
+            
+            conn.close()
+            return {'total_bytes': page_size * page_count, 'free_bytes': page_size * free_pages}
+        except Exception as e:
+            print(f"Error getting database size: {str(e)}")
+            return {}
@@ -0,0 +1,93 @@
+import re
+import threading
+import zlib
+import numpy as np
+
+# MinHash settings: word 5-shingles, 128 permutations. Two transcripts whose
+# estimated Jaccard similarity is at least DUPLICATE_THRESHOLD are treated as
+# copies of the same video: re-uploads and mirrors with near-identical
+# transcripts. Jaccard similarity is measured against the union of both
+# transcripts, so a short clip or a heavily trimmed cut of a longer video
+# falls far below the threshold and is rated on its own.
+SHINGLE_SIZE = 5
+NUM_PERMUTATIONS = 128
+DUPLICATE_THRESHOLD = 0.8
+# Shingle hashes are processed in chunks to bound memory on long transcripts
+CHUNK_SIZE = 4096
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+_rng = np.random.RandomState(1)
+_PERM_A = _rng.randint(1, 1 << 31, size=NUM_PERMUTATIONS).astype(np.uint64)
+_PERM_B = _rng.randint(0, 1 << 31, size=NUM_PERMUTATIONS).astype(np.uint64)
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+_stats_lock = threading.Lock()
+_stats = {'checked': 0, 'duplicates': 0}
+
+def shingle_hashes(text: str) -> np.ndarray:
+    """Hash every word shingle of a text to a uint32"""
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) < SHINGLE_SIZE:
+        words = words + [''] * (SHINGLE_SIZE - len(words))
+    shingles = {' '.join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)}
+    return np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+def minhash_signature(text: str) -> np.ndarray:
+    """Compute the MinHash signature of a transcript"""
+    hashes = shingle_hashes(text)
+    signature = np.full(NUM_PERMUTATIONS, _MAX_HASH, dtype=np.uint64)
+    for start in range(0, len(hashes), CHUNK_SIZE):
+        chunk = hashes[start:start + CHUNK_SIZE, np.newaxis]
+        permuted = ((chunk * _PERM_A + _PERM_B) % _MERSENNE_PRIME) & _MAX_HASH
+        signature = np.minimum(signature, permuted.min(axis=0))
+    return signature.astype(np.uint32)
+
+def signature_to_bytes(signature: np.ndarray) -> bytes:
+    return signature.astype('<u4').tobytes()
+
+def signature_from_bytes(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype='<u4').astype(np.uint32)
+
+def estimate_similarity(first: np.ndarray, second: np.ndarray) -> float:
+    """Estimate the Jaccard similarity of two transcripts from their signatures"""
+    return float(np.mean(first == second))
+
+class DuplicateIndex:
+    """Signatures of videos already rated in one ranking run
+    
+    Matches re-uploads and mirrors whose transcripts are nearly identical, not
+    clips or excerpts of a longer video.
+    """
+    
+    def __init__(self, threshold: float = DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._videos = []
+        self._signatures = np.empty((0, NUM_PERMUTATIONS), dtype=np.uint32)
+    
+    def find(self, signature: np.ndarray):
+        """Get the most similar indexed video at or above the threshold, or None"""
+        with self._lock:
+            if not self._videos:
+                match = None
+            else:
+                similarities = (self._signatures == signature).mean(axis=1)
+                best = int(similarities.argmax())
+                match = self._videos[best] if similarities[best] >= self.threshold else None
+        with _stats_lock:
+            _stats['checked'] += 1
+            if match is not None:
+                _stats['duplicates'] += 1
+        return match
+    
+    def add(self, video: dict, signature: np.ndarray):
+        with self._lock:
+            self._videos.append(video)
+            self._signatures = np.vstack([self._signatures, signature])
+
+def get_dedup_stats() -> dict:
+    """Get how many videos were checked and how many reused a duplicate's rating"""
+    with _stats_lock:
+        return dict(_stats)
@@ -0,0 +1,128 @@
+"""Bulk ingestion of a YouTube playlist or channel.
+
+Pages through the playlist (or the channel's uploads playlist), fetches
+metadata 50 videos per call, and rates (and optionally summarizes) the videos
+in parallel. Per-video progress is stored in ingestion_progress, so re-runs
+only process videos that haven't been processed yet. Once a run has reached
+the end of a channel's uploads, later runs stop at the first fully known page.
+
+    python ingest.py --channel UCxxxx --query "machine learning" -o channel.jsonl
+    python ingest.py --playlist PLxxxx --summarize Concise
+"""
+import argparse
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from database import DatabaseManager
+from dedup import DuplicateIndex
+from llm_gateway import resolve_route
+from summary_styles import DEFAULT_STYLES, get_style_prompt
+from utils import (
+    build_youtube_client, get_channel_uploads_playlist, iter_playlist_video_ids,
+    get_videos_metadata, rate_video, rating_failed, get_or_generate_summary
+)
+
+def process_video(video: dict, options, duplicate_index=None) -> tuple:
+    """Rate and optionally summarize one video; returns (status, video)"""
+    video['search_query'] = options.query
+    if not rate_video(video, duplicate_index):
+        return 'no_transcript', video
+    if rating_failed(video):
+        # Not recorded or written out, so the next run rates it again
+        print(f"Rating failed for {video['id']}: {video['rating_explanation']}", file=sys.stderr)
+        return 'error', video
+    
+    if options.summarize:
+        summary, _ = get_or_generate_summary(
+            video['id'], get_style_prompt(options.summarize),
+            resolve_route('summary', options.summarize), options.language
+        )
+        video['summary'] = summary
+    return 'done', video
+
+def ingest(options) -> dict:
+    """Process every not-yet-ingested video of the playlist or channel"""
+    youtube = build_youtube_client()
+    if options.channel:
+        source_id = f"channel:{options.channel}"
+        playlist_id = get_channel_uploads_playlist(options.channel, youtube)
+    else:
+        source_id = f"playlist:{options.playlist}"
+        playlist_id = options.playlist
+    
+    db = DatabaseManager()
+    already_done = db.get_ingested_video_ids(source_id)
+    # Until one run has covered the whole source, older pages may still hold unprocessed videos
+    seen_whole_source = db.is_ingestion_complete(source_id)
+    reached_end = True
+    counts = {'done': 0, 'no_transcript': 0, 'error': 0, 'skipped': 0}
+    out = open(options.output, 'a') if options.output else None
+    
+    # Re-uploads within the job reuse the first copy's rating
+    duplicate_index = DuplicateIndex()
+    
+    def handle(video):
+        try:
+            return process_video(video, options, duplicate_index)
+        except Exception as e:
+            print(f"Error processing {video['id']}: {str(e)}", file=sys.stderr)
+            return 'error', video
+    
+    try:
+        with ThreadPoolExecutor(max_workers=options.workers) as executor:
+            for page_ids in iter_playlist_video_ids(playlist_id, youtube):
+                new_ids = [video_id for video_id in page_ids if video_id not in already_done]
+                counts['skipped'] += len(page_ids) - len(new_ids)
+                
+                # Channel uploads are newest first, so once the whole channel was covered,
+                # a fully known page means the rest is known too
+                if options.channel and seen_whole_source and page_ids and not new_ids:
+                    break
+                if options.limit:
+                    remaining = options.limit - counts['done'] - counts['no_transcript'] - counts['error']
+                    if remaining <= 0:
+                        reached_end = False
+                        break
+                    if len(new_ids) > remaining:
+                        reached_end = False
+                    new_ids = new_ids[:remaining]
+                if not new_ids:
+                    continue
+                
+                videos = get_videos_metadata(new_ids, youtube)
+                for status, video in executor.map(handle, videos):
+                    counts[status] += 1
+                    # Errors are not recorded, so the next run retries them
+                    if status != 'error':
+                        db.save_ingestion_progress(source_id, video['id'], status)
+                    if out and status == 'done':
+                        out.write(json.dumps(video) + '\n')
+                        out.flush()
+                print(f"{source_id}: {counts}", file=sys.stderr)
+        
+        # Failed videos are retried by later runs, which only page that far while the source isn't complete
+        if reached_end and not counts['error'] and not seen_whole_source:
+            db.mark_ingestion_complete(source_id)
+    finally:
+        if out:
+            out.close()
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rate and summarize every video of a playlist or channel")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--playlist', help="Playlist ID")
+    source.add_argument('--channel', help="Channel ID")
+    parser.add_argument('--query', default='', help="Topic the videos are rated against")
+    parser.add_argument('--workers', type=int, default=4, help="Videos processed concurrently")
+    parser.add_argument('--limit', type=int, help="Stop after this many newly processed videos")
+    parser.add_argument('--summarize', choices=list(DEFAULT_STYLES), help="Also summarize videos in this style")
+    parser.add_argument('--language', default="English", help="Language recorded with stored summaries")
+    parser.add_argument('-o', '--output', help="Append processed videos to this JSONL file")
+    options = parser.parse_args(argv)
+    
+    counts = ingest(options)
+    print(f"Finished: {counts}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+import threading
+import weakref
+import asyncio
+import time
+from collections import deque
+import config
+from config import (
+    MODEL_ROUTES, MODEL_PRICES,
+    LLM_TEMPERATURE, LLM_TIMEOUT_SECONDS, LLM_CONNECT_TIMEOUT_SECONDS, LLM_MAX_RETRIES
+)
+
+# Connection pool shared by every call, so ratings reuse warm TLS connections
+POOL_MAX_CONNECTIONS = 20
+POOL_MAX_KEEPALIVE_CONNECTIONS = 10
+POOL_KEEPALIVE_EXPIRY_SECONDS = 120
+
+# Only primary-model latencies this recent count towards the SLO check
+SLO_WINDOW_SECONDS = 300
+SLO_MIN_SAMPLES = 3
+
+_client_lock = threading.Lock()
+_sync_client = None
+# Async clients are bound to the event loop they were created on
+_async_clients = weakref.WeakKeyDictionary()
+
+_stats_lock = threading.Lock()
+_primary_latencies = {}  # route -> deque of (timestamp, seconds)
+_route_stats = {}  # route -> aggregated counters
+
+def _http_client_options() -> dict:
+    # httpx and openai are imported on first use to keep app startup fast
+    import httpx
+    return {
+        'limits': httpx.Limits(
+            max_connections=POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=POOL_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=POOL_KEEPALIVE_EXPIRY_SECONDS
+        ),
+        'timeout': httpx.Timeout(LLM_TIMEOUT_SECONDS, connect=LLM_CONNECT_TIMEOUT_SECONDS)
+    }
+
+def get_client():
+    """Get the process-wide OpenAI client"""
+    global _sync_client
+    if _sync_client is None:
+        with _client_lock:
+            if _sync_client is None:
+                import httpx
+                from openai import OpenAI
+                _sync_client = OpenAI(
+                    api_key=config.OPENAI_API_KEY,
+                    max_retries=LLM_MAX_RETRIES,
+                    http_client=httpx.Client(**_http_client_options())
+                )
+    return _sync_client
+
+def get_async_client():
+    """Get the AsyncOpenAI client for the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        import httpx
+        from openai import AsyncOpenAI
+        client = AsyncOpenAI(
+            api_key=config.OPENAI_API_KEY,
+            max_retries=LLM_MAX_RETRIES,
+            http_client=httpx.AsyncClient(**_http_client_options())
+        )
+        _async_clients[loop] = client
+    return client
+
+def resolve_route(task: str, style: str = None) -> str:
+    """Get the route name for a task, preferring a style-specific route if configured"""
+    if style and f"{task}:{style}" in MODEL_ROUTES:
+        return f"{task}:{style}"
+    return task
+
+def get_route_model(route: str) -> str:
+    """Get the configured primary model of a route"""
+    return MODEL_ROUTES[route]['model']
+
+def _primary_over_slo(route: str) -> bool:
+    route_config = MODEL_ROUTES[route]
+    now = time.monotonic()
+    with _stats_lock:
+        samples = _primary_latencies.get(route)
+        if not samples:
+            return False
+        while samples and now - samples[0][0] > SLO_WINDOW_SECONDS:
+            samples.popleft()
+        if len(samples) < SLO_MIN_SAMPLES:
+            return False
+        latencies = sorted(seconds for _, seconds in samples)
+    return latencies[len(latencies) // 2] > route_config['slo_seconds']
+
+def choose_model(route: str) -> str:
+    """Pick the model for a call: the primary, or the fallback while the primary is over its SLO"""
+    route_config = MODEL_ROUTES[route]
+    if route_config.get('fallback') and _primary_over_slo(route):
+        return route_config['fallback']
+    return route_config['model']
+
+def get_cached_tokens(usage) -> int:
+    """Get the prompt tokens served from the provider's prefix cache"""
+    details = getattr(usage, 'prompt_tokens_details', None)
+    if details is None:
+        return 0
+    if isinstance(details, dict):
+        return details.get('cached_tokens') or 0
+    return getattr(details, 'cached_tokens', 0) or 0
+
+def _estimate_cost(model: str, usage) -> float:
+    prompt_price, completion_price = MODEL_PRICES.get(model, (0.0, 0.0))
+    if usage is None:
+        return 0.0
+    # Cached prompt tokens are billed at half the prompt price
+    cached_tokens = get_cached_tokens(usage)
+    prompt_cost = (usage.prompt_tokens - cached_tokens / 2) * prompt_price
+    return (prompt_cost + usage.completion_tokens * completion_price) / 1000
+
+def record_call(route: str, model: str, seconds: float, usage=None, failed: bool = False):
+    """Record latency, token usage and cost of one call on a route"""
+    with _stats_lock:
+        if model == MODEL_ROUTES[route]['model']:
+            _primary_latencies.setdefault(route, deque(maxlen=50)).append((time.monotonic(), seconds))
+        
+        stats = _route_stats.setdefault(route, {
+            'calls': 0,
+            'failures': 0,
+            'fallback_calls': 0,
+            'total_seconds': 0.0,
+            'prompt_tokens': 0,
+            'cached_tokens': 0,
+            'completion_tokens': 0,
+            'cost_usd': 0.0
+        })
+        stats['calls'] += 1
+        stats['total_seconds'] += seconds
+        if failed:
+            stats['failures'] += 1
+        if model != MODEL_ROUTES[route]['model']:
+            stats['fallback_calls'] += 1
+        if usage is not None:
+            stats['prompt_tokens'] += usage.prompt_tokens
+            stats['cached_tokens'] += get_cached_tokens(usage)
+            stats['completion_tokens'] += usage.completion_tokens
+            stats['cost_usd'] += _estimate_cost(model, usage)
+
+def get_route_stats() -> dict:
+    """Get a snapshot of per-route call counts, mean latency, cache hit rate and cost"""
+    with _stats_lock:
+        snapshot = {}
+        for route, stats in _route_stats.items():
+            snapshot[route] = dict(stats)
+            snapshot[route]['mean_seconds'] = stats['total_seconds'] / stats['calls'] if stats['calls'] else 0.0
+            snapshot[route]['cache_hit_rate'] = (
+                stats['cached_tokens'] / stats['prompt_tokens'] if stats['prompt_tokens'] else 0.0
+            )
+        return snapshot
+
+def _request_settings(model: str, overrides: dict) -> dict:
+    settings = {'model': model, 'temperature': LLM_TEMPERATURE}
+    settings.update(overrides)
+    return settings
+
+def chat_completion(route: str, messages: list, **overrides):
+    """Run a chat completion on a route through the shared client"""
+    model = overrides.pop('model', None) or choose_model(route)
+    start = time.monotonic()
+    try:
+        response = get_client().chat.completions.create(
+            messages=messages,
+            **_request_settings(model, overrides)
+        )
+    except Exception:
+        record_call(route, model, time.monotonic() - start, failed=True)
+        raise
+    record_call(route, model, time.monotonic() - start, response.usage)
+    return response
+
+async def async_chat_completion(route: str, messages: list, **overrides):
+    """Run a chat completion on a route through the shared async client"""
+    model = overrides.pop('model', None) or choose_model(route)
+    start = time.monotonic()
+    try:
+        response = await get_async_client().chat.completions.create(
+            messages=messages,
+            **_request_settings(model, overrides)
+        )
+    except Exception:
+        record_call(route, model, time.monotonic() - start, failed=True)
+        raise
+    record_call(route, model, time.monotonic() - start, response.usage)
+    return response
+
+async def async_chat_completion_stream(route: str, messages: list, **overrides):
+    """Stream a chat completion on a route, yielding text deltas as they arrive"""
+    model = overrides.pop('model', None) or choose_model(route)
+    start = time.monotonic()
+    usage = None
+    try:
+        stream = await get_async_client().chat.completions.create(
+            messages=messages,
+            stream=True,
+            # The final chunk then carries token usage for cost accounting
+            stream_options={'include_usage': True},
+            **_request_settings(model, overrides)
+        )
+        async for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+    except Exception:
+        record_call(route, model, time.monotonic() - start, failed=True)
+        raise
+    record_call(route, model, time.monotonic() - start, usage)
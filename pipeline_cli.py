@@ -0,0 +1,127 @@
+"""Headless search, rating and summarization at scale.
+
+Reads queries (or video IDs) one per line from a file or stdin, runs them
+through the same pipeline and caches as the app, and appends one JSON line per
+input to the output file. Inputs already present in the output file are
+skipped, so an interrupted run resumes where it stopped.
+
+    python pipeline_cli.py queries.txt -o results.jsonl --summarize Concise
+    cat ids.txt | python pipeline_cli.py - --videos -o ratings.jsonl
+"""
+import argparse
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import SEARCH_CACHE_MAX_AGE_HOURS
+from database import DatabaseManager
+from llm_gateway import resolve_route
+from summary_styles import DEFAULT_STYLES, get_style_prompt
+from utils import search_videos, get_video_metadata, rate_video, rating_failed, get_or_generate_summary
+
+def read_inputs(path: str) -> list:
+    """Read non-empty, non-comment lines from a file or stdin"""
+    with (sys.stdin if path == '-' else open(path)) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+def load_checkpoint(output_path: str) -> set:
+    """Get the inputs already written to the output file"""
+    done = set()
+    if not os.path.exists(output_path):
+        return done
+    with open(output_path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Partial last line from an interrupted run
+            if record.get('status') == 'ok':
+                done.add(record['input'])
+    return done
+
+def add_summaries(videos: list, style: str, top_k: int, language: str, user_id: int = None):
+    """Attach a summary in the given style to the top_k videos"""
+    prompt_template = get_style_prompt(style)
+    route = resolve_route('summary', style)
+    for video in videos[:top_k]:
+        summary, from_store = get_or_generate_summary(
+            video['id'], prompt_template, route, language, user_id=user_id, is_public=True
+        )
+        video['summary'] = summary
+        video['summary_from_store'] = from_store
+
+def process_query(query: str, options) -> dict:
+    """Search, rank and optionally summarize one query, sharing the app's caches"""
+    db = DatabaseManager()
+    videos = db.get_shared_search_results(query, SEARCH_CACHE_MAX_AGE_HOURS)
+    from_cache = bool(videos)
+    if not from_cache:
+        videos = search_videos(query)
+        # Not cached or checkpointed; a rerun only rates these again, the others' ratings are stored
+        failed_ids = [video['id'] for video in videos or [] if rating_failed(video)]
+        if failed_ids:
+            raise ValueError(f"Rating failed for videos {', '.join(failed_ids)}")
+        if videos:
+            db.save_search_results(None, query, videos)
+    
+    if options.summarize and videos:
+        add_summaries(videos, options.summarize, options.summarize_top, options.language)
+    return {'videos': videos or [], 'from_cache': from_cache}
+
+def process_video(line: str, options) -> dict:
+    """Rate and optionally summarize one video; lines are "video_id" or "video_id<TAB>query" """
+    video_id, _, query = line.partition('\t')
+    video = get_video_metadata(video_id)
+    if not video:
+        raise ValueError(f"No metadata for video {video_id}")
+    video['search_query'] = query
+    
+    if not rate_video(video):
+        raise ValueError(f"No transcript for video {video_id}")
+    if rating_failed(video):
+        raise ValueError(f"Rating failed for video {video_id}: {video['rating_explanation']}")
+    videos = [video]
+    if options.summarize:
+        add_summaries(videos, options.summarize, 1, options.language)
+    return {'videos': videos}
+
+def run(inputs: list, options) -> dict:
+    """Process inputs concurrently and append each result to the output as it completes"""
+    done = load_checkpoint(options.output)
+    pending = [item for item in dict.fromkeys(inputs) if item not in done]
+    print(f"{len(done)} inputs already done, {len(pending)} to process", file=sys.stderr)
+    
+    process = process_video if options.videos else process_query
+    counts = {'ok': 0, 'error': 0}
+    with open(options.output, 'a') as out, ThreadPoolExecutor(max_workers=options.workers) as executor:
+        futures = {executor.submit(process, item, options): item for item in pending}
+        for future in as_completed(futures):
+            item = futures[future]
+            try:
+                record = {'input': item, 'status': 'ok', **future.result()}
+            except Exception as e:
+                print(f"Error processing {item}: {str(e)}", file=sys.stderr)
+                record = {'input': item, 'status': 'error', 'error': str(e)}
+            counts[record['status']] += 1
+            
+            # One flushed line per input is the checkpoint for resuming
+            out.write(json.dumps(record) + '\n')
+            out.flush()
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run queries or videos through the search/rate/summarize pipeline")
+    parser.add_argument('input', help="File with one query (or video ID) per line, '-' for stdin")
+    parser.add_argument('-o', '--output', required=True, help="JSONL output file; also used to resume")
+    parser.add_argument('--videos', action='store_true', help="Inputs are video IDs (optionally '<id>\\t<query>')")
+    parser.add_argument('--workers', type=int, default=4, help="Inputs processed concurrently")
+    parser.add_argument('--summarize', choices=list(DEFAULT_STYLES), help="Also summarize results in this style")
+    parser.add_argument('--summarize-top', type=int, default=3, help="Videos to summarize per query")
+    parser.add_argument('--language', default="English", help="Language recorded with stored summaries")
+    options = parser.parse_args(argv)
+    
+    counts = run(read_inputs(options.input), options)
+    print(f"Finished: {counts['ok']} ok, {counts['error']} failed", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
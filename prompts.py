@@ -0,0 +1,77 @@
+# Prompts are laid out for provider-side prefix caching: static instructions
+# first, then the transcript (shared across queries and styles for a video),
+# and the per-call query or style instruction last. Keep these strings
+# byte-stable; any edit invalidates every cached prefix.
+
+RATING_SYSTEM_PROMPT = """You are a content rating assistant. Analyze the content and return a JSON object.
+Always respond with a valid JSON object in this exact format:
+{
+    "rating": "[S/A/B/C/D]",
+    "score": number between 1-100,
+    "explanation": {
+        "main_reason": "Primary reason for the rating",
+        "strengths": ["List of content strengths"],
+        "weaknesses": ["List of content weaknesses"],
+        "relevance": "How well it matches the search query",
+        "idea_count": "Number of valuable ideas found",
+        "recommendation": "Brief recommendation for viewers"
+    }
+}
+
+Criteria:
+S Tier (Must Watch):
+- Contains 8+ unique, valuable ideas
+- Strong match with search query
+- High-quality, well-structured content
+- Provides unique insights or expert knowledge
+- Comprehensive coverage of the topic
+
+A Tier (Highly Recommended):
+- Contains 6+ valuable ideas
+- Good match with search query
+- Clear and well-presented content
+- Good depth of information
+- Practical examples or demonstrations
+
+B Tier (Worth Watching):
+- Contains 4+ useful ideas
+- Moderate match with search query
+- Decent content organization
+- Basic but solid information
+- Some practical value
+
+C Tier (Optional):
+- Contains 2+ basic ideas
+- Partial match with search query
+- Basic or surface-level content
+- Limited practical value
+- May have some redundant information
+
+D Tier (Skip):
+- Few meaningful ideas
+- Poor match with search query
+- Unclear or disorganized content
+- Very basic or redundant information
+- Little to no practical value"""
+
+SUMMARY_SYSTEM_PROMPT = (
+    "You are a helpful assistant that summarizes YouTube video transcripts. "
+    "The transcript comes first; follow the instructions given after it."
+)
+
+DEFAULT_SUMMARY_INSTRUCTION = "Please summarize this transcript."
+
+def build_rating_messages(transcript: str, query: str) -> list:
+    """Build the chat messages for rating one transcript against a query"""
+    return [
+        {"role": "system", "content": RATING_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Transcript: {transcript}\n\nQuery: {query}"}
+    ]
+
+def build_summary_messages(transcript: str, instruction: str = DEFAULT_SUMMARY_INSTRUCTION) -> list:
+    """Build the chat messages for summarizing a transcript with a style or pattern instruction"""
+    return [
+        {"role": "system", "content": SUMMARY_SYSTEM_PROMPT},
+        {"role": "user", "content": f"Transcript:\n\n{transcript}"},
+        {"role": "user", "content": instruction}
+    ]
@@ -0,0 +1,120 @@
+import json
+import re
+import threading
+from typing import List, TypedDict
+
+RATING_TIERS = ('S', 'A', 'B', 'C', 'D')
+
+class RatingExplanation(TypedDict):
+    main_reason: str
+    strengths: List[str]
+    weaknesses: List[str]
+    relevance: str
+    idea_count: str
+    recommendation: str
+
+class Rating(TypedDict):
+    rating: str
+    score: int
+    explanation: RatingExplanation
+
+class RatingParseError(ValueError):
+    """Raised when a rating completion can't be turned into a valid Rating"""
+
+_FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+_stats_lock = threading.Lock()
+_parse_stats = {
+    'completions': 0,
+    'parse_failures': 0,
+    'repairs': 0,
+    'repair_failures': 0
+}
+
+def extract_json_object(text: str) -> dict:
+    """Extract the first JSON object from a completion, tolerating code fences and stray text"""
+    if not text:
+        raise RatingParseError("Empty completion")
+    
+    fenced = _FENCE_PATTERN.search(text)
+    if fenced:
+        text = fenced.group(1)
+    
+    start = text.find('{')
+    if start == -1:
+        raise RatingParseError("No JSON object found in completion")
+    
+    try:
+        obj, _ = json.JSONDecoder().raw_decode(text[start:])
+    except json.JSONDecodeError as e:
+        raise RatingParseError(f"Invalid JSON: {e}")
+    
+    if not isinstance(obj, dict):
+        raise RatingParseError("Completion JSON is not an object")
+    return obj
+
+def _as_text_list(value, field: str) -> List[str]:
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, list):
+        return [str(item) for item in value]
+    raise RatingParseError(f"'{field}' must be a list of strings")
+
+def validate_rating(data: dict) -> Rating:
+    """Validate a parsed rating against the schema, normalizing harmless variations"""
+    rating = str(data.get('rating', '')).strip().strip('[]').upper()
+    if rating not in RATING_TIERS:
+        raise RatingParseError(f"'rating' must be one of {'/'.join(RATING_TIERS)}, got {data.get('rating')!r}")
+    
+    try:
+        score = int(round(float(data.get('score'))))
+    except (TypeError, ValueError):
+        raise RatingParseError(f"'score' must be a number, got {data.get('score')!r}")
+    if not 0 <= score <= 100:
+        raise RatingParseError(f"'score' must be between 0 and 100, got {score}")
+    
+    explanation = data.get('explanation')
+    if not isinstance(explanation, dict):
+        raise RatingParseError("'explanation' must be an object")
+    
+    missing = [key for key in RatingExplanation.__annotations__ if key not in explanation]
+    if missing:
+        raise RatingParseError(f"'explanation' is missing {', '.join(missing)}")
+    
+    return {
+        'rating': rating,
+        'score': score,
+        'explanation': {
+            'main_reason': str(explanation['main_reason']),
+            'strengths': _as_text_list(explanation['strengths'], 'strengths'),
+            'weaknesses': _as_text_list(explanation['weaknesses'], 'weaknesses'),
+            'relevance': str(explanation['relevance']),
+            'idea_count': str(explanation['idea_count']),
+            'recommendation': str(explanation['recommendation'])
+        }
+    }
+
+def parse_rating(text: str) -> Rating:
+    """Extract and validate a rating from a completion"""
+    return validate_rating(extract_json_object(text))
+
+def record_parse_result(parse_failed: bool = False, repaired: bool = None):
+    """Record the outcome of parsing one rating completion
+    
+    ``repaired`` is None when no repair was attempted.
+    """
+    with _stats_lock:
+        _parse_stats['completions'] += 1
+        if parse_failed:
+            _parse_stats['parse_failures'] += 1
+        if repaired is not None:
+            _parse_stats['repairs'] += 1
+            if not repaired:
+                _parse_stats['repair_failures'] += 1
+
+def get_parse_stats() -> dict:
+    """Get rating parse counters and the first-attempt failure rate"""
+    with _stats_lock:
+        stats = dict(_parse_stats)
+    stats['failure_rate'] = stats['parse_failures'] / stats['completions'] if stats['completions'] else 0.0
+    return stats
@@ -0,0 +1,113 @@
+"""Retention and compaction for tables that grow with every search.
+
+Deletes rows the app no longer reads (expired saved results and search hits,
+superseded search state, stale user state, finished rating batches, expired
+login sessions) in small write batches, releases the freed pages with an
+incremental vacuum and reports table sizes.
+
+    python retention.py                # one pruning run now
+    python retention.py --dry-run      # only report table sizes
+    python retention.py --schedule     # run once per night during off-peak hours
+    python retention.py --enable-incremental-vacuum   # one-off switch of a database created earlier
+"""
+import argparse
+import time
+from datetime import datetime
+from config import (
+    RETENTION_USER_STATE_DAYS, RETENTION_SEARCH_RESULTS_DAYS, RETENTION_SEARCH_HITS_DAYS, RETENTION_SEARCH_STATE_DAYS,
+    RETENTION_RATING_BATCHES_DAYS, RETENTION_BATCH_SIZE, RETENTION_PAUSE_SECONDS,
+    RETENTION_VACUUM_PAGES
+)
+from database import DatabaseManager
+from cache_warmer import is_off_peak
+
+def get_retention_policies() -> list:
+    """Return (name, table, condition, params) for every pruning rule"""
+    return [
+        ('expired search results', 'search_results',
+         "timestamp < datetime('now', ?)", (f'-{RETENTION_SEARCH_RESULTS_DAYS} days',)),
+        ('expired search hits', 'search_hits',
+         "searched_at < datetime('now', ?)", (f'-{RETENTION_SEARCH_HITS_DAYS} days',)),
+        # Only the newest search_state row per user is ever read
+        ('superseded search state', 'search_state',
+         'id NOT IN (SELECT MAX(id) FROM search_state GROUP BY user_id)', ()),
+        ('expired search state', 'search_state',
+         "created_at < datetime('now', ?)", (f'-{RETENTION_SEARCH_STATE_DAYS} days',)),
+        ('expired user state', 'user_state',
+         "updated_at < datetime('now', ?)", (f'-{RETENTION_USER_STATE_DAYS} days',)),
+        ('finished rating batches', 'rating_batches',
+         "status IN ('ingested', 'failed', 'expired', 'cancelled') AND created_at < datetime('now', ?)",
+         (f'-{RETENTION_RATING_BATCHES_DAYS} days',)),
+        ('expired login sessions', 'auth_sessions', "expires_at < datetime('now')", ()),
+    ]
+
+def print_table_sizes(db: DatabaseManager):
+    """Print row counts and on-disk size of every table"""
+    for table, size in db.get_table_sizes().items():
+        size_text = f"{size['bytes'] / 1024:.0f} KiB" if size['bytes'] is not None else "n/a"
+        print(f"  {table:<20} {size['rows']:>10} rows  {size_text:>12}")
+    db_size = db.get_database_size()
+    if db_size:
+        print(f"  database file: {db_size['total_bytes'] / 1024:.0f} KiB "
+              f"({db_size['free_bytes'] / 1024:.0f} KiB free)")
+
+def run_retention(batch_size: int = RETENTION_BATCH_SIZE, pause_seconds: float = RETENTION_PAUSE_SECONDS,
+                  vacuum_pages: int = RETENTION_VACUUM_PAGES, dry_run: bool = False,
+                  enable_incremental_vacuum: bool = False) -> dict:
+    """Apply all retention policies, vacuum incrementally and return deleted row counts"""
+    db = DatabaseManager()
+    print("Table sizes before:")
+    print_table_sizes(db)
+    if dry_run:
+        return {}
+    
+    counts = {}
+    for name, table, condition, params in get_retention_policies():
+        started = time.time()
+        counts[name] = db.delete_in_batches(table, condition, params, batch_size, pause_seconds)
+        print(f"Pruned {counts[name]} rows of {name} in {time.time() - started:.1f}s")
+    
+    free_pages = db.incremental_vacuum(vacuum_pages, enable=enable_incremental_vacuum)
+    if free_pages:
+        print(f"{free_pages} free pages left for the next run")
+    
+    print("Table sizes after:")
+    print_table_sizes(db)
+    return counts
+
+def run_schedule(interval_seconds: int = 900, **retention_kwargs):
+    """Prune once per off-peak window, checking every interval_seconds"""
+    last_run_date = None
+    while True:
+        now = datetime.now()
+        if is_off_peak(now) and last_run_date != now.date():
+            counts = run_retention(**retention_kwargs)
+            print(f"Retention run finished: {counts}")
+            last_run_date = now.date()
+        time.sleep(interval_seconds)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prune stale rows and compact the database")
+    parser.add_argument('--batch-size', type=int, default=RETENTION_BATCH_SIZE,
+                        help="Rows deleted per write transaction")
+    parser.add_argument('--vacuum-pages', type=int, default=RETENTION_VACUUM_PAGES,
+                        help="Free pages released per run")
+    parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                        help="Switch an older database to incremental vacuum (one full VACUUM that locks the file)")
+    parser.add_argument('--dry-run', action='store_true', help="Only report table sizes")
+    parser.add_argument('--schedule', action='store_true', help="Keep running and prune once per off-peak window")
+    args = parser.parse_args(argv)
+    
+    retention_kwargs = {
+        'batch_size': args.batch_size,
+        'vacuum_pages': args.vacuum_pages,
+        'dry_run': args.dry_run,
+        'enable_incremental_vacuum': args.enable_incremental_vacuum
+    }
+    if args.schedule:
+        run_schedule(**retention_kwargs)
+    else:
+        print(run_retention(**retention_kwargs))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+import json
+import hashlib
+import streamlit as st
+from database import DatabaseManager
+
+# Session keys that survive across browser sessions
+# (summaries are persisted server-side in the summaries table instead)
+PERSISTED_KEYS = ['last_search_query', 'current_sort', 'rating_filter', 'search_history']
+
+# Session key holding the fingerprint of each persisted key as last written
+SNAPSHOT_KEY = '_persisted_fingerprints'
+
+def _fingerprint(value) -> str:
+    """Stable fingerprint of a JSON-serializable value"""
+    return hashlib.sha1(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+def _take_snapshot():
+    st.session_state[SNAPSHOT_KEY] = {
+        key: _fingerprint(st.session_state.get(key)) for key in PERSISTED_KEYS
+    }
+
+def restore_session(user_id: int):
+    """Load persisted fields into session state; call once per login"""
+    db = DatabaseManager()
+    fields = db.get_session_fields(user_id)
+    
+    if not fields:
+        # Fall back to the legacy full-state snapshot for users saved before session_fields
+        legacy_state = db.get_search_state(user_id) or {}
+        fields = {key: legacy_state[key] for key in PERSISTED_KEYS if key in legacy_state}
+    
+    st.session_state.update(fields)
+    _take_snapshot()
+
+def get_dirty_fields() -> dict:
+    """Return persisted fields whose value changed since the last restore or save"""
+    snapshot = st.session_state.get(SNAPSHOT_KEY, {})
+    return {
+        key: st.session_state.get(key)
+        for key in PERSISTED_KEYS
+        if snapshot.get(key) != _fingerprint(st.session_state.get(key))
+    }
+
+def persist_session(user_id: int):
+    """Write only the changed fields; no database I/O when nothing changed"""
+    dirty_fields = get_dirty_fields()
+    if not dirty_fields:
+        return
+    
+    db = DatabaseManager()
+    if not db.save_session_fields(user_id, dirty_fields):
+        # Keep the fields dirty so the next rerun retries the write
+        return
+    
+    snapshot = st.session_state.setdefault(SNAPSHOT_KEY, {})
+    for key, value in dirty_fields.items():
+        snapshot[key] = _fingerprint(value)
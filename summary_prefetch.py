@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import deque, OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from config import (
+    PREFETCH_STYLE, PREFETCH_TIERS, PREFETCH_TOP_K, PREFETCH_WORKERS, PREFETCH_HOURLY_BUDGET,
+    PREFETCH_TRACKED_KEYS
+)
+from database import DatabaseManager
+from llm_gateway import resolve_route, choose_model
+from summary_styles import get_style_prompt, get_prompt_hash
+from utils import get_or_generate_summary
+
+_executor = ThreadPoolExecutor(max_workers=PREFETCH_WORKERS, thread_name_prefix="summary-prefetch")
+
+_lock = threading.Lock()
+_active_jobs = {}  # user_id -> cancel Event of the user's current prefetch
+_budget_window = deque()  # timestamps of prefetch generations in the last hour
+# (video_id, prompt_hash, language, model) generated by the prefetcher -> whether it was viewed since,
+# bounded to the most recent PREFETCH_TRACKED_KEYS so a long-running process doesn't grow it forever
+_prefetched_keys = OrderedDict()
+_in_flight = {}  # (video_id, prompt_hash, language, model) -> Future of the summary being generated
+_stats = {
+    'queued': 0,
+    'generated': 0,
+    'already_stored': 0,
+    'cancelled': 0,
+    'over_budget': 0,
+    'used': 0,
+    'joined': 0
+}
+
+def _take_budget() -> bool:
+    """Reserve one generation from the hourly budget"""
+    now = time.monotonic()
+    with _lock:
+        while _budget_window and now - _budget_window[0] > 3600:
+            _budget_window.popleft()
+        if len(_budget_window) >= PREFETCH_HOURLY_BUDGET:
+            return False
+        _budget_window.append(now)
+        return True
+
+def _count(key: str):
+    with _lock:
+        _stats[key] += 1
+
+def _prefetch_summary(cancel_event, user_id: int, video_id: str, language: str):
+    if cancel_event.is_set():
+        _count('cancelled')
+        return
+    
+    prompt_template = get_style_prompt(PREFETCH_STYLE)
+    prompt_hash = get_prompt_hash(prompt_template)
+    route = resolve_route('summary', PREFETCH_STYLE)
+    # Chosen once, so the lookup, the generation and the stored row agree on the model
+    model = choose_model(route)
+    
+    db = DatabaseManager()
+    if db.get_summary(user_id, video_id, prompt_hash, language, model) is not None:
+        _count('already_stored')
+        return
+    key = (video_id, prompt_hash, language, model)
+    with _lock:
+        if cancel_event.is_set():
+            _stats['cancelled'] += 1
+            return
+        if key in _in_flight:
+            # Another user's prefetch is already writing the same shared summary
+            _stats['already_stored'] += 1
+            return
+        # A click on Summarize for this key now waits for this generation instead of starting another
+        future = _in_flight[key] = Future()
+    
+    summary = None
+    try:
+        # Budget is only spent by the call that registered the generation; a click
+        # waiting on it gets None when over budget and generates the summary itself
+        if not _take_budget():
+            _count('over_budget')
+            return
+        
+        # Default styles are public, so the prefetched summary is shared with every user
+        summary, from_store = get_or_generate_summary(
+            video_id, prompt_template, route, language, user_id=user_id, is_public=True, model=model
+        )
+        if summary is None or from_store:
+            return
+        
+        with _lock:
+            _prefetched_keys[key] = False
+            _prefetched_keys.move_to_end(key)
+            while len(_prefetched_keys) > PREFETCH_TRACKED_KEYS:
+                _prefetched_keys.popitem(last=False)
+            _stats['generated'] += 1
+    finally:
+        with _lock:
+            _in_flight.pop(key, None)
+        future.set_result(summary)
+
+def start_prefetch(user_id: int, videos: list, language: str):
+    """Queue default-style summaries for the user's top-ranked results
+    
+    Any prefetch still running for the user's previous search is cancelled.
+    """
+    cancel_prefetch(user_id)
+    
+    targets = [v for v in videos if v.get('rating_tier') in PREFETCH_TIERS][:PREFETCH_TOP_K]
+    if not targets:
+        return
+    
+    cancel_event = threading.Event()
+    with _lock:
+        _active_jobs[user_id] = cancel_event
+        _stats['queued'] += len(targets)
+    for video in targets:
+        _executor.submit(_prefetch_summary, cancel_event, user_id, video['id'], language)
+
+def cancel_prefetch(user_id: int):
+    """Cancel the user's pending prefetch; generations already in flight still finish"""
+    with _lock:
+        cancel_event = _active_jobs.pop(user_id, None)
+    if cancel_event:
+        cancel_event.set()
+
+def wait_for_prefetch(video_id: str, prompt_hash: str, language: str, model: str, timeout: float = None):
+    """Wait for a prefetch of this summary that is already generating
+    
+    Returns the summary, or None when no prefetch is in flight for it or the
+    prefetch failed, in which case the caller generates the summary itself.
+    """
+    with _lock:
+        future = _in_flight.get((video_id, prompt_hash, language, model))
+    if future is None:
+        return None
+    _count('joined')
+    try:
+        return future.result(timeout=timeout)
+    except Exception as e:
+        print(f"Error waiting for prefetched summary: {str(e)}")
+        return None
+
+def record_summary_view(video_id: str, prompt_hash: str, language: str, model: str):
+    """Record that a summary was shown, counting prefetched summaries as used once"""
+    key = (video_id, prompt_hash, language, model)
+    with _lock:
+        if _prefetched_keys.get(key) is False:
+            _prefetched_keys[key] = True
+            _stats['used'] += 1
+
+def get_prefetch_stats() -> dict:
+    """Get prefetch counters and the hit rate (share of generated summaries later viewed)"""
+    with _lock:
+        stats = dict(_stats)
+    stats['hit_rate'] = stats['used'] / stats['generated'] if stats['generated'] else 0.0
+    return stats
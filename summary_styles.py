@@ -1,4 +1,5 @@
 from typing import Dict
+import hashlib
 
 DEFAULT_STYLES = {
     "Concise": {
@@ -33,4 +34,8 @@ def get_style_description(style_name: str, custom_styles: Dict = None) -> str:
     if custom_styles:
         all_styles.update(custom_styles)
     
-    return all_styles.get(style_name, DEFAULT_STYLES["Concise"])["description"] 
\ No newline at end of file
+    return all_styles.get(style_name, DEFAULT_STYLES["Concise"])["description"]
+
+def get_prompt_hash(prompt_template: str) -> str:
+    """Get a stable hash of a prompt template, used to key stored summaries."""
+    return hashlib.sha256(prompt_template.encode()).hexdigest()[:16]
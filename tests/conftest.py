@@ -0,0 +1,20 @@
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+# Settings are read at call time; nothing in the tests reaches the real APIs
+os.environ.setdefault('OPENAI_API_KEY', 'test')
+os.environ.setdefault('YOUTUBE_API_KEY', 'test')
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """Point DatabaseManager at a fresh SQLite file for one test"""
+    path = str(tmp_path / 'test.db')
+    monkeypatch.setenv('DB_PATH', path)
+    from database import init_db
+    init_db(path)
+    return path
@@ -0,0 +1,68 @@
+import asyncio
+import re
+
+import pytest
+
+import api_server
+
+def call(path, headers=None, method='GET'):
+    """Run one request through the ASGI app and return the messages it sent"""
+    messages = []
+    
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+    
+    async def send(message):
+        messages.append(message)
+    
+    path, _, query_string = path.partition('?')
+    scope = {
+        'type': 'http', 'method': method, 'path': path, 'query_string': query_string.encode(),
+        'headers': [(name.encode(), value.encode()) for name, value in (headers or {}).items()],
+    }
+    asyncio.run(api_server.app(scope, receive, send))
+    return messages
+
+def status_of(messages):
+    return next(message['status'] for message in messages if message['type'] == 'http.response.start')
+
+@pytest.fixture(autouse=True)
+def fresh_request_slots(monkeypatch):
+    # The semaphore is bound to the loop it was first used on; each call() runs a new loop
+    monkeypatch.setattr(api_server, '_request_slots', None)
+    monkeypatch.delenv('API_SERVICE_KEY', raising=False)
+
+@pytest.mark.parametrize('if_none_match, expected', [
+    ('{etag}', 304),
+    ('W/{etag}', 304),
+    ('"other", {etag}', 304),
+    ('*', 304),
+    ('"other"', 200),
+    ('"{bare}"', 200),
+])
+def test_if_none_match(if_none_match, expected):
+    etag = dict(call('/health')[0]['headers'])[b'etag'].decode()
+    header = if_none_match.format(etag=etag, bare=etag.strip('"')[:8])
+    
+    assert status_of(call('/health', {'if-none-match': header})) == expected
+
+def test_non_ascii_api_key_is_rejected(monkeypatch):
+    monkeypatch.setenv('API_SERVICE_KEY', 'secret')
+    
+    assert status_of(call('/health', {'x-api-key': 'sécret'})) == 401
+    assert status_of(call('/health', {'x-api-key': 'secret'})) == 200
+
+def test_stream_failure_after_start_only_ends_body(monkeypatch):
+    async def chunks():
+        yield b'data: "first"\n\n'
+        raise RuntimeError("upstream closed")
+    
+    async def handle_summary(request, video_id):
+        return api_server.StreamingBody(chunks(), 'text/event-stream')
+    
+    monkeypatch.setattr(api_server, 'ROUTES', [('GET', re.compile(r'^/stream/(\w+)$'), handle_summary)])
+    messages = call('/stream/abc123')
+    
+    assert [message['type'] for message in messages].count('http.response.start') == 1
+    assert status_of(messages) == 200
+    assert messages[-1] == {'type': 'http.response.body', 'body': b''}
@@ -0,0 +1,121 @@
+import json
+
+from batch_rating import LocalBatchBackend, submit_rating_batches, poll_rating_batches
+from database import DatabaseManager
+
+VALID_RATING = {
+    'rating': 'A',
+    'score': 82,
+    'explanation': {
+        'main_reason': "Clear walkthrough",
+        'strengths': ["Concrete examples"],
+        'weaknesses': ["Long intro"],
+        'relevance': "On topic",
+        'idea_count': "6",
+        'recommendation': "Watch"
+    }
+}
+
+class CountingBackend(LocalBatchBackend):
+    """Local backend that records which batches were polled"""
+    def __init__(self, responder):
+        super().__init__(responder)
+        self.polled = []
+    
+    def poll(self, batch_id):
+        self.polled.append(batch_id)
+        return super().poll(batch_id)
+
+def make_items(*video_ids, query='python tutorial'):
+    return [{'video_id': video_id, 'search_query': query, 'transcript': f"transcript of {video_id}"}
+            for video_id in video_ids]
+
+def respond_by_video(replies):
+    """Responder that picks the reply by which video's transcript is in the prompt"""
+    def responder(body):
+        prompt = json.dumps(body['messages'])
+        return next(reply for video_id, reply in replies.items() if f"transcript of {video_id}" in prompt)
+    return responder
+
+def test_valid_rating_is_stored(db_path):
+    backend = LocalBatchBackend(respond_by_video({'vid_valid': json.dumps(VALID_RATING)}))
+    
+    batch_ids = submit_rating_batches(make_items('vid_valid'), backend)
+    totals = poll_rating_batches(backend, batch_ids=batch_ids)
+    
+    assert totals == {'stored': 1, 'failed': 0}
+    stored = DatabaseManager().get_rating('vid_valid', 'python tutorial')
+    assert stored['rating'] == 'A'
+    assert stored['score'] == 82
+    assert stored['explanation']['main_reason'] == "Clear walkthrough"
+
+def test_malformed_output_counts_as_failed(db_path):
+    backend = LocalBatchBackend(respond_by_video({
+        'vid_valid': json.dumps(VALID_RATING),
+        'vid_invalid': "Sorry, I can't rate this video.",
+    }))
+    
+    batch_ids = submit_rating_batches(make_items('vid_valid', 'vid_invalid'), backend)
+    # A corrupt line in the output file fails on its own without losing the rest
+    backend.outputs[batch_ids[0]] += '\n{"custom_id": "truncated'
+    totals = poll_rating_batches(backend, batch_ids=batch_ids)
+    
+    assert totals == {'stored': 1, 'failed': 2}
+    db = DatabaseManager()
+    assert db.get_rating('vid_valid', 'python tutorial') is not None
+    assert db.get_rating('vid_invalid', 'python tutorial') is None
+
+def test_ingested_batch_is_skipped_on_repoll(db_path):
+    backend = CountingBackend(respond_by_video({'vid_valid': json.dumps(VALID_RATING)}))
+    batch_ids = submit_rating_batches(make_items('vid_valid'), backend)
+    
+    first = poll_rating_batches(backend)
+    second = poll_rating_batches(backend)
+    
+    assert first == {'stored': 1, 'failed': 0}
+    assert second == {'stored': 0, 'failed': 0}
+    assert backend.polled == batch_ids
+    assert DatabaseManager().get_pending_rating_batches() == []
+
+def test_batch_from_earlier_process_is_marked_expired(db_path):
+    DatabaseManager().save_rating_batch('local-batch-leftover', {'x-1': ['x', '']}, 'submitted')
+    
+    totals = poll_rating_batches(LocalBatchBackend(lambda body: ''))
+    
+    assert totals == {'stored': 0, 'failed': 0}
+    assert DatabaseManager().get_pending_rating_batches() == []
+
+def test_local_poll_leaves_endpoint_batches_alone(db_path):
+    DatabaseManager().save_rating_batch('batch_abc123', {'x-1': ['x', '']}, 'submitted')
+    backend = CountingBackend(lambda body: '')
+    
+    poll_rating_batches(backend)
+    
+    assert backend.polled == []
+    assert [batch_id for batch_id, _ in DatabaseManager().get_pending_rating_batches()] == ['batch_abc123']
+
+def test_poll_error_does_not_stop_other_batches(db_path):
+    class FlakyBackend(LocalBatchBackend):
+        def poll(self, batch_id):
+            if batch_id == 'local-batch-broken':
+                raise RuntimeError("connection reset")
+            return super().poll(batch_id)
+    
+    backend = FlakyBackend(respond_by_video({'vid_valid': json.dumps(VALID_RATING)}))
+    DatabaseManager().save_rating_batch('local-batch-broken', {'x-1': ['x', '']}, 'submitted')
+    submit_rating_batches(make_items('vid_valid'), backend)
+    
+    totals = poll_rating_batches(backend)
+    
+    assert totals == {'stored': 1, 'failed': 0}
+    assert [batch_id for batch_id, _ in DatabaseManager().get_pending_rating_batches()] == ['local-batch-broken']
+
+def test_chunks_split_by_encoded_size():
+    from batch_rating import build_batch_requests
+    items = make_items(*(f"vid_{index}" for index in range(6)))
+    one_request = len(build_batch_requests(items[:1])[0][0].encode()) + 1
+    
+    chunks = build_batch_requests(items, max_bytes=one_request * 2)
+    
+    assert [len(manifest) for _, manifest in chunks] == [2, 2, 2]
+    assert all(len(jsonl_text.encode()) <= one_request * 2 for jsonl_text, _ in chunks)
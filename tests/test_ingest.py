@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+import ingest
+
+class FakeChannel:
+    """Uploads playlist served in pages, newest first, recording the pages fetched"""
+    def __init__(self, video_ids, page_size=2):
+        self.page_size = page_size
+        self.set_uploads(video_ids)
+        self.pages_fetched = 0
+    
+    def set_uploads(self, video_ids):
+        self.pages = [video_ids[start:start + self.page_size] for start in range(0, len(video_ids), self.page_size)]
+    
+    def iter_pages(self, playlist_id, youtube=None):
+        for page in self.pages:
+            self.pages_fetched += 1
+            yield list(page)
+
+def install_fakes(monkeypatch, channel, processed, failing=()):
+    def rate(video, duplicate_index=None):
+        processed.append(video['id'])
+        video['rating_explanation'] = 'Error generating rating: timeout' if video['id'] in failing else 'Rated'
+        video['rating_analysis'] = None if video['id'] in failing else {'main_reason': 'Rated'}
+        return video
+    
+    monkeypatch.setattr(ingest, 'build_youtube_client', lambda: None)
+    monkeypatch.setattr(ingest, 'get_channel_uploads_playlist', lambda channel_id, youtube=None: 'UUfake')
+    monkeypatch.setattr(ingest, 'iter_playlist_video_ids', channel.iter_pages)
+    monkeypatch.setattr(ingest, 'get_videos_metadata',
+                        lambda video_ids, youtube=None: [{'id': video_id} for video_id in video_ids])
+    monkeypatch.setattr(ingest, 'rate_video', rate)
+
+def options(limit=None):
+    return SimpleNamespace(channel='UCfake', playlist=None, query='', workers=2, limit=limit,
+                           summarize=None, language='English', output=None)
+
+def test_limited_runs_reach_older_pages(db_path, monkeypatch):
+    channel = FakeChannel(['v6', 'v5', 'v4', 'v3', 'v2', 'v1'])
+    processed = []
+    install_fakes(monkeypatch, channel, processed)
+    
+    # First run stops at the limit after the newest videos
+    first = ingest.ingest(options(limit=3))
+    assert first['done'] == 3
+    assert processed == ['v6', 'v5', 'v4']
+    
+    # Page 1 is now fully known, but the channel was never covered, so the run keeps paging
+    second = ingest.ingest(options(limit=3))
+    assert second['done'] == 3
+    assert second['skipped'] == 3
+    assert processed[3:] == ['v3', 'v2', 'v1']
+
+def test_complete_channel_stops_at_first_known_page(db_path, monkeypatch):
+    channel = FakeChannel(['v6', 'v5', 'v4', 'v3', 'v2', 'v1'])
+    processed = []
+    install_fakes(monkeypatch, channel, processed)
+    ingest.ingest(options())
+    assert sorted(processed) == ['v1', 'v2', 'v3', 'v4', 'v5', 'v6']
+    
+    # A new upload shifts the pages; only it is processed, and paging stops at the next known page
+    channel.set_uploads(['v7', 'v6', 'v5', 'v4', 'v3', 'v2', 'v1'])
+    channel.pages_fetched = 0
+    counts = ingest.ingest(options())
+    assert processed[6:] == ['v7']
+    assert counts['done'] == 1
+    assert channel.pages_fetched == 2
+
+def test_limited_run_does_not_mark_channel_complete(db_path, monkeypatch):
+    from database import DatabaseManager
+    channel = FakeChannel(['v4', 'v3', 'v2', 'v1'])
+    install_fakes(monkeypatch, channel, [])
+    
+    # The limit truncates the last page, so older videos are still missing
+    ingest.ingest(options(limit=3))
+    assert not DatabaseManager().is_ingestion_complete('channel:UCfake')
+    
+    ingest.ingest(options(limit=3))
+    assert DatabaseManager().is_ingestion_complete('channel:UCfake')
+
+def test_failed_rating_is_retried(db_path, monkeypatch):
+    from database import DatabaseManager
+    channel = FakeChannel(['v3', 'v2', 'v1'])
+    processed = []
+    install_fakes(monkeypatch, channel, processed, failing={'v2'})
+    
+    counts = ingest.ingest(options())
+    assert counts['done'] == 2
+    assert counts['error'] == 1
+    assert DatabaseManager().get_ingested_video_ids('channel:UCfake') == {'v3', 'v1'}
+    assert not DatabaseManager().is_ingestion_complete('channel:UCfake')
+    
+    install_fakes(monkeypatch, channel, processed)
+    counts = ingest.ingest(options())
+    assert processed[3:] == ['v2']
+    assert DatabaseManager().is_ingestion_complete('channel:UCfake')
@@ -0,0 +1,32 @@
+import sqlite3
+
+from database import DatabaseManager
+
+def test_cached_searches_count_towards_popularity(db_path):
+    db = DatabaseManager()
+    # Only the first user's search missed the cache and saved results
+    db.save_search_results(1, 'rust async', [{'id': 'v1'}])
+    for user_id in (1, 2, 3):
+        db.record_search_hit(user_id, 'rust async')
+    db.save_search_results(4, 'go generics', [{'id': 'v2'}])
+    db.record_search_hit(4, 'go generics')
+    
+    assert db.get_popular_queries() == [('rust async', 3), ('go generics', 1)]
+
+def test_anonymous_hits_break_ties(db_path):
+    db = DatabaseManager()
+    db.record_search_hit(1, 'rust async')
+    db.record_search_hit(2, 'go generics')
+    db.record_search_hit(None, 'go generics')
+    
+    assert db.get_popular_queries() == [('go generics', 1), ('rust async', 1)]
+
+def test_old_hits_are_not_counted(db_path):
+    db = DatabaseManager()
+    db.record_search_hit(1, 'rust async')
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE search_hits SET searched_at = datetime('now', '-40 days')")
+    conn.commit()
+    conn.close()
+    
+    assert db.get_popular_queries(days=30) == []
@@ -0,0 +1,64 @@
+import threading
+import time
+
+import pytest
+
+import utils
+
+def make_videos(*video_ids):
+    return [{'id': video_id, 'views': 0, 'likes': 0, 'statistics_updated_at': 0} for video_id in video_ids]
+
+def slow_statistics(calls, delay=0.3):
+    def get_videos_statistics(video_ids, youtube=None):
+        calls.append(list(video_ids))
+        time.sleep(delay)
+        return {video_id: (100, 10) for video_id in video_ids}
+    return get_videos_statistics
+
+def test_refreshes_of_different_queries_run_in_parallel(db_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(utils, 'get_videos_statistics', slow_statistics(calls))
+    first, second = make_videos('a1', 'a2'), make_videos('b1')
+    
+    threads = [
+        threading.Thread(target=utils.refresh_video_statistics, args=(first, 'query a')),
+        threading.Thread(target=utils.refresh_video_statistics, args=(second, 'query b')),
+    ]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    # Neither refresh waited for the other's network call
+    assert time.monotonic() - started < 0.55
+    assert len(calls) == 2
+    assert [video['views'] for video in first + second] == [100, 100, 100]
+
+def test_query_being_refreshed_is_not_fetched_twice(db_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(utils, 'get_videos_statistics', slow_statistics(calls))
+    videos = make_videos('a1', 'a2')
+    
+    thread = threading.Thread(target=utils.refresh_video_statistics, args=(videos, 'query a'))
+    thread.start()
+    time.sleep(0.1)
+    # Another session showing the same results keeps the current counts instead of waiting
+    assert utils.refresh_video_statistics(videos, 'query a') == 0
+    thread.join()
+    
+    assert len(calls) == 1
+    assert utils.refresh_video_statistics(videos, 'query a') == 0
+
+def test_failed_refresh_is_retried(db_path, monkeypatch):
+    def failing(video_ids, youtube=None):
+        raise RuntimeError("no client")
+    monkeypatch.setattr(utils, 'get_videos_statistics', failing)
+    videos = make_videos('a1')
+    
+    with pytest.raises(RuntimeError):
+        utils.refresh_video_statistics(videos, 'query a')
+    
+    calls = []
+    monkeypatch.setattr(utils, 'get_videos_statistics', slow_statistics(calls, delay=0))
+    assert utils.refresh_video_statistics(videos, 'query a') == 1
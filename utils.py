@@ -1,22 +1,33 @@
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-from youtube_transcript_api import YouTubeTranscriptApi
-from openai import OpenAI
-from config import YOUTUBE_API_KEY, OPENAI_API_KEY, YOUTUBE_API_SERVICE_NAME, YOUTUBE_API_VERSION
+from llm_gateway import chat_completion, choose_model
+from summary_styles import get_prompt_hash
+from rating_schema import parse_rating, record_parse_result, RatingParseError
+from prompts import build_rating_messages, build_summary_messages
+from database import DatabaseManager
+from video_records import format_explanation
+import config
+from config import YOUTUBE_API_SERVICE_NAME, YOUTUBE_API_VERSION
 import re
 import json
+import bisect
+import threading
+import time
+
+# SDKs (googleapiclient, youtube_transcript_api, numpy via dedup) are imported
+# inside the functions that use them, so importing this module stays cheap
 
 def get_youtube_service():
-    return build(YOUTUBE_API_SERVICE_NAME, YOUTUBE_API_VERSION, developerKey=YOUTUBE_API_KEY)
+    from googleapiclient.discovery import build
+    return build(YOUTUBE_API_SERVICE_NAME, YOUTUBE_API_VERSION, developerKey=config.YOUTUBE_API_KEY)
 
 def build_youtube_client():
     """Build and return a YouTube API client"""
+    from googleapiclient.discovery import build
     try:
-        print(f"Building YouTube client with key: {YOUTUBE_API_KEY[:10]}...")
+        print("Building YouTube client...")
         client = build(
             YOUTUBE_API_SERVICE_NAME,
             YOUTUBE_API_VERSION,
-            developerKey=YOUTUBE_API_KEY
+            developerKey=config.YOUTUBE_API_KEY
         )
         print("YouTube client built successfully")
         return client
@@ -24,15 +35,15 @@ def build_youtube_client():
         print(f"Error building YouTube client: {str(e)}")
         raise e
 
-def search_videos(query, progress_callback=None):
-    """Search YouTube videos and return processed results"""
+def fetch_search_candidates(query, progress_callback=None):
+    """Search YouTube and return metadata-only videos, before any rating"""
+    from googleapiclient.errors import HttpError
     try:
         # Initialize YouTube API client
         youtube = build_youtube_client()
         
         # Debug logging
         print(f"Searching for query: {query}")
-        print(f"YouTube API Key: {YOUTUBE_API_KEY[:10]}...")  # Show first 10 chars
         
         if progress_callback:
             progress_callback("Searching YouTube...")
@@ -58,24 +69,28 @@ def search_videos(query, progress_callback=None):
             print(f"Error details: {e.error_details if hasattr(e, 'error_details') else 'No details'}")
             raise e
         
-        # Process videos
-        videos = []
-        for item in search_response.get("items", []):
-            try:
-                if item["id"]["kind"] == "youtube#video":
-                    video_id = item["id"]["videoId"]
-                    print(f"Processing video: {video_id}")
-                    
-                    # Get video details
-                    video_data = get_video_metadata(video_id)
-                    if video_data:
-                        videos.append(video_data)
-                        
-                        if progress_callback:
-                            progress_callback(f"Processed {len(videos)} of 6 videos...")
-            except Exception as e:
-                print(f"Error processing video: {str(e)}")
-                continue
+        # Get video details for all results in one call
+        video_ids = [
+            item["id"]["videoId"] for item in search_response.get("items", [])
+            if item["id"].get("kind") == "youtube#video"
+        ]
+        videos = get_videos_metadata(video_ids, youtube)
+        for video_data in videos:
+            # Rate against the query that found the video
+            video_data['search_query'] = query
+        
+        if progress_callback:
+            progress_callback(f"Processed {len(videos)} of {len(video_ids)} videos...")
+        
+        return videos
+    except Exception as e:
+        print(f"Error in fetch_search_candidates: {str(e)}")
+        raise e
+
+def search_videos(query, progress_callback=None):
+    """Search YouTube videos and return processed results"""
+    try:
+        videos = fetch_search_candidates(query, progress_callback)
         
         if progress_callback:
             progress_callback("Ranking videos...")
@@ -86,104 +101,87 @@ def search_videos(query, progress_callback=None):
         print(f"Error in search_videos: {str(e)}")
         raise e
 
-def get_content_rating(transcript: str, query: str) -> dict:
-    """Rate content using OpenAI based on comprehensive content analysis"""
-    client = OpenAI()
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": """You are a content rating assistant. Analyze the content and return a JSON object.
-                    Always respond with a valid JSON object in this exact format:
-                    {
-                        "rating": "[S/A/B/C/D]",
-                        "score": number between 1-100,
-                        "explanation": {
-                            "main_reason": "Primary reason for the rating",
-                            "strengths": ["List of content strengths"],
-                            "weaknesses": ["List of content weaknesses"],
-                            "relevance": "How well it matches the search query",
-                            "idea_count": "Number of valuable ideas found",
-                            "recommendation": "Brief recommendation for viewers"
-                        }
-                    }
-                    
-                    Criteria:
-                    S Tier (Must Watch): 
-                    - Contains 8+ unique, valuable ideas
-                    - Strong match with search query
-                    - High-quality, well-structured content
-                    - Provides unique insights or expert knowledge
-                    - Comprehensive coverage of the topic
-                    
-                    A Tier (Highly Recommended):
-                    - Contains 6+ valuable ideas
-                    - Good match with search query
-                    - Clear and well-presented content
-                    - Good depth of information
-                    - Practical examples or demonstrations
-                    
-                    B Tier (Worth Watching):
-                    - Contains 4+ useful ideas
-                    - Moderate match with search query
-                    - Decent content organization
-                    - Basic but solid information
-                    - Some practical value
-                    
-                    C Tier (Optional):
-                    - Contains 2+ basic ideas
-                    - Partial match with search query
-                    - Basic or surface-level content
-                    - Limited practical value
-                    - May have some redundant information
-                    
-                    D Tier (Skip):
-                    - Few meaningful ideas
-                    - Poor match with search query
-                    - Unclear or disorganized content
-                    - Very basic or redundant information
-                    - Little to no practical value"""},
-                {"role": "user", "content": f"Query: {query}\n\nTranscript: {transcript}"}
-            ],
-            temperature=0.7
-        )
-        content = json.loads(response.choices[0].message.content)
-        
-        # Format the explanation in a user-friendly way
-        explanation = f"""
-Rating: {content['rating']} ({content['score']}/100)
+def format_rating(content: dict) -> dict:
+    """Turn a validated rating into the fields shown on video cards"""
+    explanation = format_explanation(content['rating'], content['score'], content['explanation'])
+    
+    return {
+        'rating': content['rating'],
+        'score': content['score'],
+        'explanation': explanation,
+        'detailed_analysis': content['explanation']  # Keep raw data for potential use
+    }
 
-Main Reason: {content['explanation']['main_reason']}
+def build_repair_messages(messages: list, raw_content: str, parse_error: Exception) -> list:
+    """Extend a rating conversation with the invalid reply and a request to correct it"""
+    return messages + [
+        {"role": "assistant", "content": raw_content or ""},
+        {"role": "user", "content": f"That reply was invalid: {parse_error}. "
+                                    "Respond with only the corrected JSON object in the required format."}
+    ]
 
-Strengths:
-{chr(10).join('• ' + s for s in content['explanation']['strengths'])}
+def rating_error(e: Exception) -> dict:
+    """Fallback rating shown when rating a video failed"""
+    return {
+        'rating': 'D',
+        'score': 0,
+        'explanation': f'Error generating rating: {str(e)}',
+        'detailed_analysis': None
+    }
 
-Weaknesses:
-{chr(10).join('• ' + w for w in content['explanation']['weaknesses'])}
+def rating_failed(video) -> bool:
+    """Whether a video rated by rate_video carries the rating_error fallback"""
+    # Stored, fresh and copied ratings all keep their structured analysis; only the fallback has none
+    return video.get('rating_analysis') is None
 
-Relevance: {content['explanation']['relevance']}
-Ideas Found: {content['explanation']['idea_count']}
+# Options of every rating call, sync or async
+RATING_CALL_OPTIONS = {'temperature': 0, 'response_format': {"type": "json_object"}}
 
-Recommendation: {content['explanation']['recommendation']}
-        """.strip()
-        
-        return {
-            'rating': content['rating'],
-            'score': content['score'],
-            'explanation': explanation,
-            'detailed_analysis': content['explanation']  # Keep raw data for potential use
-        }
+def rating_steps(transcript: str, query: str):
+    """The rating flow without its API calls, shared by utils and async_utils
     
+    A generator that yields the messages of each rating call to make and is
+    sent the response; the rating is its return value. Raises RatingParseError
+    when the reply is still invalid after one repair attempt.
+    """
+    messages = build_rating_messages(transcript, query)
+    response = yield messages
+    raw_content = response.choices[0].message.content
+    
+    try:
+        content = parse_rating(raw_content)
+        record_parse_result()
+    except RatingParseError as parse_error:
+        # One targeted repair: show the model its own reply and the validation error
+        print(f"Rating parse failed, attempting repair: {parse_error}")
+        repair_response = yield build_repair_messages(messages, raw_content, parse_error)
+        try:
+            content = parse_rating(repair_response.choices[0].message.content)
+        except RatingParseError:
+            record_parse_result(parse_failed=True, repaired=False)
+            raise
+        record_parse_result(parse_failed=True, repaired=True)
+    
+    rating = format_rating(content)
+    rating['model'] = response.model
+    return rating
+
+def get_content_rating(transcript: str, query: str) -> dict:
+    """Rate content using OpenAI based on comprehensive content analysis"""
+    try:
+        steps = rating_steps(transcript, query)
+        messages = next(steps)
+        while True:
+            response = chat_completion('rating', messages=messages, **RATING_CALL_OPTIONS)
+            messages = steps.send(response)
+    except StopIteration as finished:
+        return finished.value
     except Exception as e:
         print(f"Error in content rating: {e}")
-        return {
-            'rating': 'D',
-            'score': 0,
-            'explanation': f'Error generating rating: {str(e)}',
-            'detailed_analysis': None
-        }
+        return rating_error(e)
 
 def check_transcript_availability(video_id):
+    from youtube_transcript_api import YouTubeTranscriptApi
     try:
         YouTubeTranscriptApi.get_transcript(video_id)
         return True
@@ -191,6 +189,7 @@ def check_transcript_availability(video_id):
         return False
 
 def get_video_transcript(video_id):
+    from youtube_transcript_api import YouTubeTranscriptApi
     try:
         transcript = YouTubeTranscriptApi.get_transcript(video_id)
         return ' '.join([entry['text'] for entry in transcript])
@@ -201,26 +200,37 @@ def generate_summary(transcript):
     if not transcript:
         return "No transcript available for summarization."
     
-    client = OpenAI()
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a helpful assistant that summarizes YouTube video transcripts."},
-                {"role": "user", "content": f"Please summarize this transcript:\n\n{transcript}"}
-            ],
-            temperature=0.7
+        response = chat_completion(
+            'summary',
+            messages=build_summary_messages(transcript)
         )
         return response.choices[0].message.content
     except Exception as e:
         print(f"Error generating summary: {e}")
         return "Error generating summary. Please try again later."
 
+# videos().list accepts at most 50 IDs per call
+VIDEOS_LIST_MAX_IDS = 50
+
+def _video_from_item(item):
+    """Convert a videos().list item into the app's video dict"""
+    return {
+        'id': item['id'],
+        'title': item['snippet']['title'],
+        'description': item['snippet']['description'],
+        'date': item['snippet']['publishedAt'],
+        'views': int(item['statistics'].get('viewCount', 0)),
+        'likes': int(item['statistics'].get('likeCount', 0)),
+        'statistics_updated_at': time.time(),
+        'has_transcript': True
+    }
+
 def get_video_metadata(video_id):
     """Fetch fresh metadata for a video"""
     try:
         print(f"Fetching metadata for video: {video_id}")
-        youtube = build('youtube', 'v3', developerKey=YOUTUBE_API_KEY)
+        youtube = build_youtube_client()
         video_request = youtube.videos().list(
             part='snippet,statistics',
             id=video_id
@@ -229,51 +239,250 @@ def get_video_metadata(video_id):
         print(f"Got metadata response for {video_id}")
         
         if video_response['items']:
-            video = video_response['items'][0]
-            return {
-                'id': video_id,
-                'title': video['snippet']['title'],
-                'description': video['snippet']['description'],
-                'date': video['snippet']['publishedAt'],
-                'views': int(video['statistics'].get('viewCount', 0)),
-                'likes': int(video['statistics'].get('likeCount', 0)),
-                'has_transcript': True
-            }
+            return _video_from_item(video_response['items'][0])
         else:
             print(f"No items found in response for video {video_id}")
     except Exception as e:
         print(f"Error fetching video metadata: {str(e)}")
     return None
 
-def rank_videos(videos):
-    """Rank and rate videos based on their content"""
+def get_videos_metadata(video_ids, youtube=None):
+    """Fetch metadata for many videos with one videos().list call per 50 IDs
+    
+    Returns videos in the order of video_ids, skipping IDs YouTube didn't return.
+    """
+    youtube = youtube or build_youtube_client()
+    videos_by_id = {}
+    for start in range(0, len(video_ids), VIDEOS_LIST_MAX_IDS):
+        chunk = video_ids[start:start + VIDEOS_LIST_MAX_IDS]
+        try:
+            video_response = youtube.videos().list(
+                part='snippet,statistics',
+                id=','.join(chunk),
+                maxResults=len(chunk)
+            ).execute()
+        except Exception as e:
+            print(f"Error fetching video metadata: {str(e)}")
+            continue
+        for item in video_response.get('items', []):
+            videos_by_id[item['id']] = _video_from_item(item)
+    return [videos_by_id[video_id] for video_id in video_ids if video_id in videos_by_id]
+
+def get_videos_statistics(video_ids, youtube=None):
+    """Fetch view and like counts with one statistics-only videos().list call per 50 IDs
+    
+    Returns {video_id: (views, likes)} for the IDs YouTube returned.
+    """
+    youtube = youtube or build_youtube_client()
+    statistics = {}
+    for start in range(0, len(video_ids), VIDEOS_LIST_MAX_IDS):
+        chunk = video_ids[start:start + VIDEOS_LIST_MAX_IDS]
+        try:
+            video_response = youtube.videos().list(
+                part='statistics',
+                id=','.join(chunk),
+                maxResults=len(chunk)
+            ).execute()
+        except Exception as e:
+            print(f"Error fetching video statistics: {str(e)}")
+            continue
+        for item in video_response.get('items', []):
+            statistics[item['id']] = (
+                int(item['statistics'].get('viewCount', 0)),
+                int(item['statistics'].get('likeCount', 0))
+            )
+    return statistics
+
+_statistics_lock = threading.Lock()
+_statistics_in_flight = set()  # queries whose counts are being fetched right now
+
+def refresh_video_statistics(videos, search_query=None, max_age_seconds=config.STATISTICS_MAX_AGE_SECONDS):
+    """Update views and likes of ranked videos in place, without transcripts or ratings
+    
+    Only counts older than max_age_seconds are fetched, so calling this on every
+    rerun costs one API unit per 50 stale videos at most once per max age. With
+    a search_query the new counts are also merged into that query's cached results.
+    Returns the number of videos whose counts were refreshed.
+    """
+    # Sessions share result records: the lock only guards picking the stale IDs, and a
+    # query already being refreshed by another session keeps its current counts meanwhile
+    in_flight_key = search_query if search_query is not None else id(videos)
+    with _statistics_lock:
+        if in_flight_key in _statistics_in_flight:
+            return 0
+        now = time.time()
+        stale_ids = [
+            video['id'] for video in videos
+            if now - (video.get('statistics_updated_at') or 0) > max_age_seconds
+        ]
+        if not stale_ids:
+            return 0
+        _statistics_in_flight.add(in_flight_key)
+    
     try:
-        ranked_videos = []
+        statistics = get_videos_statistics(stale_ids)
+        stale_ids = set(stale_ids)
         for video in videos:
-            # Get transcript
-            transcript = get_video_transcript(video['id'])
-            if not transcript:
-                continue
-            
-            # Get content rating
-            rating = get_content_rating(transcript, video.get('search_query', ''))
+            # Checked IDs YouTube didn't return (e.g. removed videos) wait for the next refresh too
+            if video['id'] in stale_ids:
+                if video['id'] in statistics:
+                    video['views'], video['likes'] = statistics[video['id']]
+                video['statistics_updated_at'] = now
+        
+        if statistics and search_query:
+            db = DatabaseManager()
+            db.merge_search_results_statistics(search_query, statistics, now, config.SEARCH_CACHE_MAX_AGE_HOURS)
+        return len(statistics)
+    finally:
+        with _statistics_lock:
+            _statistics_in_flight.discard(in_flight_key)
+
+def get_channel_uploads_playlist(channel_id, youtube=None):
+    """Get the ID of the playlist holding all uploads of a channel"""
+    youtube = youtube or build_youtube_client()
+    response = youtube.channels().list(part='contentDetails', id=channel_id).execute()
+    if not response.get('items'):
+        raise ValueError(f"Channel not found: {channel_id}")
+    return response['items'][0]['contentDetails']['relatedPlaylists']['uploads']
+
+def iter_playlist_video_ids(playlist_id, youtube=None):
+    """Yield one page (up to 50) of video IDs at a time from a playlist"""
+    youtube = youtube or build_youtube_client()
+    page_token = None
+    while True:
+        response = youtube.playlistItems().list(
+            part='contentDetails',
+            playlistId=playlist_id,
+            maxResults=50,
+            pageToken=page_token
+        ).execute()
+        yield [item['contentDetails']['videoId'] for item in response.get('items', [])]
+        
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            return
+
+# Define tier order (S is highest)
+TIER_ORDER = {'S': 0, 'A': 1, 'B': 2, 'C': 3, 'D': 4}
+
+def ranking_key(video):
+    """Sort key for ranked videos: rating tier first, then content score"""
+    return (TIER_ORDER[video['rating_tier']], -video['content_score'])
+
+def get_transcript_signature(video_id, transcript=None):
+    """Get a video's MinHash signature, from the cache or computed from its transcript
+    
+    Returns (signature, transcript); both are None when there is no transcript.
+    The transcript is only fetched when the signature isn't cached.
+    """
+    from dedup import minhash_signature, signature_to_bytes, signature_from_bytes
+    db = DatabaseManager()
+    cached = db.get_video_signature(video_id)
+    if cached is not None:
+        return signature_from_bytes(cached), transcript
+    
+    transcript = transcript or get_video_transcript(video_id)
+    if not transcript:
+        return None, None
+    signature = minhash_signature(transcript)
+    db.save_video_signature(video_id, signature_to_bytes(signature))
+    return signature, transcript
+
+def rate_video(video, duplicate_index=None):
+    """Attach a content rating to a video, or return None if it has no transcript
+    
+    With a ``duplicate_index``, a video whose transcript nearly matches one
+    already rated in the same run reuses that rating instead of calling the API.
+    """
+    from dedup import signature_from_bytes
+    # Reuse a stored rating (e.g. from offline batch rating) before fetching anything
+    search_query = video.get('search_query', '')
+    db = DatabaseManager()
+    stored = db.get_rating(video['id'], search_query)
+    if stored:
+        rating = format_rating(stored)
+        if duplicate_index is not None:
+            # Only a cached signature is used here, so stored ratings never fetch transcripts
+            cached = db.get_video_signature(video['id'])
+            if cached is not None:
+                duplicate_index.add(video, signature_from_bytes(cached))
+    else:
+        transcript = None
+        if duplicate_index is not None:
+            signature, transcript = get_transcript_signature(video['id'])
+            if signature is None:
+                return None
             
-            # Extract rating tier and score
-            if isinstance(rating, dict):
-                video['rating_tier'] = rating.get('rating', 'D')
-                video['content_score'] = rating.get('score', 0)
-                video['rating_explanation'] = rating.get('explanation', 'No explanation provided')
-            else:
-                # Default values if rating is not in expected format
-                video['rating_tier'] = 'D'
-                video['content_score'] = 0
-                video['rating_explanation'] = 'Rating unavailable'
+            original = duplicate_index.find(signature)
+            if original is not None:
+                return copy_duplicate_rating(video, original)
+        
+        # Get transcript
+        transcript = transcript or get_video_transcript(video['id'])
+        if not transcript:
+            return None
+        
+        # Get content rating
+        rating = get_content_rating(transcript, search_query)
+        if rating.get('detailed_analysis') is not None:
+            db.save_rating(
+                video['id'], search_query, rating.get('model'),
+                rating['rating'], rating['score'], rating['detailed_analysis']
+            )
             
-            ranked_videos.append(video)
+            # Failed ratings aren't indexed, so their copies get rated on their own
+            if duplicate_index is not None:
+                duplicate_index.add(video, signature)
+    
+    return apply_rating(video, rating)
+
+def apply_rating(video, rating):
+    """Copy the fields of a rating onto a video"""
+    # Extract rating tier and score
+    if isinstance(rating, dict):
+        video['rating_tier'] = rating.get('rating', 'D')
+        video['content_score'] = rating.get('score', 0)
+        video['rating_explanation'] = rating.get('explanation', 'No explanation provided')
+        # Kept so compact records can render the explanation on demand
+        video['rating_analysis'] = rating.get('detailed_analysis')
+    else:
+        # Default values if rating is not in expected format
+        video['rating_tier'] = 'D'
+        video['content_score'] = 0
+        video['rating_explanation'] = 'Rating unavailable'
+        video['rating_analysis'] = None
+    
+    return video
+
+def copy_duplicate_rating(video, original):
+    """Give a near-duplicate video the rating of the copy that was actually rated"""
+    video['rating_tier'] = original['rating_tier']
+    video['content_score'] = original['content_score']
+    video['rating_explanation'] = original['rating_explanation']
+    video['rating_analysis'] = original.get('rating_analysis')
+    video['duplicate_of'] = original['id']
+    return video
+
+def rank_videos(videos, on_progress=None):
+    """Rank and rate videos based on their content
+    
+    ``on_progress(ranked_videos, pending_videos)`` is called after each video is
+    processed, with the videos rated so far already in tier order, so callers can
+    render results as they arrive instead of waiting for the whole list.
+    """
+    try:
+        ranked_videos = []
+        from dedup import DuplicateIndex
         
-        # Sort by rating tier and content score
-        tier_order = {'S': 0, 'A': 1, 'B': 2, 'C': 3, 'D': 4}
-        ranked_videos.sort(key=lambda x: (tier_order[x['rating_tier']], -x['content_score']))
+        # Near-duplicates (re-uploads, mirrors) reuse the rating of the first copy
+        duplicate_index = DuplicateIndex()
+        for index, video in enumerate(videos):
+            if rate_video(video, duplicate_index):
+                # Insert in tier order; ties keep arrival order like a stable sort
+                bisect.insort(ranked_videos, video, key=ranking_key)
+            
+            if on_progress:
+                on_progress(ranked_videos, videos[index + 1:])
         
         return ranked_videos
     
@@ -281,18 +490,47 @@ def rank_videos(videos):
         print(f"Error in rank_videos: {e}")
         raise e 
 
-def generate_summary_with_style(transcript: str, prompt_template: str) -> str:
-    client = OpenAI()
+SUMMARY_ERROR_MESSAGE = "Error generating summary. Please try again later."
+
+def get_summary_key(prompt_template: str, route: str, model: str = None) -> tuple:
+    """Get the (prompt_hash, model) a summary is stored under, choosing the model if not given"""
+    return get_prompt_hash(prompt_template), model or choose_model(route)
+
+def get_or_generate_summary(video_id: str, prompt_template: str, route: str, language: str,
+                            user_id: int = None, is_public: bool = True, model: str = None) -> tuple:
+    """Get a summary from the summaries store, generating and storing it on a miss
+    
+    Summaries are stored under the model that writes them: the route's primary,
+    or its fallback while the primary is over its SLO (see choose_model).
+    Returns (summary, from_store); summary is None when generation failed.
+    """
+    prompt_hash, model = get_summary_key(prompt_template, route, model)
+    
+    db = DatabaseManager()
+    summary = db.get_summary(user_id, video_id, prompt_hash, language, model)
+    if summary is not None:
+        return summary, True
+    
+    transcript = get_video_transcript(video_id)
+    if not transcript:
+        return None, False
+    
+    summary = generate_summary_with_style(transcript, prompt_template, route=route, model=model)
+    if summary == SUMMARY_ERROR_MESSAGE:
+        return None, False
+    
+    db.save_summary(user_id, video_id, prompt_hash, language, model, summary, is_public=is_public)
+    return summary, False
+
+def generate_summary_with_style(transcript: str, prompt_template: str, route: str = 'summary',
+                                model: str = None) -> str:
     try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": prompt_template},
-                {"role": "user", "content": transcript}
-            ],
-            temperature=0.7
+        response = chat_completion(
+            route,
+            messages=build_summary_messages(transcript, prompt_template),
+            model=model
         )
         return response.choices[0].message.content
     except Exception as e:
         print(f"Error generating summary: {e}")
-        return "Error generating summary. Please try again later." 
\ No newline at end of file
+        return SUMMARY_ERROR_MESSAGE
@@ -0,0 +1,177 @@
+"""Compact in-memory video records, shared by reference across sessions.
+
+Search results are kept in every session for as long as it is open. A
+``VideoRecord`` stores one result in a slotted dataclass instead of a dict,
+with the description cut to what cards show and the rating explanation kept
+as the structured analysis, rendered to text only when displayed. Ranked
+results for a query are held once per process in a small LRU cache, so
+sessions that search the same query share one tuple of records.
+"""
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, fields
+from config import VIDEO_DESCRIPTION_MAX_CHARS, SHARED_RESULTS_MAX_QUERIES, SHARED_RESULTS_MAX_AGE_SECONDS
+
+# Keys of a rating's structured explanation, stored by records as a tuple of values
+ANALYSIS_KEYS = ('main_reason', 'strengths', 'weaknesses', 'relevance', 'idea_count', 'recommendation')
+
+def format_explanation(rating: str, score: int, analysis: dict) -> str:
+    """Render a structured rating analysis as the text shown on video cards"""
+    return f"""
+Rating: {rating} ({score}/100)
+
+Main Reason: {analysis['main_reason']}
+
+Strengths:
+{chr(10).join('• ' + s for s in analysis['strengths'])}
+
+Weaknesses:
+{chr(10).join('• ' + w for w in analysis['weaknesses'])}
+
+Relevance: {analysis['relevance']}
+Ideas Found: {analysis['idea_count']}
+
+Recommendation: {analysis['recommendation']}
+    """.strip()
+
+def truncate_description(description: str, max_chars: int = VIDEO_DESCRIPTION_MAX_CHARS) -> str:
+    """Cut a description at a word boundary, marking the cut with '...'"""
+    if not description or len(description) <= max_chars:
+        return description or ''
+    words = description[:max_chars].rsplit(None, 1)
+    cut = words[0] if len(words) > 1 else description[:max_chars]
+    # An ASCII marker keeps ASCII descriptions in CPython's 1-byte-per-character form
+    return cut.rstrip() + '...'
+
+@dataclass(slots=True)
+class VideoRecord:
+    """One ranked search result
+    
+    Supports the dict access (``video['title']``, ``video.get(...)``,
+    ``'rating_tier' in video``) the display code uses for video dicts. Only
+    views, likes and statistics_updated_at change after ranking, when
+    statistics are refreshed.
+    """
+    id: str
+    title: str
+    description: str
+    date: str
+    views: int
+    likes: int
+    has_transcript: bool = True
+    search_query: str = ''
+    rating_tier: str = None
+    content_score: int = 0
+    analysis_values: tuple = None  # structured explanation from the rating model, in ANALYSIS_KEYS order
+    rating_note: str = None  # explanation text for ratings without an analysis (errors, old cache rows)
+    duplicate_of: str = None
+    statistics_updated_at: float = 0.0  # when views and likes were last fetched
+    
+    @classmethod
+    def from_dict(cls, video: dict) -> 'VideoRecord':
+        analysis = video.get('rating_analysis')
+        if analysis:
+            analysis = tuple(
+                tuple(value) if isinstance(value, list) else value
+                for value in (analysis.get(key) for key in ANALYSIS_KEYS)
+            )
+        return cls(
+            id=video['id'],
+            title=video['title'],
+            description=truncate_description(video.get('description', '')),
+            date=video['date'],
+            views=video.get('views', 0),
+            likes=video.get('likes', 0),
+            has_transcript=video.get('has_transcript', True),
+            # Every result of a query repeats the same query string; keep one copy
+            search_query=sys.intern(video.get('search_query', '')),
+            rating_tier=video.get('rating_tier'),
+            content_score=video.get('content_score', 0),
+            analysis_values=analysis or None,
+            rating_note=None if analysis else video.get('rating_explanation'),
+            duplicate_of=video.get('duplicate_of'),
+            statistics_updated_at=video.get('statistics_updated_at', 0.0)
+        )
+    
+    @property
+    def rating_analysis(self) -> dict:
+        if self.analysis_values is None:
+            return None
+        return {
+            key: list(value) if isinstance(value, tuple) else value
+            for key, value in zip(ANALYSIS_KEYS, self.analysis_values)
+        }
+    
+    @property
+    def rating_explanation(self) -> str:
+        if self.analysis_values:
+            return format_explanation(self.rating_tier, self.content_score, self.rating_analysis)
+        return self.rating_note or 'No explanation provided'
+    
+    def __getitem__(self, key):
+        if key not in _RECORD_KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+    
+    def __contains__(self, key) -> bool:
+        return key in _RECORD_KEYS and getattr(self, key) is not None
+    
+    def __setitem__(self, key, value):
+        if key not in _STATISTICS_KEYS:
+            raise KeyError(f"{key} can't be changed on a shared record")
+        setattr(self, key, value)
+    
+    def get(self, key, default=None):
+        value = getattr(self, key) if key in _RECORD_KEYS else None
+        return default if value is None else value
+    
+    def to_dict(self) -> dict:
+        """Plain dict in the shape of the pipeline's video dicts"""
+        video = {
+            field.name: getattr(self, field.name) for field in fields(self)
+            if field.name not in ('analysis_values', 'rating_note')
+        }
+        video['rating_analysis'] = self.rating_analysis
+        video['rating_explanation'] = self.rating_explanation
+        return video
+
+_RECORD_KEYS = frozenset(field.name for field in fields(VideoRecord)) | {'rating_analysis', 'rating_explanation'}
+
+_STATISTICS_KEYS = frozenset({'views', 'likes', 'statistics_updated_at'})
+
+def compact_videos(videos) -> tuple:
+    """Convert video dicts to an immutable tuple of records; records are kept as they are"""
+    return tuple(video if isinstance(video, VideoRecord) else VideoRecord.from_dict(video) for video in videos)
+
+_shared_results = OrderedDict()  # query -> (loaded_at, records), least recently used first
+_shared_lock = threading.Lock()
+
+def get_shared_results(query: str):
+    """Get the records shared for a query in this process, or None"""
+    with _shared_lock:
+        entry = _shared_results.get(query)
+        if entry is None:
+            return None
+        loaded_at, records = entry
+        # Expire so results refreshed by another process (e.g. the cache warmer) are picked up
+        if time.time() - loaded_at > SHARED_RESULTS_MAX_AGE_SECONDS:
+            del _shared_results[query]
+            return None
+        _shared_results.move_to_end(query)
+        return records
+
+def share_results(query: str, videos) -> tuple:
+    """Store a query's results as records for all sessions and return them"""
+    records = compact_videos(videos)
+    with _shared_lock:
+        _shared_results[query] = (time.time(), records)
+        _shared_results.move_to_end(query)
+        while len(_shared_results) > SHARED_RESULTS_MAX_QUERIES:
+            _shared_results.popitem(last=False)
+    return records
+
+def clear_shared_results():
+    with _shared_lock:
+        _shared_results.clear()